@@ -5,7 +5,10 @@ from flask import Flask
 
 from .config import Config
 from .extensions import db, jwt
-from .utils.logging import setup_logging
+from .utils.logging import install_request_ids, setup_logging
+from .utils.metrics import install_pool_gauges
+from .utils.querystats import install_query_stats
+from .utils.sqlite import engine_options, install_sqlite_profile
 
 
 def create_app() -> Flask:
@@ -31,8 +34,16 @@ def create_app() -> Flask:
             abs_db_path = os.path.join(project_root, rel)
             app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{abs_db_path}"
 
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
+
     db.init_app(app)
     jwt.init_app(app)
+    install_request_ids(app)
+
+    with app.app_context():
+        install_sqlite_profile(app, db.engine)
+        install_query_stats(app, db.engine)
+        install_pool_gauges(db.engine)
 
     from .routes.web import web_bp
     from .routes.api import api_bp
@@ -40,16 +51,26 @@ def create_app() -> Flask:
     app.register_blueprint(web_bp)
     app.register_blueprint(api_bp, url_prefix="/api")
 
+    from .commands import register_commands
+
+    register_commands(app)
+
     with app.app_context():
         from . import models  # noqa: F401
-        db.create_all()
-        try:
-            from .utils.migrations import ensure_sqlite_schema
-            ensure_sqlite_schema()
-        except Exception:
-            # Never break app startup because of non-critical SQLite migrations
-            import logging
-
-            logging.getLogger(__name__).exception("SQLite schema migration failed")
+        from .utils.migrations import migrate
+
+        # a single version read when the schema is current; a failed migration stops startup
+        migrate()
+
+    if app.config.get("NOTIFY_WORKER") == "thread":
+        # started on the first request, so CLI commands do not spawn a delivery thread
+        from .utils.outbox import start_worker
+
+        app.before_request(lambda: start_worker(app) and None)
+
+    if app.config.get("EVENTS_SERVER") == "thread":
+        from .utils.events import start_events_thread
+
+        app.before_request(lambda: start_events_thread(app) and None)
 
     return app
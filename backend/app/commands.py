@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import click
+from flask import Flask
+
+
+def register_commands(app: Flask) -> None:
+    """Maintenance commands: `flask --app run_backend <command>`."""
+
+    @app.cli.command("finance-balances")
+    @click.option("--fix", is_flag=True, help="Rewrite mismatching aggregates from the ledger.")
+    def finance_balances(fix: bool) -> None:
+        """Check group finance balances against a full ledger recompute."""
+        from .utils.finance import check_group_balances
+
+        mismatches = check_group_balances(fix=fix)
+        for m in mismatches:
+            click.echo(f"group {m['group_id']}: stored={m['actual']} ledger={m['expected']}")
+        if not mismatches:
+            click.echo("All group finance balances are consistent.")
+        elif fix:
+            click.echo(f"Rebuilt {len(mismatches)} balance(s).")
+        else:
+            raise SystemExit(1)
+
+    @app.cli.command("finance-rollups")
+    @click.option("--fix", is_flag=True, help="Rebuild the groups whose rollups differ from the ledger.")
+    @click.option("--rebuild", is_flag=True, help="Recompute every rollup from the ledger.")
+    @click.option("--group", "group_id", type=int, default=None, help="Only this group (with --rebuild).")
+    def finance_rollups(fix: bool, rebuild: bool, group_id: int | None) -> None:
+        """Check the daily group finance rollups against a raw ledger scan, or rebuild them."""
+        from .utils.rollups import check_rollups, rebuild_rollups
+
+        if rebuild:
+            rows = rebuild_rollups(group_id)
+            click.echo(f"Rebuilt {rows} rollup row(s).")
+            return
+        mismatches = check_rollups(fix=fix)
+        for m in mismatches[:50]:
+            click.echo(f"{m['key']}: stored={m['actual']} ledger={m['expected']}")
+        if not mismatches:
+            click.echo("Group finance rollups match the ledger.")
+        elif fix:
+            click.echo(f"Rebuilt the groups of {len(mismatches)} mismatching row(s).")
+        else:
+            raise SystemExit(1)
+
+    @app.cli.command("compact-changes")
+    @click.option("--days", type=int, default=None, help="Retention (default CHANGES_RETENTION_DAYS).")
+    def compact_changes_cmd(days: int | None) -> None:
+        """Compact the group change log (run daily; clients behind the cut refetch in full)."""
+        from .utils.changes import compact_changes
+
+        days = app.config["CHANGES_RETENTION_DAYS"] if days is None else days
+        r = compact_changes(days)
+        click.echo(f"Removed {r['superseded']} superseded and {r['expired']} expired change(s); "
+                   f"{r['groups_floored']} group(s) moved their floor.")
+
+    @app.cli.command("events-server")
+    @click.option("--host", default=None, help="Default EVENTS_HOST.")
+    @click.option("--port", type=int, default=None, help="Default EVENTS_PORT.")
+    def events_server(host: str | None, port: int | None) -> None:
+        """Serve /api/groups/<gid>/events (Server-Sent Events) from one asyncio process."""
+        from .utils.events import run_events_server
+
+        host = host or app.config["EVENTS_HOST"]
+        port = port or app.config["EVENTS_PORT"]
+        click.echo(f"Event hub listening on {host}:{port}.")
+        run_events_server(app, host, port)
+
+    @app.cli.command("schema-version")
+    def schema_version() -> None:
+        """Show the database schema version and applied migrations with their timings."""
+        from .utils.migrations import applied_migrations, latest_version
+
+        rows = applied_migrations()
+        for r in rows:
+            click.echo(f"{r['version']:>4}  {r['name']:<32} {r['applied_at']:%Y-%m-%d %H:%M:%S}  {r['duration_ms']:.1f}ms")
+        current = rows[-1]["version"] if rows else 0
+        click.echo(f"Schema v{current}, latest v{latest_version()}.")
+
+    @app.cli.command("notify-worker")
+    def notify_worker() -> None:
+        """Deliver queued Telegram notifications (run with NOTIFY_WORKER=off on the web processes)."""
+        from .utils.outbox import OutboxWorker
+
+        click.echo("Notification outbox worker started.")
+        worker = OutboxWorker(app)
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            worker.stop()
@@ -11,6 +11,31 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///instance/app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool (ignored for in-memory SQLite)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # seconds; -1 disables
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "0") == "1"
+
+    # SQLite tuning, applied to every new connection (SQLITE_TUNING=0 keeps SQLite defaults)
+    SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1") == "1"
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-20000"))  # negative = KiB
+    SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+
+    # Per-request SQL stats (see utils/querystats.py); 0 disables the slow logs
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+    SLOW_REQUEST_QUERIES = int(os.getenv("SLOW_REQUEST_QUERIES", "0"))
+    # /metrics; with METRICS_DIR set (read by utils/metrics at import) all processes are aggregated
+    # non-empty = require "Authorization: Bearer <token>"; empty = only direct scrapes from localhost
+    # (requests relayed by a proxy, i.e. with X-Forwarded-For/X-Real-IP/Forwarded, get 403)
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
     # JWT
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "super-secret-jwt-key-change-me")
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", "3600"))  # seconds
@@ -18,9 +43,50 @@ class Config:
     # Telegram
     BOT_TOKEN = os.getenv("BOT_TOKEN", "")
     TELEGRAM_VALIDATE = os.getenv("TELEGRAM_VALIDATE", "1") == "1"
+    TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+    TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", "4"))  # keep-alive connections
+    TELEGRAM_TIMEOUT = float(os.getenv("TELEGRAM_TIMEOUT", "10"))  # seconds per request
+    TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "2"))  # on 429/5xx/network errors
+    TELEGRAM_MAX_RETRY_AFTER = float(os.getenv("TELEGRAM_MAX_RETRY_AFTER", "5"))  # longer waits go back to the outbox
+
+    # Notification outbox: "thread" delivers from inside the backend process,
+    # "off" expects a separate `flask --app run_backend notify-worker` process.
+    NOTIFY_WORKER = os.getenv("NOTIFY_WORKER", "thread")
+    NOTIFY_POLL_INTERVAL = float(os.getenv("NOTIFY_POLL_INTERVAL", "2"))
+    NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "50"))
+    NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "6"))
+    NOTIFY_BACKOFF_BASE = float(os.getenv("NOTIFY_BACKOFF_BASE", "5"))  # seconds, doubled per attempt
+    NOTIFY_BACKOFF_MAX = float(os.getenv("NOTIFY_BACKOFF_MAX", "900"))
+
+    # Delta sync change log: `flask compact-changes` drops entries older than this
+    CHANGES_RETENTION_DAYS = int(os.getenv("CHANGES_RETENTION_DAYS", "30"))
+
+    # Live group events (SSE). The hub is an aiohttp server: `flask events-server`, or a
+    # thread of the web process with EVENTS_SERVER=thread (development). Route
+    # /api/groups/<gid>/events to it in the proxy, or set EVENTS_URL to redirect there.
+    # Streams open with a ticket from POST /api/groups/<gid>/events/ticket, never the JWT.
+    EVENTS_SERVER = os.getenv("EVENTS_SERVER", "off")  # off | thread
+    EVENTS_URL = os.getenv("EVENTS_URL", "")
+    EVENTS_HOST = os.getenv("EVENTS_HOST", "0.0.0.0")
+    EVENTS_PORT = int(os.getenv("EVENTS_PORT", "5001"))
+    EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "0.5"))  # seconds between group_changes reads
+    EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))  # seconds between keep-alive comments
+    EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", "3000"))  # client reconnect delay (jittered up to +50%)
+    EVENTS_MAX_CLIENTS = int(os.getenv("EVENTS_MAX_CLIENTS", "10000"))
+    EVENTS_CLIENT_QUEUE = int(os.getenv("EVENTS_CLIENT_QUEUE", "256"))  # backlog before a client gets "reset"
+    EVENTS_TICKET_TTL = int(os.getenv("EVENTS_TICKET_TTL", "60"))  # seconds to open a stream with a ticket
 
     # WebApp public URL (for invite links)
     WEBAPP_URL = os.getenv("WEBAPP_URL", "")
 
+    # Group membership cache (per process; 0 disables it)
+    MEMBERSHIP_CACHE_SIZE = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "10000"))
+    MEMBERSHIP_CACHE_TTL = float(os.getenv("MEMBERSHIP_CACHE_TTL", "60"))  # seconds
+
+    # GET /api/calendar: per-user day aggregates, keyed by the user's data version (0 disables)
+    CALENDAR_CACHE_SIZE = int(os.getenv("CALENDAR_CACHE_SIZE", "2000"))
+    CALENDAR_CACHE_TTL = float(os.getenv("CALENDAR_CACHE_TTL", "600"))  # seconds
+    CALENDAR_MAX_DAYS = int(os.getenv("CALENDAR_MAX_DAYS", "400"))
+
     # Bot-to-backend auth
     BOT_API_KEY = os.getenv("BOT_API_KEY", "")
@@ -3,6 +3,8 @@ from __future__ import annotations
 import secrets
 from datetime import datetime
 
+from sqlalchemy.orm import validates
+
 from .extensions import db
 
 
@@ -14,15 +16,33 @@ class User(db.Model):
     username = db.Column(db.String(128), nullable=True)
     first_name = db.Column(db.String(128), nullable=True)
 
+    # lowercased copies for indexed search (SQLite lower() only folds ASCII)
+    username_lc = db.Column(db.String(128), nullable=True, index=True)
+    first_name_lc = db.Column(db.String(128), nullable=True, index=True)
+
+    # set once the personal group, finance defaults and settings exist (see provision_user)
+    default_group_id = db.Column(db.Integer, nullable=True)
+    provisioned_at = db.Column(db.DateTime, nullable=True)
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    @validates("username", "first_name")
+    def _sync_lowercase(self, key: str, value: str | None) -> str | None:
+        setattr(self, f"{key}_lc", value.lower() if value else None)
+        return value
+
 
 class Group(db.Model):
     __tablename__ = "groups"
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(128), nullable=False)
-    owner_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    owner_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+
+    # bumped on every write to the group's tasks, finance, reference data or members (ETags)
+    version = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    # group_changes ids up to here may have been compacted away (older cursors must refetch)
+    changes_floor = db.Column(db.Integer, default=0, server_default="0", nullable=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
@@ -32,13 +52,17 @@ class GroupMember(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
-    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False, index=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
 
     can_tasks = db.Column(db.Boolean, default=True, nullable=False)
     can_finance = db.Column(db.Boolean, default=True, nullable=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        db.Index("uq_group_members_group_id_user_id", "group_id", "user_id", unique=True),
+    )
+
 
 class GroupInvite(db.Model):
     __tablename__ = "group_invites"
@@ -64,7 +88,7 @@ class Task(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False, index=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
 
     title = db.Column(db.String(256), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -80,28 +104,44 @@ class Task(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_tasks_group_id_id", "group_id", "id"),
+        db.Index("ix_tasks_group_id_deadline", "group_id", "deadline"),
+        db.Index("ix_tasks_group_id_responsible_id", "group_id", "responsible_id"),
+        db.Index("ix_tasks_responsible_id_deadline", "responsible_id", "deadline"),
+    )
+
 
 class TaskAssignee(db.Model):
     __tablename__ = "task_assignees"
 
     id = db.Column(db.Integer, primary_key=True)
-    task_id = db.Column(db.Integer, db.ForeignKey("tasks.id"), nullable=False, index=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    task_id = db.Column(db.Integer, db.ForeignKey("tasks.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_task_assignees_task_id_user_id", "task_id", "user_id"),
+        db.Index("ix_task_assignees_user_id_task_id", "user_id", "task_id"),
+    )
+
 
 class FinanceItem(db.Model):
     __tablename__ = "finance_items"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
 
     title = db.Column(db.String(256), nullable=False)
     amount = db.Column(db.Integer, nullable=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_finance_items_user_id_created_at", "user_id", "created_at"),
+    )
+
 
 class GroupFinanceCategory(db.Model):
     __tablename__ = "group_finance_categories"
@@ -123,7 +163,7 @@ class GroupFinanceItem(db.Model):
     __tablename__ = "group_finance_items"
 
     id = db.Column(db.Integer, primary_key=True)
-    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False, index=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
     created_by_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
 
     kind = db.Column(db.String(16), nullable=False)  # income | expense
@@ -135,6 +175,73 @@ class GroupFinanceItem(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_group_finance_items_group_id_id", "group_id", "id"),
+        db.Index("ix_group_finance_items_group_id_created_at", "group_id", "created_at"),
+    )
+
+
+class GroupFinanceDaily(db.Model):
+    """Per-day sums of group_finance_items by kind, category and method (see utils/rollups.py).
+
+    Kept in sync on every ledger write. category_id / method_id are 0 for items
+    without one: a NULL could not take part in the primary key.
+    """
+
+    __tablename__ = "group_finance_daily"
+
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    kind = db.Column(db.String(16), primary_key=True)
+    category_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    method_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    amount_total = db.Column(db.BigInteger, default=0, nullable=False)
+    items_count = db.Column(db.Integer, default=0, nullable=False)
+
+
+class GroupChange(db.Model):
+    """Append-only log of rows changed in a group; the id is the delta sync cursor.
+
+    Rows are written in the transaction of the change. SQLite has a single
+    writer, so ids are handed out in commit order and a cursor never skips a
+    change that commits later.
+    """
+
+    __tablename__ = "group_changes"
+
+    id = db.Column(db.Integer, primary_key=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
+
+    entity = db.Column(db.String(16), nullable=False)  # task|finance|category|method|member
+    entity_id = db.Column(db.Integer, nullable=False)  # member: the user id
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_group_changes_group_id_id", "group_id", "id"),
+        # ids are cursors: never hand out an id again after compaction deleted the newest rows
+        {"sqlite_autoincrement": True},
+    )
+
+
+class GroupFinanceBalance(db.Model):
+    """Per-group running totals of group_finance_items (kept in sync on every write)."""
+
+    __tablename__ = "group_finance_balances"
+
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), primary_key=True)
+
+    income_total = db.Column(db.BigInteger, default=0, nullable=False)
+    expense_total = db.Column(db.BigInteger, default=0, nullable=False)
+    items_count = db.Column(db.Integer, default=0, nullable=False)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @property
+    def balance(self) -> int:
+        return int(self.income_total or 0) - int(self.expense_total or 0)
+
 
 class NotificationSettings(db.Model):
     __tablename__ = "notification_settings"
@@ -157,15 +264,39 @@ class NotificationSettings(db.Model):
         db.session.commit()
         return row
 
+
+class NotificationOutbox(db.Model):
+    """Telegram messages waiting for delivery by the outbox worker."""
+
+    __tablename__ = "notification_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    chat_id = db.Column(db.BigInteger, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+
+    status = db.Column(db.String(16), default="pending", nullable=False)  # pending|sent|dead
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_notification_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+
 class GroupUsernameInvite(db.Model):
     __tablename__ = "group_username_invites"
 
     id = db.Column(db.Integer, primary_key=True)
 
-    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False, index=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
     created_by_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
 
-    target_username = db.Column(db.String(128), nullable=False, index=True)  # lower, without "@"
+    target_username = db.Column(db.String(128), nullable=False)  # lower, without "@"
 
     status = db.Column(db.String(16), default="pending", nullable=False)  # pending|accepted|declined
 
@@ -173,3 +304,8 @@ class GroupUsernameInvite(db.Model):
     decided_at = db.Column(db.DateTime, nullable=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_group_username_invites_target_username_status", "target_username", "status"),
+        db.Index("ix_group_username_invites_group_id_target_username_status", "group_id", "target_username", "status"),
+    )
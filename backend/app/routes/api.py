@@ -1,18 +1,17 @@
 from __future__ import annotations
 
 import logging
-import json
 from datetime import datetime, timedelta, date
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+from urllib.parse import urlencode
 
-from flask import Blueprint, current_app, jsonify, request
-from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
+from flask import Blueprint, current_app, jsonify, redirect, request
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, jwt_required
 
 from ..extensions import db
 from ..models import (
     FinanceItem,
     Group,
+    GroupChange,
     GroupInvite,
     GroupMember,
     GroupUsernameInvite,
@@ -24,8 +23,16 @@ from ..models import (
     User,
     NotificationSettings,
 )
+from ..utils.calendar import calendar_days, calendar_etag
 from ..utils.decorators import log_call
+from ..utils.membership import Membership, get_membership, invalidate_membership
+from ..utils.finance import add_group_finance_item, create_group_balance, read_group_balance, touch_group_balance
+from ..utils.outbox import enqueue_message, wake_worker
+from ..utils.rollups import REPORTS, finance_report, reassign_rollups
 from ..utils.telegram import validate_init_data
+from ..utils.tickets import issue_events_ticket
+from ..utils.changes import latest_change_id, record_change, record_changes, record_user_renamed
+from ..utils.versions import group_etag, not_modified, user_groups_etag, with_etag
 
 logger = logging.getLogger(__name__)
 api_bp = Blueprint("api", __name__)
@@ -37,6 +44,9 @@ TASK_STATUSES = {
     "done": "Готова",
 }
 
+PAGE_SIZE_DEFAULT = 100
+PAGE_SIZE_MAX = 500
+
 
 def normalize_status(value: str | None) -> str:
     if not value:
@@ -53,15 +63,24 @@ def normalize_status(value: str | None) -> str:
 
 
 def get_or_create_user_from_tg(tg_user: dict) -> User:
+    """Find or add the user; writes only when something actually changed.
+
+    A new user is only flushed: callers follow up with provision_user(), which
+    commits the user together with everything provisioned for it.
+    """
     tg_id = tg_user.get("id")
     if not tg_id:
         raise ValueError("No Telegram user id")
 
     user = User.query.filter_by(tg_id=tg_id).first()
     if user:
-        user.username = tg_user.get("username") or user.username
-        user.first_name = tg_user.get("first_name") or user.first_name
-        db.session.commit()
+        username = tg_user.get("username") or user.username
+        first_name = tg_user.get("first_name") or user.first_name
+        if (username, first_name) != (user.username, user.first_name):
+            user.username = username
+            user.first_name = first_name
+            record_user_renamed(user.id)  # names are part of task, finance and member lists
+            db.session.commit()
         return user
 
     user = User(
@@ -70,44 +89,113 @@ def get_or_create_user_from_tg(tg_user: dict) -> User:
         first_name=tg_user.get("first_name") or "Без имени",
     )
     db.session.add(user)
-    db.session.commit()
+    db.session.flush()
     return user
 
 
-def ensure_default_group(user_id: int) -> int:
+def provision_user(user: User) -> int:
+    """Create the personal group, its finance defaults and notification settings once.
+
+    Everything is written in a single transaction and marked with
+    users.provisioned_at; afterwards this is a pure read. Returns the default group id.
+    """
+    if user.provisioned_at and user.default_group_id:
+        return user.default_group_id
+
+    group_id = ensure_default_group(user.id, commit=False)
+    ensure_group_finance_defaults(group_id, commit=False)
+    if not NotificationSettings.query.filter_by(user_id=user.id).first():
+        db.session.add(NotificationSettings(user_id=user.id, notify_new_task=True, notify_task_updates=True))
+
+    user.default_group_id = group_id
+    user.provisioned_at = datetime.utcnow()
+    db.session.commit()
+    return group_id
+
+
+def ensure_default_group(user_id: int, commit: bool = True) -> int:
     group = Group.query.filter_by(owner_id=user_id).order_by(Group.id.asc()).first()
     if not group:
         group = Group(name="Личная", owner_id=user_id)
         db.session.add(group)
-        db.session.commit()
+        db.session.flush()
+        create_group_balance(group.id)
 
-    m = GroupMember.query.filter_by(user_id=user_id, group_id=group.id).first()
+    m = get_membership(user_id, group.id)
     if not m:
         db.session.add(GroupMember(user_id=user_id, group_id=group.id, can_tasks=True, can_finance=True))
+        db.session.flush()
+        record_change(group.id, "member", user_id)
+        invalidate_membership(group.id, [user_id])
+    if commit:
         db.session.commit()
     return group.id
 
 
-def ensure_group_finance_defaults(group_id: int) -> None:
+def ensure_group_finance_defaults(group_id: int, commit: bool = True) -> bool:
+    """Give a group without categories/methods the default ones; True if anything was created."""
+    categories: list[GroupFinanceCategory] = []
+    methods: list[GroupPaymentMethod] = []
     if not GroupFinanceCategory.query.filter_by(group_id=group_id).first():
-        for name in ["Продукты", "Дом", "Транспорт", "Развлечения", "Другое"]:
-            db.session.add(GroupFinanceCategory(group_id=group_id, name=name))
-        db.session.commit()
+        categories = [GroupFinanceCategory(group_id=group_id, name=name) for name in ["Продукты", "Дом", "Транспорт", "Развлечения", "Другое"]]
 
     if not GroupPaymentMethod.query.filter_by(group_id=group_id).first():
-        for name in ["Наличные", "Безнал"]:
-            db.session.add(GroupPaymentMethod(group_id=group_id, name=name))
-        db.session.commit()
+        methods = [GroupPaymentMethod(group_id=group_id, name=name) for name in ["Наличные", "Безнал"]]
+
+    if categories or methods:
+        db.session.add_all(categories + methods)
+        db.session.flush()
+        record_changes(group_id, "category", [c.id for c in categories])
+        record_changes(group_id, "method", [m.id for m in methods])
+        if commit:
+            db.session.commit()
+        return True
+    return False
 
 
-def require_member(user_id: int, group_id: int) -> GroupMember:
-    m = GroupMember.query.filter_by(user_id=user_id, group_id=group_id).first()
+def require_member(user_id: int, group_id: int) -> Membership:
+    m = get_membership(user_id, group_id)
     if not m:
         from flask import abort
         abort(403, description="Not a group member")
     return m
 
 
+def _bool_arg(name: str) -> bool | None:
+    raw = request.args.get(name)
+    if raw is None or raw.strip() == "":
+        return None
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _date_arg(name: str) -> date | None:
+    raw = (request.args.get(name) or "").strip()
+    if not raw:
+        return None
+    return datetime.strptime(raw, "%Y-%m-%d").date()
+
+
+def _limit_arg(default: int = PAGE_SIZE_DEFAULT, maximum: int = PAGE_SIZE_MAX) -> int:
+    limit = request.args.get("limit", type=int) or default
+    return max(1, min(limit, maximum))
+
+
+def _prefix_upper(prefix: str) -> str | None:
+    """Smallest string above every string starting with `prefix` (SQLite compares text by code point).
+
+    Increments the last code point, skipping surrogates, which UTF-8 cannot
+    hold; None when no bound exists (empty prefix or only U+10FFFF).
+    """
+    while prefix:
+        last = ord(prefix[-1]) + 1
+        if 0xD800 <= last <= 0xDFFF:
+            last = 0xE000
+        if last <= 0x10FFFF:
+            return prefix[:-1] + chr(last)
+        prefix = prefix[:-1]
+    return None
+
+
 def user_to_dict(u: User) -> dict:
     return {
         "id": u.id,
@@ -117,28 +205,64 @@ def user_to_dict(u: User) -> dict:
     }
 
 
-def task_to_dict(t: Task) -> dict:
-    assigned_by = User.query.get(t.assigned_by_id) if t.assigned_by_id else None
-    responsible = User.query.get(t.responsible_id) if t.responsible_id else None
+def users_by_id(user_ids) -> dict[int, User]:
+    ids = {int(x) for x in user_ids if x}
+    if not ids:
+        return {}
+    return {u.id: u for u in User.query.filter(User.id.in_(ids)).all()}
 
-    extra_ids = [a.user_id for a in TaskAssignee.query.filter_by(task_id=t.id).all()]
-    extras = User.query.filter(User.id.in_(extra_ids)).all() if extra_ids else []
 
-    status_code = normalize_status(getattr(t, "status", "new"))
-    return {
-        "id": t.id,
-        "title": t.title,
-        "description": getattr(t, "description", "") or "",
-        "done": bool(t.done),
-        "status": status_code,
-        "status_label": TASK_STATUSES.get(status_code, "Новая"),
-        "urgent": bool(t.urgent),
-        "deadline": t.deadline.isoformat() if t.deadline else None,
-        "group_id": t.group_id,
-        "assigned_by": user_to_dict(assigned_by) if assigned_by else None,
-        "responsible": user_to_dict(responsible) if responsible else None,
-        "additional_assignees": [user_to_dict(u) for u in extras],
-    }
+def tasks_to_dicts(tasks: list[Task]) -> list[dict]:
+    """Serialize a page of tasks with a constant number of queries.
+
+    Assignees and every referenced user are loaded in bulk, then the dicts are
+    built from in-memory maps (no per-task lookups).
+    """
+    if not tasks:
+        return []
+
+    extra_ids_by_task: dict[int, list[int]] = {t.id: [] for t in tasks}
+    rows = (
+        db.session.query(TaskAssignee.task_id, TaskAssignee.user_id)
+        .filter(TaskAssignee.task_id.in_(list(extra_ids_by_task)))
+        .order_by(TaskAssignee.user_id.asc())
+        .all()
+    )
+    for task_id, uid in rows:
+        extra_ids_by_task[task_id].append(uid)
+
+    user_ids: set[int] = set()
+    for t in tasks:
+        user_ids.update((t.assigned_by_id, t.responsible_id))
+        user_ids.update(extra_ids_by_task[t.id])
+    users = users_by_id(user_ids)
+
+    items = []
+    for t in tasks:
+        assigned_by = users.get(t.assigned_by_id) if t.assigned_by_id else None
+        responsible = users.get(t.responsible_id) if t.responsible_id else None
+        extras = [users[uid] for uid in extra_ids_by_task[t.id] if uid in users]
+
+        status_code = normalize_status(getattr(t, "status", "new"))
+        items.append({
+            "id": t.id,
+            "title": t.title,
+            "description": getattr(t, "description", "") or "",
+            "done": bool(t.done),
+            "status": status_code,
+            "status_label": TASK_STATUSES.get(status_code, "Новая"),
+            "urgent": bool(t.urgent),
+            "deadline": t.deadline.isoformat() if t.deadline else None,
+            "group_id": t.group_id,
+            "assigned_by": user_to_dict(assigned_by) if assigned_by else None,
+            "responsible": user_to_dict(responsible) if responsible else None,
+            "additional_assignees": [user_to_dict(u) for u in extras],
+        })
+    return items
+
+
+def task_to_dict(t: Task) -> dict:
+    return tasks_to_dicts([t])[0]
 
 
 def ensure_members_for_users(group_id: int, user_ids: list[int]) -> None:
@@ -157,73 +281,43 @@ def ensure_members_for_users(group_id: int, user_ids: list[int]) -> None:
 
     for uid in to_add:
         db.session.add(GroupMember(user_id=uid, group_id=group_id, can_tasks=True, can_finance=True))
+    record_changes(group_id, "member", to_add)
     db.session.commit()
+    invalidate_membership(group_id, to_add)
 
 
 # ---------------- Notifications ----------------
-def _tg_send_message(tg_id: int, text: str) -> None:
-    token = (current_app.config.get("BOT_TOKEN") or "").strip()
-    if not token:
-        return
-
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {"chat_id": int(tg_id), "text": text}
-
-    req = Request(
-        url=url,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    try:
-        with urlopen(req, timeout=10) as resp:
-            resp.read()
-    except (HTTPError, URLError) as e:
-        logger.warning("Telegram notify failed: %s", e)
+def _notification_recipients(task: Task, actor_user_id: int, setting: str) -> list[User]:
+    """Responsible + extras with a tg_id and the given preference enabled, minus the actor."""
+    recipients = {task.responsible_id}
+    recipients.update(a.user_id for a in TaskAssignee.query.filter_by(task_id=task.id).all())
+    recipients.discard(actor_user_id)
+    if not recipients:
+        return []
+
+    users = users_by_id(recipients)
+    # users without a settings row get the defaults (everything enabled)
+    disabled = {
+        s.user_id
+        for s in NotificationSettings.query.filter(NotificationSettings.user_id.in_(list(users))).all()
+        if not getattr(s, setting)
+    }
+    return [users[uid] for uid in sorted(users) if users[uid].tg_id and uid not in disabled]
 
 
 def _notify_new_task(task: Task, created_by_user_id: int) -> None:
-    # notify responsible + extras, but only if they have tg_id and prefs enabled
-    recipients = set([task.responsible_id])
-    extra_ids = [a.user_id for a in TaskAssignee.query.filter_by(task_id=task.id).all()]
-    recipients.update(extra_ids)
-
-    # do not notify creator
-    recipients.discard(created_by_user_id)
-
-    for uid in sorted(recipients):
-        u = User.query.get(uid)
-        if not u or not u.tg_id:
-            continue
-
-        s = NotificationSettings.get_or_create(uid)
-        if not s.notify_new_task:
-            continue
-
-        dl = task.deadline.isoformat() if task.deadline else "без срока"
-        text = f"🆕 Новая задача для вас:\n{task.title}\nСрок: {dl}"
-        _tg_send_message(int(u.tg_id), text)
+    # queued in the caller's transaction; delivered by the outbox worker
+    dl = task.deadline.isoformat() if task.deadline else "без срока"
+    text = f"🆕 Новая задача для вас:\n{task.title}\nСрок: {dl}"
+    for u in _notification_recipients(task, created_by_user_id, "notify_new_task"):
+        enqueue_message(u.id, int(u.tg_id), text)
 
 
 def _notify_task_updated(task: Task, updated_by_user_id: int) -> None:
-    recipients = set([task.responsible_id])
-    extra_ids = [a.user_id for a in TaskAssignee.query.filter_by(task_id=task.id).all()]
-    recipients.update(extra_ids)
-
-    recipients.discard(updated_by_user_id)
-
-    for uid in sorted(recipients):
-        u = User.query.get(uid)
-        if not u or not u.tg_id:
-            continue
-
-        s = NotificationSettings.get_or_create(uid)
-        if not s.notify_task_updates:
-            continue
-
-        dl = task.deadline.isoformat() if task.deadline else "без срока"
-        text = f"✏️ Изменена задача для вас:\n{task.title}\nСтатус: {TASK_STATUSES.get(task.status, 'Новая')}\nСрок: {dl}"
-        _tg_send_message(int(u.tg_id), text)
+    dl = task.deadline.isoformat() if task.deadline else "без срока"
+    text = f"✏️ Изменена задача для вас:\n{task.title}\nСтатус: {TASK_STATUSES.get(task.status, 'Новая')}\nСрок: {dl}"
+    for u in _notification_recipients(task, updated_by_user_id, "notify_task_updates"):
+        enqueue_message(u.id, int(u.tg_id), text)
 
 
 # ---------------- Auth ----------------
@@ -248,11 +342,7 @@ def auth_telegram():
         auth_date = int(datetime.utcnow().timestamp())
 
     user = get_or_create_user_from_tg(tg_user)
-    group_id = ensure_default_group(user.id)
-    ensure_group_finance_defaults(group_id)
-
-    # ensure settings row exists
-    NotificationSettings.get_or_create(user.id)
+    group_id = provision_user(user)
 
     token = create_access_token(identity=str(user.id))
     return jsonify({
@@ -270,9 +360,7 @@ def auth_telegram():
 def me():
     user_id = int(get_jwt_identity())
     user = User.query.get_or_404(user_id)
-    group_id = ensure_default_group(user.id)
-    ensure_group_finance_defaults(group_id)
-    NotificationSettings.get_or_create(user.id)
+    group_id = provision_user(user)
     return jsonify({
         "ok": True,
         "default_group_id": group_id,
@@ -284,8 +372,54 @@ def me():
 @jwt_required()
 @log_call
 def list_users():
-    rows = User.query.order_by(User.first_name.asc(), User.id.asc()).all()
-    return jsonify({"ok": True, "items": [user_to_dict(u) for u in rows]})
+    """Search the user directory: ?q=&limit=&cursor=&scope=shared|all&match=prefix|contains.
+
+    scope=shared (default) only returns users who share a group with the caller;
+    scope=all needs a query. Prefix matching on username / first name is served
+    by the lowercased column indexes; match=contains is a scan and is only
+    allowed within the shared scope.
+    """
+    user_id = int(get_jwt_identity())
+
+    raw_q = (request.args.get("q") or "").strip()
+    q = raw_q.lstrip("@").lower()
+    scope = request.args.get("scope", "shared")
+    match = request.args.get("match", "prefix")
+    if scope not in {"shared", "all"} or match not in {"prefix", "contains"}:
+        return jsonify({"ok": False, "error": "scope must be shared|all, match must be prefix|contains"}), 400
+    if scope == "all" and not q:
+        return jsonify({"ok": False, "error": "q is required for scope=all"}), 400
+    if scope == "all" and match == "contains":
+        return jsonify({"ok": False, "error": "match=contains is only supported for scope=shared"}), 400
+
+    query = User.query
+    if scope == "shared":
+        my_groups = db.session.query(GroupMember.group_id).filter(GroupMember.user_id == user_id)
+        shared_ids = db.session.query(GroupMember.user_id).filter(GroupMember.group_id.in_(my_groups))
+        query = query.filter(User.id.in_(shared_ids))
+
+    if q and match == "prefix":
+        # range predicates instead of LIKE so SQLite can use the indexes
+        upper = _prefix_upper(q)
+        query = query.filter(db.or_(
+            db.and_(User.username_lc >= q, User.username_lc < upper) if upper else User.username_lc >= q,
+            db.and_(User.first_name_lc >= q, User.first_name_lc < upper) if upper else User.first_name_lc >= q,
+        ))
+    elif q:
+        query = query.filter(db.or_(
+            db.func.instr(User.username_lc, q) > 0,
+            db.func.instr(User.first_name_lc, q) > 0,
+        ))
+
+    cursor = request.args.get("cursor", type=int)
+    if cursor is not None:
+        query = query.filter(User.id > cursor)
+
+    limit = _limit_arg(default=50, maximum=200)
+    rows = query.order_by(User.id.asc()).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+
+    return jsonify({"ok": True, "items": [user_to_dict(u) for u in rows[:limit]], "next_cursor": next_cursor})
 
 
 # --------- Settings: notifications ----------
@@ -340,13 +474,39 @@ def bot_start():
 
     tg_user = {"id": int(tg_id), "username": request.json.get("username"), "first_name": request.json.get("first_name")}
     user = get_or_create_user_from_tg(tg_user)
-
-    group_id = ensure_default_group(user.id)
-    ensure_group_finance_defaults(group_id)
-    NotificationSettings.get_or_create(user.id)
+    group_id = provision_user(user)
 
     token = create_access_token(identity=str(user.id))
-    return jsonify({"ok": True, "access_token": token, "default_group_id": group_id})
+    resp = {"ok": True, "access_token": token, "default_group_id": group_id}
+
+    # saves the bot a second round-trip to /bot/invites/pending during /start
+    if request.json.get("include_invites"):
+        username = (request.json.get("username") or "").strip().lstrip("@").lower()
+        resp["invites"] = _pending_invites_for(username) if username else []
+
+    return jsonify(resp)
+
+
+def _pending_invites_for(username: str) -> list[dict]:
+    """Pending username invites with group and inviter resolved in one joined query."""
+    rows = (
+        db.session.query(GroupUsernameInvite, Group, User)
+        .join(Group, Group.id == GroupUsernameInvite.group_id)
+        .outerjoin(User, User.id == GroupUsernameInvite.created_by_id)
+        .filter(GroupUsernameInvite.target_username == username, GroupUsernameInvite.status == "pending")
+        .order_by(GroupUsernameInvite.id.desc())
+        .all()
+    )
+    return [
+        {
+            "id": inv.id,
+            "group_id": inv.group_id,
+            "group_name": g.name,
+            "created_by": user_to_dict(by) if by else None,
+        }
+        for inv, g, by in rows
+    ]
+
 
 @api_bp.post("/bot/invites/pending")
 @log_call
@@ -371,24 +531,7 @@ def bot_invites_pending():
         # если у пользователя нет username — ему нечего принимать по нику
         return jsonify({"ok": True, "items": []})
 
-    invites = GroupUsernameInvite.query.filter_by(
-        target_username=username, status="pending"
-    ).order_by(GroupUsernameInvite.id.desc()).all()
-
-    items = []
-    for inv in invites:
-        g = Group.query.get(inv.group_id)
-        if not g:
-            continue
-        by = User.query.get(inv.created_by_id)
-        items.append({
-            "id": inv.id,
-            "group_id": inv.group_id,
-            "group_name": g.name,
-            "created_by": user_to_dict(by) if by else None,
-        })
-
-    return jsonify({"ok": True, "items": items})
+    return jsonify({"ok": True, "items": _pending_invites_for(username)})
 
 
 @api_bp.post("/bot/invites/<int:invite_id>/accept")
@@ -414,12 +557,14 @@ def bot_invite_accept(invite_id: int):
     # добавить в группу
     if not GroupMember.query.filter_by(group_id=inv.group_id, user_id=u.id).first():
         db.session.add(GroupMember(user_id=u.id, group_id=inv.group_id, can_tasks=True, can_finance=True))
+        record_change(inv.group_id, "member", u.id)
 
     inv.status = "accepted"
     inv.decided_by_id = u.id
     inv.decided_at = datetime.utcnow()
 
     db.session.commit()
+    invalidate_membership(inv.group_id, [u.id])
     ensure_group_finance_defaults(inv.group_id)
 
     return jsonify({"ok": True, "group_id": inv.group_id})
@@ -469,7 +614,10 @@ def create_group():
     db.session.commit()
 
     db.session.add(GroupMember(user_id=user_id, group_id=g.id, can_tasks=True, can_finance=True))
+    create_group_balance(g.id)
+    record_change(g.id, "member", user_id)
     db.session.commit()
+    invalidate_membership(g.id, [user_id])
 
     ensure_group_finance_defaults(g.id)
     return jsonify({"ok": True, "id": g.id})
@@ -481,22 +629,31 @@ def create_group():
 def list_groups():
     user_id = int(get_jwt_identity())
 
+    # members per group in one GROUP BY over the caller's groups only
+    my_group_ids = db.session.query(GroupMember.group_id).filter(GroupMember.user_id == user_id)
+    counts = (
+        db.session.query(GroupMember.group_id.label("group_id"), db.func.count(GroupMember.id).label("members_count"))
+        .filter(GroupMember.group_id.in_(my_group_ids))
+        .group_by(GroupMember.group_id)
+        .subquery()
+    )
+
     rows = (
-        db.session.query(Group, GroupMember)
+        db.session.query(Group, GroupMember, counts.c.members_count)
         .join(GroupMember, GroupMember.group_id == Group.id)
+        .outerjoin(counts, counts.c.group_id == Group.id)
         .filter(GroupMember.user_id == user_id)
         .order_by(Group.id.asc())
         .all()
     )
 
     items = []
-    for g, m in rows:
-        members_count = db.session.query(db.func.count(GroupMember.id)).filter(GroupMember.group_id == g.id).scalar() or 0
+    for g, m, members_count in rows:
         items.append({
             "id": g.id,
             "name": g.name,
             "owner_id": g.owner_id,
-            "members_count": int(members_count),
+            "members_count": int(members_count or 0),
             "can_tasks": bool(m.can_tasks),
             "can_finance": bool(m.can_finance),
         })
@@ -549,6 +706,11 @@ def group_members(gid: int):
     user_id = int(get_jwt_identity())
     _ = require_member(user_id, gid)
 
+    etag = group_etag(gid)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     rows = (
         db.session.query(GroupMember, User)
         .join(User, User.id == GroupMember.user_id)
@@ -557,7 +719,7 @@ def group_members(gid: int):
         .all()
     )
 
-    return jsonify({"ok": True, "items": [user_to_dict(u) for _, u in rows]})
+    return with_etag(jsonify({"ok": True, "items": [user_to_dict(u) for _, u in rows]}), etag)
 
 
 # ---------------- Tasks ----------------
@@ -615,22 +777,74 @@ def group_tasks(gid: int):
             urgent=bool(data.get("urgent", False)),
         )
         db.session.add(t)
-        db.session.commit()
+        db.session.flush()
 
         for uid in assignee_ids:
             if uid == t.responsible_id:
                 continue
-            if GroupMember.query.filter_by(group_id=gid, user_id=uid).first():
+            if get_membership(uid, gid):
                 db.session.add(TaskAssignee(task_id=t.id, user_id=uid))
-        db.session.commit()
 
-        # 🔔 notify
+        # 🔔 notify (outbox rows commit together with the assignees)
         _notify_new_task(t, created_by_user_id=user_id)
+        record_change(gid, "task", t.id)
+        db.session.commit()
+        wake_worker()
 
         return jsonify({"ok": True, "id": t.id})
 
-    items = Task.query.filter_by(group_id=gid).order_by(Task.id.desc()).all()
-    return jsonify({"ok": True, "items": [task_to_dict(t) for t in items]})
+    etag = group_etag(gid)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    q = Task.query.filter(Task.group_id == gid)
+
+    statuses = [normalize_status(x) for x in (request.args.get("status") or "").split(",") if x.strip()]
+    if statuses:
+        q = q.filter(Task.status.in_(sorted(set(statuses))))
+
+    done = _bool_arg("done")
+    if done is not None:
+        q = q.filter(Task.done.is_(done))
+
+    urgent = _bool_arg("urgent")
+    if urgent is not None:
+        q = q.filter(Task.urgent.is_(urgent))
+
+    try:
+        deadline_from = _date_arg("deadline_from")
+        deadline_to = _date_arg("deadline_to")
+    except ValueError:
+        return jsonify({"ok": False, "error": "deadline_from/deadline_to must be YYYY-MM-DD"}), 400
+    if deadline_from:
+        q = q.filter(Task.deadline >= deadline_from)
+    if deadline_to:
+        q = q.filter(Task.deadline <= deadline_to)
+
+    responsible_id = request.args.get("responsible_id", type=int)
+    if responsible_id is not None:
+        q = q.filter(Task.responsible_id == responsible_id)
+
+    assignee_id = request.args.get("assignee_id", type=int)
+    if assignee_id is not None:
+        q = q.filter(
+            db.session.query(TaskAssignee.id)
+            .filter(TaskAssignee.task_id == Task.id, TaskAssignee.user_id == assignee_id)
+            .exists()
+        )
+
+    # Keyset pagination on id (newest first): the cursor is the last id of the previous page.
+    cursor = request.args.get("cursor", type=int)
+    if cursor is not None:
+        q = q.filter(Task.id < cursor)
+
+    limit = _limit_arg()
+    items = q.order_by(Task.id.desc()).limit(limit + 1).all()
+    next_cursor = items[limit - 1].id if len(items) > limit else None
+    items = items[:limit]
+
+    return with_etag(jsonify({"ok": True, "items": tasks_to_dicts(items), "next_cursor": next_cursor}), etag)
 
 
 @api_bp.route("/tasks/<int:tid>", methods=["GET", "PATCH"])
@@ -689,21 +903,86 @@ def task_details(tid: int):
         for uid in ids:
             if uid == t.responsible_id:
                 continue
-            if GroupMember.query.filter_by(group_id=t.group_id, user_id=uid).first():
+            if get_membership(uid, t.group_id):
                 allowed.add(uid)
 
         TaskAssignee.query.filter_by(task_id=t.id).delete()
         for uid in sorted(allowed):
             db.session.add(TaskAssignee(task_id=t.id, user_id=uid))
 
-    db.session.commit()
-
-    # 🔔 notify update
+    # 🔔 notify update (queued in the same transaction as the change)
     _notify_task_updated(t, updated_by_user_id=user_id)
+    record_change(t.group_id, "task", t.id)
+    db.session.commit()
+    wake_worker()
 
     return jsonify({"ok": True, "item": task_to_dict(t)})
 
 
+@api_bp.get("/me/tasks")
+@jwt_required()
+@log_call
+def my_tasks():
+    """Tasks the caller is responsible for or assigned to, across all their groups.
+
+    One statement: a UNION of the responsible branch (ix_tasks_responsible_id_deadline)
+    and the assignee branch (ix_task_assignees_user_id_task_id), each limited to
+    groups where the caller has the tasks permission, then one page by id.
+    """
+    user_id = int(get_jwt_identity())
+
+    etag = user_groups_etag(user_id)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    my_groups = db.select(GroupMember.group_id).where(
+        GroupMember.user_id == user_id, GroupMember.can_tasks.is_(True)
+    )
+    filters = [Task.group_id.in_(my_groups)]
+
+    statuses = [normalize_status(x) for x in (request.args.get("status") or "").split(",") if x.strip()]
+    if statuses:
+        filters.append(Task.status.in_(sorted(set(statuses))))
+
+    done = _bool_arg("done")
+    if done is not None:
+        filters.append(Task.done.is_(done))
+
+    urgent = _bool_arg("urgent")
+    if urgent is not None:
+        filters.append(Task.urgent.is_(urgent))
+
+    try:
+        deadline_from = _date_arg("deadline_from")
+        deadline_to = _date_arg("deadline_to")
+    except ValueError:
+        return jsonify({"ok": False, "error": "deadline_from/deadline_to must be YYYY-MM-DD"}), 400
+    if deadline_from:
+        filters.append(Task.deadline >= deadline_from)
+    if deadline_to:
+        filters.append(Task.deadline <= deadline_to)
+
+    # Keyset pagination on id (newest first), as in the group task list.
+    cursor = request.args.get("cursor", type=int)
+    if cursor is not None:
+        filters.append(Task.id < cursor)
+
+    limit = _limit_arg()
+    responsible = db.select(Task.id).where(Task.responsible_id == user_id, *filters)
+    assigned = (
+        db.select(Task.id)
+        .join(TaskAssignee, TaskAssignee.task_id == Task.id)
+        .where(TaskAssignee.user_id == user_id, *filters)
+    )
+    page = db.union(responsible, assigned).order_by(db.desc("id")).limit(limit + 1).subquery()
+    items = Task.query.join(page, page.c.id == Task.id).order_by(Task.id.desc()).all()
+    next_cursor = items[limit - 1].id if len(items) > limit else None
+    items = items[:limit]
+
+    return with_etag(jsonify({"ok": True, "items": tasks_to_dicts(items), "next_cursor": next_cursor}), etag)
+
+
 # ---------------- Personal finance ----------------
 @api_bp.route("/finance", methods=["GET", "POST"])
 @jwt_required()
@@ -740,21 +1019,65 @@ def balance():
     return jsonify({"ok": True, "balance": int(total or 0)})
 
 
+# ---------------- Calendar ----------------
+@api_bp.get("/calendar")
+@jwt_required()
+@log_call
+def calendar():
+    """Per-day counters for the date bar: my open tasks due (and urgent ones),
+    personal and group finance income/expense. Only days with data are listed."""
+    user_id = int(get_jwt_identity())
+    try:
+        start = _date_arg("from")
+        end = _date_arg("to")
+    except ValueError:
+        return jsonify({"ok": False, "error": "from/to must be YYYY-MM-DD"}), 400
+    if not start or not end or end < start:
+        return jsonify({"ok": False, "error": "from and to are required, from <= to"}), 400
+    if (end - start).days + 1 > current_app.config["CALENDAR_MAX_DAYS"]:
+        return jsonify({"ok": False, "error": f"at most {current_app.config['CALENDAR_MAX_DAYS']} days"}), 400
+
+    etag = calendar_etag(user_id)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    days = calendar_days(user_id, start, end, etag)
+    return with_etag(jsonify({"ok": True, "from": start.isoformat(), "to": end.isoformat(), "days": days}), etag)
+
+
 # ---------------- Group finance ----------------
+def _gfis_to_dicts(items: list[GroupFinanceItem]) -> list[dict]:
+    """Serialize group finance rows; categories, methods and authors are loaded in bulk."""
+    if not items:
+        return []
+
+    cat_ids = {i.category_id for i in items if i.category_id}
+    met_ids = {i.method_id for i in items if i.method_id}
+    cats = {c.id: c for c in GroupFinanceCategory.query.filter(GroupFinanceCategory.id.in_(cat_ids)).all()} if cat_ids else {}
+    mets = {m.id: m for m in GroupPaymentMethod.query.filter(GroupPaymentMethod.id.in_(met_ids)).all()} if met_ids else {}
+    users = users_by_id(i.created_by_id for i in items)
+
+    out = []
+    for item in items:
+        cat = cats.get(item.category_id) if item.category_id else None
+        met = mets.get(item.method_id) if item.method_id else None
+        who = users.get(item.created_by_id) if item.created_by_id else None
+        out.append({
+            "id": item.id,
+            "kind": item.kind,
+            "amount": int(item.amount),
+            "description": item.description or "",
+            "category": {"id": cat.id, "name": cat.name} if cat else None,
+            "method": {"id": met.id, "name": met.name} if met else None,
+            "created_by": user_to_dict(who) if who else None,
+            "created_at": item.created_at.isoformat(),
+        })
+    return out
+
+
 def _gfi_to_dict(item: GroupFinanceItem) -> dict:
-    cat = GroupFinanceCategory.query.get(item.category_id) if item.category_id else None
-    met = GroupPaymentMethod.query.get(item.method_id) if item.method_id else None
-    who = User.query.get(item.created_by_id) if item.created_by_id else None
-    return {
-        "id": item.id,
-        "kind": item.kind,
-        "amount": int(item.amount),
-        "description": item.description or "",
-        "category": {"id": cat.id, "name": cat.name} if cat else None,
-        "method": {"id": met.id, "name": met.name} if met else None,
-        "created_by": user_to_dict(who) if who else None,
-        "created_at": item.created_at.isoformat(),
-    }
+    return _gfis_to_dicts([item])[0]
 
 
 @api_bp.route("/groups/<int:gid>/finance", methods=["GET", "POST"])
@@ -766,7 +1089,8 @@ def group_finance(gid: int):
     if not m.can_finance:
         return jsonify({"ok": False, "error": "No finance permission"}), 403
 
-    ensure_group_finance_defaults(gid)
+    if request.method != "GET":
+        ensure_group_finance_defaults(gid)
 
     if request.method == "POST":
         data = request.get_json(silent=True) or {}
@@ -808,16 +1132,40 @@ def group_finance(gid: int):
             category_id=category_id,
             method_id=method_id,
         )
-        db.session.add(item)
+        add_group_finance_item(item)
         db.session.commit()
         return jsonify({"ok": True, "id": item.id, "item": _gfi_to_dict(item)})
 
+    etag = group_etag(gid)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    if ensure_group_finance_defaults(gid):
+        etag = group_etag(gid)  # creating them bumped the group version
+
+    balance_val = read_group_balance(gid).balance
+
     items = GroupFinanceItem.query.filter_by(group_id=gid).order_by(GroupFinanceItem.id.desc()).all()
-    balance_val = 0
-    for it in items:
-        balance_val += it.amount if it.kind == "income" else -it.amount
+    return with_etag(jsonify({"ok": True, "balance": int(balance_val), "items": _gfis_to_dicts(items)}), etag)
+
+
+@api_bp.get("/groups/<int:gid>/finance/balance")
+@jwt_required()
+@log_call
+def group_finance_balance(gid: int):
+    user_id = int(get_jwt_identity())
+    m = require_member(user_id, gid)
+    if not m.can_finance:
+        return jsonify({"ok": False, "error": "No finance permission"}), 403
 
-    return jsonify({"ok": True, "balance": int(balance_val), "items": [_gfi_to_dict(i) for i in items]})
+    b = read_group_balance(gid)
+    return jsonify({"ok": True, "item": {
+        "balance": b.balance,
+        "income_total": int(b.income_total),
+        "expense_total": int(b.expense_total),
+        "items_count": int(b.items_count),
+        "updated_at": b.updated_at.isoformat(),
+    }})
 
 
 @api_bp.route("/groups/<int:gid>/finance/categories", methods=["GET", "POST", "DELETE"])
@@ -829,7 +1177,8 @@ def group_finance_categories(gid: int):
     if not m.can_finance:
         return jsonify({"ok": False, "error": "No finance permission"}), 403
 
-    ensure_group_finance_defaults(gid)
+    if request.method != "GET":
+        ensure_group_finance_defaults(gid)
 
     if request.method == "POST":
         data = request.get_json(silent=True) or {}
@@ -838,6 +1187,8 @@ def group_finance_categories(gid: int):
             return jsonify({"ok": False, "error": "name missing"}), 400
         c = GroupFinanceCategory(group_id=gid, name=name)
         db.session.add(c)
+        db.session.flush()
+        record_change(gid, "category", c.id)
         db.session.commit()
         return jsonify({"ok": True, "id": c.id})
 
@@ -853,13 +1204,27 @@ def group_finance_categories(gid: int):
         if not c:
             return jsonify({"ok": False, "error": "not found"}), 404
 
+        # log the affected items before the bulk update clears their category
+        record_changes(gid, "finance", db.select(GroupFinanceItem.id).where(
+            GroupFinanceItem.group_id == gid, GroupFinanceItem.category_id == c.id
+        ))
         GroupFinanceItem.query.filter_by(group_id=gid, category_id=c.id).update({"category_id": None})
+        reassign_rollups(gid, "category_id", c.id)
+        touch_group_balance(gid)
+        record_change(gid, "category", c.id)
         db.session.delete(c)
         db.session.commit()
         return jsonify({"ok": True})
 
+    etag = group_etag(gid)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    if ensure_group_finance_defaults(gid):
+        etag = group_etag(gid)  # creating them bumped the group version
+
     items = GroupFinanceCategory.query.filter_by(group_id=gid).order_by(GroupFinanceCategory.id.asc()).all()
-    return jsonify({"ok": True, "items": [{"id": c.id, "name": c.name} for c in items]})
+    return with_etag(jsonify({"ok": True, "items": [{"id": c.id, "name": c.name} for c in items]}), etag)
 
 
 @api_bp.route("/groups/<int:gid>/finance/methods", methods=["GET", "POST", "DELETE"])
@@ -871,7 +1236,8 @@ def group_finance_methods(gid: int):
     if not m.can_finance:
         return jsonify({"ok": False, "error": "No finance permission"}), 403
 
-    ensure_group_finance_defaults(gid)
+    if request.method != "GET":
+        ensure_group_finance_defaults(gid)
 
     if request.method == "POST":
         data = request.get_json(silent=True) or {}
@@ -880,6 +1246,8 @@ def group_finance_methods(gid: int):
             return jsonify({"ok": False, "error": "name missing"}), 400
         x = GroupPaymentMethod(group_id=gid, name=name)
         db.session.add(x)
+        db.session.flush()
+        record_change(gid, "method", x.id)
         db.session.commit()
         return jsonify({"ok": True, "id": x.id})
 
@@ -895,10 +1263,164 @@ def group_finance_methods(gid: int):
         if not x:
             return jsonify({"ok": False, "error": "not found"}), 404
 
+        record_changes(gid, "finance", db.select(GroupFinanceItem.id).where(
+            GroupFinanceItem.group_id == gid, GroupFinanceItem.method_id == x.id
+        ))
         GroupFinanceItem.query.filter_by(group_id=gid, method_id=x.id).update({"method_id": None})
+        reassign_rollups(gid, "method_id", x.id)
+        touch_group_balance(gid)
+        record_change(gid, "method", x.id)
         db.session.delete(x)
         db.session.commit()
         return jsonify({"ok": True})
 
+    etag = group_etag(gid)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    if ensure_group_finance_defaults(gid):
+        etag = group_etag(gid)  # creating them bumped the group version
+
     items = GroupPaymentMethod.query.filter_by(group_id=gid).order_by(GroupPaymentMethod.id.asc()).all()
-    return jsonify({"ok": True, "items": [{"id": m.id, "name": m.name} for m in items]})
+    return with_etag(jsonify({"ok": True, "items": [{"id": m.id, "name": m.name} for m in items]}), etag)
+
+
+@api_bp.get("/groups/<int:gid>/finance/reports/<by>")
+@jwt_required()
+@log_call
+def group_finance_report(gid: int, by: str):
+    """Totals per month (`monthly`), per category (`categories`) or per method (`methods`)
+    over an optional from/to range, answered from the daily rollups."""
+    user_id = int(get_jwt_identity())
+    m = require_member(user_id, gid)
+    if not m.can_finance:
+        return jsonify({"ok": False, "error": "No finance permission"}), 403
+    if by not in REPORTS:
+        return jsonify({"ok": False, "error": f"report must be one of {', '.join(REPORTS)}"}), 404
+
+    try:
+        start = _date_arg("from")
+        end = _date_arg("to")
+    except ValueError:
+        return jsonify({"ok": False, "error": "from/to must be YYYY-MM-DD"}), 400
+
+    etag = group_etag(gid)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    items = finance_report(gid, by, start, end)
+    totals = {k: sum(i[k] for i in items) for k in ("income", "expense", "count")}
+    return with_etag(jsonify({
+        "ok": True,
+        "report": by,
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat() if end else None,
+        "items": items,
+        "totals": totals,
+    }), etag)
+
+
+# ---------------- Delta sync ----------------
+CHANGES_PAGE_MAX = 5000
+
+
+@api_bp.get("/groups/<int:gid>/changes")
+@jwt_required()
+@log_call
+def group_changes(gid: int):
+    """Rows created, updated or deleted in the group since `since` (a cursor from the previous call).
+
+    Without `since`, or with a cursor older than the compacted part of the log,
+    the answer is `reset: true` plus a fresh cursor: refetch the full lists, then
+    continue from that cursor. Changed rows come serialized like the list
+    endpoints (`items`); deleted ones as ids (`deleted`).
+    """
+    user_id = int(get_jwt_identity())
+    m = require_member(user_id, gid)
+
+    since = request.args.get("since", type=int)
+    floor = db.session.query(Group.changes_floor).filter(Group.id == gid).scalar() or 0
+    if since is None or since < floor:
+        return jsonify({"ok": True, "reset": True, "cursor": max(latest_change_id(gid), floor), "more": False})
+
+    limit = _limit_arg(default=1000, maximum=CHANGES_PAGE_MAX)
+    rows = (
+        db.session.query(GroupChange.id, GroupChange.entity, GroupChange.entity_id)
+        .filter(GroupChange.group_id == gid, GroupChange.id > since)
+        .order_by(GroupChange.id.asc())
+        .limit(limit + 1)
+        .all()
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    changed: dict[str, set[int]] = {}
+    for _, entity, entity_id in rows:
+        changed.setdefault(entity, set()).add(entity_id)
+
+    def section(ids: set[int], found: dict[int, object], serialize) -> dict:
+        present = [found[i] for i in sorted(found, reverse=True)]
+        return {"items": serialize(present), "deleted": sorted(ids - set(found))}
+
+    out: dict = {"ok": True, "reset": False, "cursor": rows[-1].id if rows else since, "more": more}
+
+    ids = changed.get("member", set())
+    members = (
+        db.session.query(User)
+        .join(GroupMember, GroupMember.user_id == User.id)
+        .filter(GroupMember.group_id == gid, User.id.in_(ids))
+        .all()
+    ) if ids else []
+    out["members"] = section(ids, {u.id: u for u in members}, lambda us: [user_to_dict(u) for u in us])
+
+    if m.can_tasks:
+        ids = changed.get("task", set())
+        tasks = Task.query.filter(Task.group_id == gid, Task.id.in_(ids)).all() if ids else []
+        out["tasks"] = section(ids, {t.id: t for t in tasks}, tasks_to_dicts)
+
+    if m.can_finance:
+        ids = changed.get("finance", set())
+        items = GroupFinanceItem.query.filter(GroupFinanceItem.group_id == gid, GroupFinanceItem.id.in_(ids)).all() if ids else []
+        out["finance"] = section(ids, {i.id: i for i in items}, _gfis_to_dicts)
+
+        for key, entity, model in (("categories", "category", GroupFinanceCategory), ("methods", "method", GroupPaymentMethod)):
+            ids = changed.get(entity, set())
+            refs = model.query.filter(model.group_id == gid, model.id.in_(ids)).all() if ids else []
+            out[key] = section(ids, {r.id: r for r in refs}, lambda rs: [{"id": r.id, "name": r.name} for r in rs])
+
+        out["balance"] = int(read_group_balance(gid).balance)
+
+    return jsonify(out)
+
+
+@api_bp.get("/groups/<int:gid>/events")
+@log_call
+def group_events(gid: int):
+    """Live updates are served by the event hub (utils/events.py), not by WSGI workers.
+
+    Behind a proxy this path goes straight to the hub; otherwise redirect there
+    (EVENTS_URL, or the in-process hub's port with EVENTS_SERVER=thread).
+    Without a hub the answer is 204: EventSource does not reconnect after it,
+    and the frontend stops watching (static/js/core/events.js).
+    Only the ticket and resume position travel on: a `token` (JWT) in the
+    query would otherwise end up in the Location header and the hub's logs.
+    """
+    base = current_app.config.get("EVENTS_URL") or ""
+    if not base and current_app.config.get("EVENTS_SERVER") == "thread":
+        base = f"{request.scheme}://{request.host.rsplit(':', 1)[0]}:{current_app.config['EVENTS_PORT']}"
+    if not base:
+        return "", 204
+    query = urlencode([(k, v) for k, v in request.args.items(multi=True) if k in ("ticket", "last_event_id")])
+    return redirect(f"{base.rstrip('/')}{request.path}" + (f"?{query}" if query else ""), code=307)
+
+
+@api_bp.post("/groups/<int:gid>/events/ticket")
+@jwt_required()
+@log_call
+def group_events_ticket(gid: int):
+    """Short-lived ticket that opens the group's event stream (EventSource cannot send the JWT header)."""
+    user_id = int(get_jwt_identity())
+    require_member(user_id, gid)
+    ticket = issue_events_ticket(user_id, gid, get_jwt().get("exp"))
+    return jsonify({"ok": True, "ticket": ticket, "expires_in": int(current_app.config.get("EVENTS_TICKET_TTL", 60))})
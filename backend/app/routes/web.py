@@ -1,8 +1,14 @@
 from __future__ import annotations
 
-from flask import Blueprint, render_template
+import hmac
+import ipaddress
+import logging
+
+from flask import Blueprint, Response, current_app, render_template, request
 
 from ..utils.decorators import log_call
+from ..utils.membership import membership_cache_stats
+from ..utils.metrics import render_metrics
 
 web_bp = Blueprint("web", __name__)
 
@@ -14,6 +20,28 @@ def index():
 
 
 @web_bp.get("/health")
-@log_call
+@log_call(level=logging.DEBUG)  # polled by monitoring
 def health():
-    return {"ok": True}
+    return {"ok": True, "cache": {"membership": membership_cache_stats()}}
+
+
+@web_bp.get("/metrics")
+@log_call(level=logging.DEBUG)  # scraped by Prometheus
+def metrics():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+    elif not _direct_local_request():
+        return Response("forbidden: set METRICS_TOKEN to scrape from another host\n", status=403, mimetype="text/plain")
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+def _direct_local_request() -> bool:
+    """From this host and not relayed by a proxy (which would expose the route publicly)."""
+    if any(h in request.headers for h in ("X-Forwarded-For", "X-Real-IP", "Forwarded")):
+        return False
+    try:
+        return ipaddress.ip_address(request.remote_addr or "").is_loopback
+    except ValueError:
+        return False
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import http.client
+import json
+import logging
+import queue
+import ssl
+import threading
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+from flask import Flask, current_app
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramSendError(Exception):
+    def __init__(self, message: str, retry_after: float | None = None, permanent: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.permanent = permanent
+
+
+# what a request on a keep-alive connection the server already closed fails with
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class BotApiClient:
+    """Thread-safe Telegram Bot API client with a pool of keep-alive connections.
+
+    429/5xx responses and network errors are retried up to `max_retries` times.
+    A server-provided `retry_after` is honored when it is at most
+    `max_retry_after` seconds; longer waits are left to the caller (outbox backoff).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        pool_size: int = 4,
+        timeout: float = 10.0,
+        max_retries: int = 2,
+        max_retry_after: float = 5.0,
+    ):
+        parts = urlsplit(base_url.rstrip("/"))
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname or "api.telegram.org"
+        self._port = parts.port
+        self._prefix = f"{parts.path}/bot{token}"
+        self._ssl = ssl.create_default_context() if self._https else None
+
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+
+        self._idle: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, pool_size))
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._https:
+            return http.client.HTTPSConnection(self._host, self._port, timeout=self.timeout, context=self._ssl)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def _post(self, method: str, body: bytes) -> tuple[int, dict]:
+        self._slots.acquire()
+        try:
+            try:
+                conn, reused = self._idle.get_nowait(), True
+            except queue.Empty:
+                conn, reused = self._connect(), False
+
+            while True:
+                try:
+                    conn.request(
+                        "POST",
+                        f"{self._prefix}/{method}",
+                        body=body,
+                        headers={"Content-Type": "application/json", "Connection": "keep-alive"},
+                    )
+                    resp = conn.getresponse()
+                    raw = resp.read()
+                except _STALE_CONNECTION_ERRORS:
+                    conn.close()
+                    if reused:
+                        # idle keep-alive connection was closed by the server; retry once on a fresh one
+                        conn, reused = self._connect(), False
+                        continue
+                    raise
+                except (OSError, http.client.HTTPException):
+                    # timeouts and other failures go through the bounded retries of call()
+                    conn.close()
+                    raise
+
+                if resp.will_close:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+                break
+        finally:
+            self._slots.release()
+
+        try:
+            data = json.loads(raw or b"{}")
+        except ValueError:
+            data = {}
+        return resp.status, data
+
+    def call(self, method: str, payload: dict[str, Any]) -> dict:
+        body = json.dumps(payload).encode("utf-8")
+        attempt = 0
+        while True:
+            retry_after: float | None = None
+            try:
+                status, data = self._post(method, body)
+            except (OSError, http.client.HTTPException) as e:
+                error = TelegramSendError(str(e))
+            else:
+                if status == 200:
+                    return data
+                retry_after = (data.get("parameters") or {}).get("retry_after")
+                # 429 and 5xx are transient; other 4xx (blocked bot, unknown chat) will never succeed
+                permanent = 400 <= status < 500 and status != 429
+                description = data.get("description")
+                error = TelegramSendError(f"HTTP {status}" + (f": {description}" if description else ""), retry_after, permanent)
+
+            if error.permanent or attempt >= self.max_retries:
+                raise error
+            delay = float(retry_after) if retry_after else 0.5 * (2 ** attempt)
+            if delay > self.max_retry_after:
+                raise error
+            attempt += 1
+            logger.info("Bot API %s failed (%s), retry %d in %.1fs", method, error, attempt, delay)
+            time.sleep(delay)
+
+    def send_message(self, chat_id: int, text: str) -> dict:
+        return self.call("sendMessage", {"chat_id": int(chat_id), "text": text})
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_clients_lock = threading.Lock()
+
+
+def get_bot_api_client(app: Flask | None = None) -> BotApiClient:
+    """Return the app-wide client (one connection pool per process and token)."""
+    app = app or current_app._get_current_object()
+    token = (app.config.get("BOT_TOKEN") or "").strip()
+    base = app.config.get("TELEGRAM_API_URL", "https://api.telegram.org")
+    key = (base, token)
+
+    with _clients_lock:
+        client = app.extensions.get("bot_api_client")
+        if client is None or client[0] != key:
+            if client is not None:
+                client[1].close()
+            client = (key, BotApiClient(
+                base,
+                token,
+                pool_size=int(app.config.get("TELEGRAM_POOL_SIZE", 4)),
+                timeout=float(app.config.get("TELEGRAM_TIMEOUT", 10)),
+                max_retries=int(app.config.get("TELEGRAM_MAX_RETRIES", 2)),
+                max_retry_after=float(app.config.get("TELEGRAM_MAX_RETRY_AFTER", 5)),
+            ))
+            app.extensions["bot_api_client"] = client
+        return client[1]
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import threading
+from datetime import date, datetime, time, timedelta
+
+from flask import current_app
+
+from ..extensions import db
+from ..models import FinanceItem, GroupFinanceItem, GroupMember, Task, TaskAssignee
+from .cache import TTLCache
+from .versions import user_groups_etag
+
+_lock = threading.Lock()
+
+
+def _process_cache() -> TTLCache | None:
+    """Process-wide LRU of calendar ranges; disabled with CALENDAR_CACHE_SIZE=0."""
+    cache = current_app.extensions.get("calendar_cache")
+    if cache is None:
+        size = int(current_app.config.get("CALENDAR_CACHE_SIZE", 2000))
+        if size <= 0:
+            return None
+        with _lock:
+            cache = current_app.extensions.setdefault(
+                "calendar_cache",
+                TTLCache(maxsize=size, ttl=float(current_app.config.get("CALENDAR_CACHE_TTL", 600))),
+            )
+    return cache
+
+
+def calendar_etag(user_id: int) -> str:
+    """Version of everything the calendar of a user is built from.
+
+    The user's groups (tasks, group finance, memberships) via their versions,
+    plus the personal ledger, which is append-only: its newest id is its version.
+    """
+    uid = int(user_id)
+    last_item = db.session.query(db.func.max(FinanceItem.id)).filter(FinanceItem.user_id == uid).scalar()
+    return f"{user_groups_etag(uid)}.f{int(last_item or 0)}"
+
+
+def _day_bounds(start: date, end: date) -> tuple[datetime, datetime]:
+    return datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+
+
+def _task_days(user_id: int, start: date, end: date) -> list[tuple]:
+    """(day, open tasks due, urgent) of tasks the user is responsible for or assigned to."""
+    my_groups = db.select(GroupMember.group_id).where(
+        GroupMember.user_id == user_id, GroupMember.can_tasks.is_(True)
+    )
+    window = [
+        Task.group_id.in_(my_groups),
+        Task.deadline >= start,
+        Task.deadline <= end,
+        Task.done.is_(False),
+        Task.status != "done",
+    ]
+    mine = db.union(
+        db.select(Task.id).where(Task.responsible_id == user_id, *window),
+        db.select(Task.id)
+        .join(TaskAssignee, TaskAssignee.task_id == Task.id)
+        .where(TaskAssignee.user_id == user_id, *window),
+    ).subquery()
+    urgent = db.func.sum(db.case((Task.urgent.is_(True), 1), else_=0))
+    return (
+        db.session.query(Task.deadline, db.func.count(Task.id), urgent)
+        .join(mine, mine.c.id == Task.id)
+        .group_by(Task.deadline)
+        .all()
+    )
+
+
+def _personal_finance_days(user_id: int, start: date, end: date) -> list[tuple]:
+    """(day, income, expense) of the personal ledger; expenses are negative amounts there."""
+    day = db.func.date(FinanceItem.created_at)
+    income = db.func.sum(db.case((FinanceItem.amount > 0, FinanceItem.amount), else_=0))
+    expense = db.func.sum(db.case((FinanceItem.amount < 0, -FinanceItem.amount), else_=0))
+    lo, hi = _day_bounds(start, end)
+    return (
+        db.session.query(day, income, expense)
+        .filter(FinanceItem.user_id == user_id, FinanceItem.created_at >= lo, FinanceItem.created_at < hi)
+        .group_by(day)
+        .all()
+    )
+
+
+def _group_finance_days(user_id: int, start: date, end: date) -> list[tuple]:
+    """(day, income, expense) over every group whose finance the user can see."""
+    my_groups = db.select(GroupMember.group_id).where(
+        GroupMember.user_id == user_id, GroupMember.can_finance.is_(True)
+    )
+    day = db.func.date(GroupFinanceItem.created_at)
+    income = db.func.sum(db.case((GroupFinanceItem.kind == "income", GroupFinanceItem.amount), else_=0))
+    expense = db.func.sum(db.case((GroupFinanceItem.kind == "income", 0), else_=GroupFinanceItem.amount))
+    lo, hi = _day_bounds(start, end)
+    return (
+        db.session.query(day, income, expense)
+        .filter(
+            GroupFinanceItem.group_id.in_(my_groups),
+            GroupFinanceItem.created_at >= lo,
+            GroupFinanceItem.created_at < hi,
+        )
+        .group_by(day)
+        .all()
+    )
+
+
+def calendar_days(user_id: int, start: date, end: date, etag: str) -> dict[str, dict]:
+    """Per-day counters for [start, end]; only days with something on them.
+
+    Built with three GROUP BY queries. Cached per process under the user's
+    `etag` (calendar_etag): any write that changes the result changes the key,
+    so entries never need explicit invalidation and stay correct across workers.
+    """
+    uid = int(user_id)
+    key = (uid, start, end, etag)
+    cache = _process_cache()
+    if cache is not None:
+        days = cache.get(key)
+        if days is not None:
+            return days
+
+    days: dict[str, dict] = {}
+
+    def day(value) -> dict:
+        iso = value.isoformat() if isinstance(value, date) else str(value)
+        return days.setdefault(iso, {
+            "tasks": 0, "urgent": 0,
+            "income": 0, "expense": 0,
+            "group_income": 0, "group_expense": 0,
+        })
+
+    for deadline, count, urgent in _task_days(uid, start, end):
+        d = day(deadline)
+        d["tasks"], d["urgent"] = int(count), int(urgent or 0)
+    for value, income, expense in _personal_finance_days(uid, start, end):
+        d = day(value)
+        d["income"], d["expense"] = int(income or 0), int(expense or 0)
+    for value, income, expense in _group_finance_days(uid, start, end):
+        d = day(value)
+        d["group_income"], d["group_expense"] = int(income or 0), int(expense or 0)
+
+    days = dict(sorted(days.items()))
+    if cache is not None:
+        cache.set(key, days)
+    return days
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from sqlalchemy import Select, literal, or_
+
+from ..extensions import db
+from ..models import Group, GroupChange, GroupFinanceItem, GroupMember, Task, TaskAssignee
+from .versions import bump_group_versions, bump_user_groups
+
+logger = logging.getLogger(__name__)
+
+ENTITIES = ("task", "finance", "category", "method", "member")
+
+
+def record_changes(group_id: int, entity: str, ids: Iterable[int] | Select) -> None:
+    """Log changed (created, updated or deleted) rows of a group in the caller's transaction.
+
+    `ids` may be a SELECT of one id column, logged with a single INSERT ... SELECT
+    (bulk updates). Also bumps the group version behind the list ETags.
+    """
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown change entity {entity!r}")
+    now = datetime.utcnow()
+    if isinstance(ids, Select):
+        sub = ids.subquery()
+        db.session.execute(
+            db.insert(GroupChange).from_select(
+                ["group_id", "entity", "entity_id", "created_at"],
+                db.select(literal(int(group_id)), literal(entity), *sub.c, literal(now)),
+            )
+        )
+    else:
+        rows = [{"group_id": int(group_id), "entity": entity, "entity_id": int(x), "created_at": now} for x in ids]
+        if not rows:
+            return
+        db.session.execute(db.insert(GroupChange), rows)
+    bump_group_versions([group_id])
+
+
+def record_change(group_id: int, entity: str, entity_id: int) -> None:
+    record_changes(group_id, entity, [entity_id])
+
+
+def record_user_renamed(user_id: int) -> None:
+    """Names are embedded in member, task and finance rows: log every such row of the user."""
+    uid = int(user_id)
+    now = datetime.utcnow()
+    columns = ["group_id", "entity", "entity_id", "created_at"]
+    sources = [
+        db.select(GroupMember.group_id, literal("member"), GroupMember.user_id, literal(now))
+        .where(GroupMember.user_id == uid),
+        db.select(Task.group_id, literal("task"), Task.id, literal(now))
+        .where(or_(
+            Task.responsible_id == uid,
+            Task.assigned_by_id == uid,
+            Task.id.in_(db.select(TaskAssignee.task_id).where(TaskAssignee.user_id == uid)),
+        )),
+        db.select(GroupFinanceItem.group_id, literal("finance"), GroupFinanceItem.id, literal(now))
+        .where(GroupFinanceItem.created_by_id == uid),
+    ]
+    for source in sources:
+        db.session.execute(db.insert(GroupChange).from_select(columns, source))
+    bump_user_groups(uid)
+
+
+def latest_change_id(group_id: int) -> int:
+    return int(
+        db.session.query(db.func.max(GroupChange.id)).filter(GroupChange.group_id == int(group_id)).scalar() or 0
+    )
+
+
+def compact_changes(retention_days: int) -> dict:
+    """Shrink the change log; run periodically (`flask compact-changes`).
+
+    1. Keep only the newest entry per row: a client at any cursor still sees
+       the latest change of every row it has not seen yet.
+    2. Drop entries older than `retention_days` and raise the groups'
+       changes_floor past them; clients behind the floor are told to refetch.
+    """
+    latest = (
+        db.session.query(db.func.max(GroupChange.id))
+        .group_by(GroupChange.group_id, GroupChange.entity, GroupChange.entity_id)
+    )
+    coalesced = GroupChange.query.filter(GroupChange.id.not_in(latest)).delete(synchronize_session=False)
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    floors = (
+        db.session.query(GroupChange.group_id, db.func.max(GroupChange.id))
+        .filter(GroupChange.created_at < cutoff)
+        .group_by(GroupChange.group_id)
+        .all()
+    )
+    for group_id, floor in floors:
+        db.session.execute(
+            db.update(Group)
+            .where(Group.id == group_id, Group.changes_floor < floor)
+            .values(changes_floor=floor)
+        )
+    expired = GroupChange.query.filter(GroupChange.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+
+    if coalesced or expired:
+        logger.info("Compacted group changes: %d superseded, %d expired", coalesced, expired)
+    return {"superseded": coalesced, "expired": expired, "groups_floored": len(floors)}
@@ -2,49 +2,117 @@ from __future__ import annotations
 
 import functools
 import logging
+import os
+import random
 import time
 from typing import Any, Callable, TypeVar, ParamSpec
 
+from werkzeug.exceptions import HTTPException
+
+from .metrics import observe_call
+from .querystats import current_query_stats
+
 P = ParamSpec("P")
 T = TypeVar("T")
 
+# Defaults for the enter/exit lines; hot handlers can override them per decorator.
+LOG_CALL_LEVEL = getattr(logging, os.getenv("LOG_CALL_LEVEL", "INFO").upper(), logging.INFO)
+LOG_CALL_SAMPLE = float(os.getenv("LOG_CALL_SAMPLE", "1"))  # fraction of calls that get enter/exit lines
+LOG_CALL_SLOW_MS = float(os.getenv("LOG_CALL_SLOW_MS", "0"))  # slower calls are always logged (0 = off)
+
+
+def _sampled(logger: logging.Logger, level: int, sample: float) -> bool:
+    return logger.isEnabledFor(level) and (sample >= 1 or random.random() < sample)
+
+
+def _status(result: Any) -> int:
+    """HTTP status of a handler's return value (200 for anything that is not a response)."""
+    if isinstance(result, tuple) and len(result) > 1 and isinstance(result[1], int):
+        return result[1]
+    return getattr(result, "status_code", 200)
+
+
+def log_call(fn: Callable[P, T] | None = None, *, level: int | None = None, sample: float | None = None) -> Any:
+    """Log enter/exit/exception for functions (including Flask handlers).
+
+    Inside a request the exit line also has the DB time and statement count of
+    the call, e.g. `← group_tasks() 42.1ms db=31.0ms q=87`.
+
+    Use `@log_call(level=logging.DEBUG)` or `@log_call(sample=0.05)` on hot
+    handlers. Exceptions are always logged, and so are calls slower than
+    LOG_CALL_SLOW_MS (as WARNING), whatever the level and sampling.
+
+    Every call (sampled or not) is counted in the metrics registry: calls,
+    errors (exceptions other than 4xx aborts, 5xx responses) and duration.
+    """
+    if fn is None:
+        return lambda f: log_call(f, level=level, sample=sample)
 
-def log_call(fn: Callable[P, T]) -> Callable[P, T]:
-    """Log enter/exit/exception for functions (including Flask handlers)."""
     logger = logging.getLogger(fn.__module__)
+    level = LOG_CALL_LEVEL if level is None else level
+    sample = LOG_CALL_SAMPLE if sample is None else sample
 
     @functools.wraps(fn)
     def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
         start = time.perf_counter()
-        logger.info("→ %s()", fn.__name__)
+        verbose = _sampled(logger, level, sample)
+        stats = current_query_stats()
+        q0, db0 = (stats.count, stats.db_ms) if stats else (0, 0.0)
+        error = True
+        if verbose:
+            logger.log(level, "→ %s()", fn.__name__)
         try:
             result = fn(*args, **kwargs)
+            error = _status(result) >= 500
             return result
+        except HTTPException as e:
+            error = (e.code or 500) >= 500
+            raise
         except Exception:
             logger.exception("✖ %s() failed", fn.__name__)
             raise
         finally:
             elapsed_ms = (time.perf_counter() - start) * 1000
-            logger.info("← %s() %.1fms", fn.__name__, elapsed_ms)
+            observe_call(fn.__name__, elapsed_ms / 1000, error)
+            slow = LOG_CALL_SLOW_MS and elapsed_ms >= LOG_CALL_SLOW_MS
+            if verbose or slow:
+                exit_level = logging.WARNING if slow else level
+                if stats is not None:
+                    logger.log(exit_level, "← %s() %.1fms db=%.1fms q=%d", fn.__name__, elapsed_ms, stats.db_ms - db0, stats.count - q0)
+                else:
+                    logger.log(exit_level, "← %s() %.1fms", fn.__name__, elapsed_ms)
 
     return wrapper
 
 
-def log_async_call(fn: Callable[..., Any]) -> Callable[..., Any]:
+def log_async_call(fn: Callable[..., Any] | None = None, *, level: int | None = None, sample: float | None = None) -> Any:
     """Same for async functions (aiogram handlers, etc.)."""
+    if fn is None:
+        return lambda f: log_async_call(f, level=level, sample=sample)
+
     logger = logging.getLogger(fn.__module__)
+    level = LOG_CALL_LEVEL if level is None else level
+    sample = LOG_CALL_SAMPLE if sample is None else sample
 
     @functools.wraps(fn)
     async def wrapper(*args: Any, **kwargs: Any):
         start = time.perf_counter()
-        logger.info("→ %s()", fn.__name__)
+        verbose = _sampled(logger, level, sample)
+        error = True
+        if verbose:
+            logger.log(level, "→ %s()", fn.__name__)
         try:
-            return await fn(*args, **kwargs)
+            result = await fn(*args, **kwargs)
+            error = False
+            return result
         except Exception:
             logger.exception("✖ %s() failed", fn.__name__)
             raise
         finally:
             elapsed_ms = (time.perf_counter() - start) * 1000
-            logger.info("← %s() %.1fms", fn.__name__, elapsed_ms)
+            observe_call(fn.__name__, elapsed_ms / 1000, error)
+            slow = LOG_CALL_SLOW_MS and elapsed_ms >= LOG_CALL_SLOW_MS
+            if verbose or slow:
+                logger.log(logging.WARNING if slow else level, "← %s() %.1fms", fn.__name__, elapsed_ms)
 
     return wrapper
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable
+
+from aiohttp import web
+from flask import Flask
+from flask_jwt_extended import decode_token
+
+from ..extensions import db
+from ..models import Group, GroupChange, GroupMember
+from .metrics import registry
+from .tickets import read_events_ticket
+
+logger = logging.getLogger(__name__)
+
+POLL_BATCH = 1000
+REPLAY_LIMIT = 1000
+
+
+def _event(event: str, data: dict, event_id: int | None = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+# --- DB work, run in the executor inside an app context ---
+def _latest_change_id() -> int:
+    return int(db.session.query(db.func.max(GroupChange.id)).scalar() or 0)
+
+
+def _changes_after(last_id: int, limit: int) -> list[tuple]:
+    return [
+        tuple(r) for r in
+        db.session.query(GroupChange.id, GroupChange.group_id, GroupChange.entity, GroupChange.entity_id)
+        .filter(GroupChange.id > last_id)
+        .order_by(GroupChange.id.asc())
+        .limit(limit)
+        .all()
+    ]
+
+
+def _group_changes_after(group_id: int, last_id: int) -> list[tuple] | None:
+    """Changes of one group for a resuming client; None if they are no longer all in the log."""
+    floor = db.session.query(Group.changes_floor).filter(Group.id == group_id).scalar() or 0
+    if last_id < floor:
+        return None
+    rows = (
+        db.session.query(GroupChange.id, GroupChange.entity, GroupChange.entity_id)
+        .filter(GroupChange.group_id == group_id, GroupChange.id > last_id)
+        .order_by(GroupChange.id.asc())
+        .limit(REPLAY_LIMIT + 1)
+        .all()
+    )
+    return None if len(rows) > REPLAY_LIMIT else [tuple(r) for r in rows]
+
+
+def _authorize(ticket: str, token: str, group_id: int) -> tuple[int, float | None]:
+    """(user id, stream expiry) for a member of the group; raises 401/403 otherwise.
+
+    Browsers come with a ticket (POST /api/groups/<gid>/events/ticket), other
+    clients may send the JWT in the Authorization header. The stream expiry is
+    the JWT's, so a stream never outlives the login it was opened with.
+    """
+    if ticket:
+        granted = read_events_ticket(ticket, group_id)
+        if granted is None:
+            raise web.HTTPUnauthorized(text="invalid or expired ticket")
+        user_id, expires_at = granted
+    else:
+        try:
+            claims = decode_token(token)
+            user_id, expires_at = int(claims["sub"]), claims.get("exp")
+        except Exception:
+            raise web.HTTPUnauthorized(text="invalid or expired token")
+    if not GroupMember.query.filter_by(group_id=group_id, user_id=user_id).first():
+        raise web.HTTPForbidden(text="Not a group member")
+    return user_id, expires_at
+
+
+class _Client:
+    __slots__ = ("group_id", "queue", "overflowed")
+
+    def __init__(self, group_id: int, maxsize: int):
+        self.group_id = group_id
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+
+class EventHub:
+    """Server-Sent Events for group changes, fanned out from group_changes.
+
+    One event loop holds every connection (an idle client is a coroutine
+    and a small queue, not a thread). A single poller reads new group_changes
+    rows and formats each event once for all subscribers of the group. Event
+    ids are change ids, so `Last-Event-ID` resumes from the log, across
+    processes and restarts.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.poll_interval = float(app.config.get("EVENTS_POLL_INTERVAL", 0.5))
+        self.heartbeat = float(app.config.get("EVENTS_HEARTBEAT", 15))
+        self.retry_ms = int(app.config.get("EVENTS_RETRY_MS", 3000))
+        self.max_clients = int(app.config.get("EVENTS_MAX_CLIENTS", 10000))
+        self.queue_size = int(app.config.get("EVENTS_CLIENT_QUEUE", 256))
+        self.groups: dict[int, set[_Client]] = {}
+        self.clients = 0
+        self.last_id = 0
+        self._poller: asyncio.Task | None = None
+
+    async def _db(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, self._in_app, fn, args)
+
+    def _in_app(self, fn: Callable[..., Any], args: tuple) -> Any:
+        with self.app.app_context():
+            return fn(*args)
+
+    # --- lifecycle ---
+    async def start(self, _web_app: web.Application | None = None) -> None:
+        self.last_id = await self._db(_latest_change_id)
+        self._poller = asyncio.create_task(self._poll())
+        registry.gauge("app_sse_clients", lambda: self.clients)
+        logger.info("Event hub started at change %s", self.last_id)
+
+    async def stop(self, _web_app: web.Application | None = None) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                rows = await self._db(_changes_after, self.last_id, POLL_BATCH)
+            except Exception:
+                logger.exception("Event hub poll failed")
+                rows = []
+            self._dispatch(rows)
+            if len(rows) < POLL_BATCH:
+                await asyncio.sleep(self.poll_interval)
+
+    def _dispatch(self, rows: list[tuple]) -> None:
+        for change_id, group_id, entity, entity_id in rows:
+            self.last_id = change_id
+            subscribers = self.groups.get(group_id)
+            if not subscribers:
+                continue
+            msg = _event("change", {"entity": entity, "id": entity_id}, change_id)
+            for client in subscribers:
+                try:
+                    client.queue.put_nowait(msg)
+                except asyncio.QueueFull:
+                    client.overflowed = True
+
+    # --- connections ---
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        """GET /api/groups/<gid>/events?ticket=<ticket> (EventSource cannot send headers)."""
+        group_id = int(request.match_info["gid"])
+        if self.clients >= self.max_clients:
+            raise web.HTTPServiceUnavailable(text="too many clients", headers={"Retry-After": "10"})
+
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        _, expires_at = await self._db(_authorize, request.query.get("ticket", ""), token, group_id)
+
+        resp = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # nginx: do not buffer the stream
+            "Access-Control-Allow-Origin": "*",
+        })
+        await resp.prepare(request)
+
+        client = _Client(group_id, self.queue_size)
+        self.groups.setdefault(group_id, set()).add(client)
+        self.clients += 1
+        try:
+            # jittered reconnect delay, so a hub restart does not bring every client back at once
+            await resp.write(f"retry: {int(self.retry_ms * random.uniform(1.0, 1.5))}\n\n".encode())
+            await self._resume(resp, group_id, request)
+            await self._stream(resp, client, expires_at)
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            self.clients -= 1
+            subscribers = self.groups.get(group_id)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self.groups[group_id]
+        return resp
+
+    async def _resume(self, resp: web.StreamResponse, group_id: int, request: web.Request) -> None:
+        # subscribed before the replay: an event may arrive twice, never not at all
+        raw = request.headers.get("Last-Event-ID") or request.query.get("last_event_id") or ""
+        if not raw.isdigit():
+            await resp.write(_event("ready", {}, self.last_id))
+            return
+        rows = await self._db(_group_changes_after, group_id, int(raw))
+        if rows is None:
+            await resp.write(_event("reset", {}, self.last_id))
+            return
+        await resp.write(b"".join(_event("change", {"entity": e, "id": i}, cid) for cid, e, i in rows))
+        await resp.write(_event("ready", {}, max([self.last_id, *(r[0] for r in rows)])))
+
+    async def _stream(self, resp: web.StreamResponse, client: _Client, expires_at: float | None) -> None:
+        while True:
+            timeout = self.heartbeat
+            if expires_at is not None:
+                timeout = min(timeout, expires_at - time.time())
+                if timeout <= 0:
+                    await resp.write(_event("expired", {}))  # reconnect after a fresh login
+                    return
+            try:
+                msg = await asyncio.wait_for(client.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                await resp.write(b": ping\n\n")
+                continue
+
+            batch = [msg]
+            while not client.queue.empty():
+                batch.append(client.queue.get_nowait())
+            if client.overflowed:
+                # too slow to keep up: drop the backlog, the client resyncs via /changes
+                client.overflowed = False
+                batch = [_event("reset", {}, self.last_id)]
+            await resp.write(b"".join(batch))
+
+
+HUB = web.AppKey("hub", EventHub)
+
+
+def create_events_app(app: Flask) -> web.Application:
+    hub = EventHub(app)
+    web_app = web.Application()
+    web_app[HUB] = hub
+    web_app.router.add_get(r"/api/groups/{gid:\d+}/events", hub.handle)
+    web_app.on_startup.append(hub.start)
+    web_app.on_cleanup.append(hub.stop)
+    return web_app
+
+
+def run_events_server(app: Flask, host: str, port: int) -> None:
+    web.run_app(create_events_app(app), host=host, port=port, print=None)
+
+
+_thread: threading.Thread | None = None
+_thread_lock = threading.Lock()
+
+
+def start_events_thread(app: Flask) -> threading.Thread:
+    """EVENTS_SERVER=thread: serve the hub from this process (development, single worker)."""
+    global _thread
+    with _thread_lock:
+        if _thread is None:
+            host = app.config.get("EVENTS_HOST", "0.0.0.0")
+            port = int(app.config.get("EVENTS_PORT", 5001))
+
+            async def serve() -> None:
+                runner = web.AppRunner(create_events_app(app))
+                await runner.setup()
+                await web.TCPSite(runner, host, port).start()
+                await asyncio.Event().wait()
+
+            _thread = threading.Thread(target=asyncio.run, args=(serve(),), name="event-hub", daemon=True)
+            _thread.start()
+    return _thread
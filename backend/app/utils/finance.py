@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import Insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..extensions import db
+from ..models import Group, GroupFinanceBalance, GroupFinanceItem
+from .changes import record_change
+from .rollups import apply_item
+from .versions import bump_group_versions
+
+logger = logging.getLogger(__name__)
+
+
+def _totals_columns() -> tuple:
+    """(income, expense, count) aggregates over group_finance_items; zeros for a group without items."""
+    I = GroupFinanceItem
+    income = db.func.coalesce(db.func.sum(db.case((I.kind == "income", I.amount), else_=0)), 0)
+    expense = db.func.coalesce(db.func.sum(db.case((I.kind == "income", 0), else_=I.amount)), 0)
+    return income, expense, db.func.count(I.id)
+
+
+def _ledger_totals(group_id: int | None = None) -> dict[int, tuple[int, int, int]]:
+    """Recompute (income, expense, count) per group straight from group_finance_items."""
+    q = db.session.query(GroupFinanceItem.group_id, *_totals_columns())
+    if group_id is not None:
+        q = q.filter(GroupFinanceItem.group_id == group_id)
+    rows = q.group_by(GroupFinanceItem.group_id).all()
+    return {gid: (int(inc), int(exp), int(cnt)) for gid, inc, exp, cnt in rows}
+
+
+def balance_rows_insert(group_id: int | None = None) -> Insert:
+    """INSERT ... SELECT of the missing balance rows of every group (or one), from the ledger.
+
+    Existing rows are left alone (ON CONFLICT DO NOTHING), so this is safe to
+    run next to concurrent writers: seed and the get_group_balance fallback.
+    """
+    source = (
+        db.select(Group.id, *_totals_columns(), db.literal(datetime.utcnow(), db.DateTime))
+        .outerjoin(GroupFinanceItem, GroupFinanceItem.group_id == Group.id)
+        .group_by(Group.id)
+    )
+    if group_id is not None:
+        source = source.where(Group.id == int(group_id))
+    return sqlite_insert(GroupFinanceBalance).from_select(
+        ["group_id", "income_total", "expense_total", "items_count", "updated_at"], source
+    ).on_conflict_do_nothing(index_elements=["group_id"])
+
+
+def create_group_balance(group_id: int) -> None:
+    """Add the (empty) balance row of a group created in this transaction."""
+    db.session.add(GroupFinanceBalance(
+        group_id=group_id, income_total=0, expense_total=0, items_count=0, updated_at=datetime.utcnow()
+    ))
+
+
+def read_group_balance(group_id: int) -> GroupFinanceBalance:
+    """The balance of a group for read paths: one SELECT, never a write.
+
+    Rows are created with their group (create_group_balance) and backfilled by
+    migration 8; a missing one reads as zero until the next ledger write builds it.
+    """
+    row = db.session.get(GroupFinanceBalance, group_id)
+    if row is not None:
+        return row
+    return GroupFinanceBalance(group_id=group_id, income_total=0, expense_total=0, items_count=0, updated_at=datetime.utcnow())
+
+
+def get_group_balance(group_id: int) -> GroupFinanceBalance:
+    """Return the balance row of a group for a ledger write, building a missing one from the ledger.
+
+    Call this before adding/removing items in the session so that recompute
+    does not already include the pending change.
+    """
+    row = db.session.get(GroupFinanceBalance, group_id)
+    if row is not None:
+        return row
+
+    # a concurrent request may insert the same row: keep whichever lands first, then read it
+    db.session.execute(balance_rows_insert(group_id))
+    return db.session.get(GroupFinanceBalance, group_id)
+
+
+def _deltas(kind: str, amount: int, sign: int) -> tuple[int, int, int]:
+    amount = sign * int(amount)
+    return (amount, 0, sign) if kind == "income" else (0, amount, sign)
+
+
+def _apply(row: GroupFinanceBalance, income: int, expense: int, count: int) -> None:
+    # SQL-side increments, so concurrent writers never lose an update.
+    # Apply at most once per row per flush: a second assignment replaces the first expression.
+    row.income_total = GroupFinanceBalance.income_total + income
+    row.expense_total = GroupFinanceBalance.expense_total + expense
+    row.items_count = GroupFinanceBalance.items_count + count
+    row.updated_at = datetime.utcnow()
+
+
+def add_group_finance_item(item: GroupFinanceItem) -> None:
+    """Add an item to the session and account for it in the group balance and daily rollups (same transaction)."""
+    row = get_group_balance(item.group_id)
+    db.session.add(item)
+    db.session.flush()
+    _apply(row, *_deltas(item.kind, item.amount, +1))
+    apply_item(item, +1)
+    record_change(item.group_id, "finance", item.id)
+
+
+def update_group_finance_item(item: GroupFinanceItem, kind: str, amount: int) -> None:
+    row = get_group_balance(item.group_id)
+    old = _deltas(item.kind, item.amount, -1)
+    new = _deltas(kind, amount, +1)
+    apply_item(item, -1)
+    item.kind = kind
+    item.amount = amount
+    apply_item(item, +1)
+    _apply(row, *(a + b for a, b in zip(old, new)))
+    record_change(item.group_id, "finance", item.id)
+
+
+def delete_group_finance_item(item: GroupFinanceItem) -> None:
+    row = get_group_balance(item.group_id)
+    _apply(row, *_deltas(item.kind, item.amount, -1))
+    apply_item(item, -1)
+    record_change(item.group_id, "finance", item.id)
+    db.session.delete(item)
+
+
+def touch_group_balance(group_id: int) -> None:
+    """Mark the aggregate as changed (reference data edits do not move the totals)."""
+    get_group_balance(group_id).updated_at = datetime.utcnow()
+
+
+def check_group_balances(fix: bool = False) -> list[dict]:
+    """Compare every stored balance with a full recompute; optionally rewrite mismatches."""
+    ledger = _ledger_totals()
+    stored = {row.group_id: row for row in GroupFinanceBalance.query.all()}
+
+    mismatches = []
+    for gid in sorted(set(ledger) | set(stored)):
+        expected = ledger.get(gid, (0, 0, 0))
+        row = stored.get(gid)
+        actual = (int(row.income_total), int(row.expense_total), int(row.items_count)) if row else None
+        if actual == expected:
+            continue
+
+        mismatches.append({"group_id": gid, "expected": expected, "actual": actual})
+        if not fix:
+            continue
+        if row is None:
+            row = GroupFinanceBalance(group_id=gid)
+            db.session.add(row)
+        row.income_total, row.expense_total, row.items_count = expected
+        row.updated_at = datetime.utcnow()
+
+    if fix and mismatches:
+        logger.warning("Rebuilt %d group finance balances", len(mismatches))
+        bump_group_versions(m["group_id"] for m in mismatches)
+        db.session.commit()
+    return mismatches
@@ -1,12 +1,76 @@
 from __future__ import annotations
 
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
+import queue
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import Flask, g, request
+
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+_listener: QueueListener | None = None
+
+
+def current_request_id() -> str | None:
+    return _request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the id of the request they were emitted in (or "-")."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _QueueHandler(QueueHandler):
+    # The stock prepare() formats the record into a plain string; keep it a record
+    # (message rendered, traceback as exc_text) so the listener's formatters apply.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
 
 def setup_logging(app_name: str = "app") -> None:
-    """Configure app-wide logging."""
+    """Configure app-wide logging.
+
+    Request threads only put records on a queue; a QueueListener thread writes
+    them to stderr and the rotating log file (LOG_QUEUE=0 writes inline).
+    LOG_FORMAT=json switches both outputs to JSON lines with request ids.
+    """
+    global _listener
+
     level_name = os.getenv("LOG_LEVEL", "INFO").upper()
     level = getattr(logging, level_name, logging.INFO)
 
@@ -15,6 +79,7 @@ def setup_logging(app_name: str = "app") -> None:
     file_path = os.path.join(log_dir, f"{app_name}.log")
 
     fmt = "%(asctime)s | %(levelname)-7s | %(name)s | %(message)s"
+    formatter = JsonFormatter() if os.getenv("LOG_FORMAT", "text").lower() == "json" else logging.Formatter(fmt)
 
     root = logging.getLogger()
     root.setLevel(level)
@@ -25,11 +90,50 @@ def setup_logging(app_name: str = "app") -> None:
 
     stream = logging.StreamHandler()
     stream.setLevel(level)
-    stream.setFormatter(logging.Formatter(fmt))
+    stream.setFormatter(formatter)
 
     file = RotatingFileHandler(file_path, maxBytes=2_000_000, backupCount=5, encoding="utf-8")
     file.setLevel(level)
-    file.setFormatter(logging.Formatter(fmt))
+    file.setFormatter(formatter)
+
+    if os.getenv("LOG_QUEUE", "1") == "1":
+        handler = _QueueHandler(queue.SimpleQueue())
+        handler.addFilter(RequestIdFilter())
+        root.addHandler(handler)
+        _listener = QueueListener(handler.queue, stream, file, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    else:
+        for h in (stream, file):
+            h.addFilter(RequestIdFilter())
+            root.addHandler(h)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def install_request_ids(app: Flask) -> None:
+    """Give every request an id (incoming X-Request-ID or a new one), echoed in the response."""
+
+    @app.before_request
+    def _start_request_id() -> None:
+        rid = (request.headers.get("X-Request-ID") or "").strip()[:64] or uuid.uuid4().hex[:16]
+        g._request_id_token = _request_id.set(rid)
+
+    @app.after_request
+    def _echo_request_id(response):
+        rid = _request_id.get()
+        if rid:
+            response.headers["X-Request-ID"] = rid
+        return response
 
-    root.addHandler(stream)
-    root.addHandler(file)
+    @app.teardown_request
+    def _end_request_id(_exc) -> None:
+        token = g.pop("_request_id_token", None)
+        if token is not None:
+            _request_id.reset(token)
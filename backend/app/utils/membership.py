@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+
+from flask import current_app, g
+
+from ..models import GroupMember
+from .cache import TTLCache
+
+
+@dataclass(frozen=True)
+class Membership:
+    id: int
+    user_id: int
+    group_id: int
+    can_tasks: bool
+    can_finance: bool
+
+
+_lock = threading.Lock()
+_request_hits = 0
+
+
+def _process_cache() -> TTLCache | None:
+    """Process-wide LRU of memberships; disabled with MEMBERSHIP_CACHE_SIZE=0."""
+    cache = current_app.extensions.get("membership_cache")
+    if cache is None:
+        size = int(current_app.config.get("MEMBERSHIP_CACHE_SIZE", 10000))
+        if size <= 0:
+            return None
+        with _lock:
+            cache = current_app.extensions.setdefault(
+                "membership_cache",
+                TTLCache(maxsize=size, ttl=float(current_app.config.get("MEMBERSHIP_CACHE_TTL", 60))),
+            )
+    return cache
+
+
+def get_membership(user_id: int, group_id: int) -> Membership | None:
+    """Membership lookup memoized per request (flask.g) and per process (LRU with TTL).
+
+    Only positive results go to the process cache: a member who just joined is
+    never denied because of a stale entry cached by another worker.
+    """
+    global _request_hits
+    key = (int(user_id), int(group_id))
+
+    memo = g.setdefault("_memberships", {})
+    if key in memo:
+        with _lock:
+            _request_hits += 1
+        return memo[key]
+
+    cache = _process_cache()
+    m = cache.get(key) if cache is not None else None
+    if m is None:
+        row = GroupMember.query.filter_by(user_id=key[0], group_id=key[1]).first()
+        if row is not None:
+            m = Membership(row.id, row.user_id, row.group_id, bool(row.can_tasks), bool(row.can_finance))
+            if cache is not None:
+                cache.set(key, m)
+
+    memo[key] = m
+    return m
+
+
+def invalidate_membership(group_id: int, user_ids: list[int] | None = None) -> None:
+    """Drop cached memberships of a group (all of them, or only for `user_ids`)."""
+    group_id = int(group_id)
+    targets = None if user_ids is None else {int(u) for u in user_ids}
+
+    def stale(key: tuple[int, int]) -> bool:
+        return key[1] == group_id and (targets is None or key[0] in targets)
+
+    memo = g.get("_memberships")
+    if memo:
+        for key in [k for k in memo if stale(k)]:
+            del memo[key]
+
+    cache = _process_cache()
+    if cache is None:
+        return
+    if targets is None:
+        cache.discard_where(stale)
+    else:
+        for uid in targets:
+            cache.pop((uid, group_id))
+
+
+def membership_cache_stats() -> dict:
+    cache = _process_cache()
+    stats = cache.stats() if cache is not None else {"size": 0, "maxsize": 0, "hits": 0, "misses": 0}
+    return {"request_hits": _request_hits, "process": stats}
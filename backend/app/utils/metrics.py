@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import atexit
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows: folding exited processes is then not serialized across workers
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# With METRICS_DIR set, every process (web workers, notify-worker, bot) writes its
+# snapshot to METRICS_DIR/metrics-<pid>-<id>.json and /metrics sums all of them.
+# Counters of exited processes are folded into metrics-exited.json and their files removed.
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))  # seconds
+EXITED_FILE = "metrics-exited.json"
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help)
+METRICS: dict[str, tuple[str, str]] = {
+    "app_calls_total": ("counter", "Calls of functions decorated with log_call/log_async_call."),
+    "app_call_errors_total": ("counter", "Calls that raised or returned a 5xx response."),
+    "app_call_duration_seconds": ("histogram", "Duration of log_call/log_async_call calls."),
+    "app_notifications_enqueued_total": ("counter", "Telegram messages added to the notification outbox."),
+    "app_notifications_total": ("counter", "Notification delivery attempts by result (sent|retry|dead)."),
+    "app_db_pool_size": ("gauge", "Configured database pool size."),
+    "app_db_pool_checked_out": ("gauge", "Database connections currently checked out."),
+    "app_db_pool_overflow": ("gauge", "Database connections open beyond the pool size."),
+    "app_sse_clients": ("gauge", "Connected Server-Sent Events clients (event hub processes)."),
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Registry:
+    """Thread-safe counters, histograms and callback gauges of one process."""
+
+    def __init__(self, directory: str = "", flush_interval: float = 5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._histograms: dict[tuple[str, Labels], list] = {}  # [bucket counts..., sum, count]
+        self._gauges: dict[str, Callable[[], float | None]] = {}
+        self._last_flush = time.monotonic()
+        self._pid = 0
+        self._instance = ""
+        self._started: str | None = None
+
+    @property
+    def instance(self) -> str:
+        """<pid>-<random id> of this process; a new one after fork or when the pid is reused."""
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid, self._instance, self._started = pid, f"{pid}-{uuid.uuid4().hex[:12]}", _process_start(pid)
+        return self._instance
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+        self._maybe_flush()
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0, 0]
+            h[bisect.bisect_left(BUCKETS, seconds)] += 1
+            h[-2] += seconds
+            h[-1] += 1
+        self._maybe_flush()
+
+    def gauge(self, name: str, fn: Callable[[], float | None]) -> None:
+        """Register a gauge read at snapshot time (e.g. pool usage)."""
+        self._gauges[name] = fn
+
+    def snapshot(self) -> dict:
+        gauges = []
+        for name, fn in list(self._gauges.items()):
+            try:
+                value = fn()
+            except Exception:
+                value = None
+            if value is not None:
+                gauges.append([name, [], float(value)])
+        instance = self.instance
+        with self._lock:
+            return {
+                "pid": self._pid,
+                "instance": instance,
+                "started": self._started,
+                "counters": [[n, list(map(list, lb)), v] for (n, lb), v in self._counters.items()],
+                "histograms": [[n, list(map(list, lb)), list(h)] for (n, lb), h in self._histograms.items()],
+                "gauges": gauges,
+            }
+
+    def _maybe_flush(self) -> None:
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.directory, f"metrics-{self.instance}.json")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            _write_json(path, self.snapshot())
+        except OSError:
+            logger.exception("Could not write metrics to %s", path)
+
+    def collect(self) -> list[dict]:
+        """Snapshots of all processes (this one only without a metrics directory).
+
+        Snapshots of exited processes are folded into metrics-exited.json and
+        their files deleted, so the directory does not grow with every restart
+        and a reused pid never overwrites (and lowers) another process's counters.
+        """
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        with _locked(os.path.join(self.directory, ".lock")):
+            exited_path = os.path.join(self.directory, EXITED_FILE)
+            exited = _read_json(exited_path) or {"counters": [], "histograms": [], "gauges": [], "folded": []}
+            live, dead = [], []
+            for path in sorted(glob.glob(os.path.join(self.directory, "metrics-*.json"))):
+                name = os.path.basename(path)
+                if name == EXITED_FILE:
+                    continue
+                snap = _read_json(path)
+                if snap is None:
+                    continue
+                if name in exited["folded"]:
+                    dead.append(path)  # folded earlier, the delete did not happen
+                elif _alive(snap.get("pid"), snap.get("started")):
+                    live.append(snap)
+                else:
+                    dead.append(path)
+                    _fold(exited, snap)
+                    exited["folded"].append(name)
+            if dead:
+                try:
+                    # counters first: a crash before the deletes leaves names in "folded", not lost counts
+                    _write_json(exited_path, exited)
+                    for path in dead:
+                        os.remove(path)
+                    exited["folded"] = []
+                    _write_json(exited_path, exited)
+                except OSError:
+                    logger.exception("Could not fold exited metrics into %s", exited_path)
+        return live + [exited]
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: dict) -> None:
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+class _locked:
+    """Exclusive lock file, so two workers never fold the same exited process twice."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.f = None
+
+    def __enter__(self) -> None:
+        if fcntl is not None:
+            self.f = open(self.path, "a")
+            fcntl.flock(self.f, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc) -> None:
+        if self.f is not None:
+            fcntl.flock(self.f, fcntl.LOCK_UN)
+            self.f.close()
+
+
+def _fold(into: dict, snap: dict) -> None:
+    """Add the counters and histograms of an exited process to `into` (gauges are dropped)."""
+    for kind in ("counters", "histograms"):
+        index = {(entry[0], json.dumps(entry[1])): entry for entry in into[kind]}
+        for name, labels, value in snap.get(kind, []):
+            entry = index.get((name, json.dumps(labels)))
+            if entry is None:
+                entry = index[(name, json.dumps(labels))] = [name, labels, value]
+                into[kind].append(entry)
+            elif kind == "counters":
+                entry[2] += value
+            else:
+                entry[2] = [a + b for a, b in zip(entry[2], value)]
+
+
+def _process_start(pid: int) -> str | None:
+    """Start time of a process in clock ticks since boot (Linux); tells a reused pid apart."""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as f:
+            # the command name (field 2) may contain spaces; fields after it are fixed
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def _alive(pid: int | None, started: str | None = None) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return started is None or _process_start(pid) in (None, started)
+
+
+def _fmt_labels(labels: list, extra: tuple[str, str] | None = None) -> str:
+    pairs = [tuple(p) for p in labels] + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")  # noqa: E731
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus(snapshots: list[dict]) -> str:
+    """Sum snapshots and render them in the Prometheus text format (0.0.4)."""
+    samples: dict[str, dict[tuple, float | list]] = {name: {} for name in METRICS}
+    for snap in snapshots:
+        for kind in ("counters", "gauges"):
+            for name, labels, value in snap.get(kind, []):
+                key = tuple(tuple(p) for p in labels)
+                bucket = samples.setdefault(name, {})
+                bucket[key] = bucket.get(key, 0.0) + value
+        for name, labels, h in snap.get("histograms", []):
+            key = tuple(tuple(p) for p in labels)
+            bucket = samples.setdefault(name, {})
+            acc = bucket.get(key)
+            bucket[key] = list(h) if acc is None else [a + b for a, b in zip(acc, h)]
+
+    lines: list[str] = []
+    for name, series in samples.items():
+        kind, help_text = METRICS.get(name, ("untyped", ""))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series.items()):
+            if kind == "histogram":
+                cumulative = 0
+                for le, n in zip((*BUCKETS, "+Inf"), value[: len(BUCKETS) + 1]):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_fmt_labels(labels, ('le', str(le)))} {cumulative}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {value[-2]:.6f}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {value[-1]}")
+            else:
+                lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry(METRICS_DIR, METRICS_FLUSH_INTERVAL)
+if METRICS_DIR:
+    atexit.register(registry.flush)
+
+
+def render_metrics() -> str:
+    return render_prometheus(registry.collect())
+
+
+def install_pool_gauges(engine) -> None:
+    """Pool size / checked-out / overflow gauges (pools without them, e.g. in-memory SQLite, report nothing)."""
+    pool = engine.pool
+    if not all(hasattr(pool, attr) for attr in ("size", "checkedout", "overflow")):
+        return
+    registry.gauge("app_db_pool_size", pool.size)
+    registry.gauge("app_db_pool_checked_out", pool.checkedout)
+    # QueuePool.overflow() counts up from -pool_size while the pool is still filling
+    registry.gauge("app_db_pool_overflow", lambda: max(0, pool.overflow()))
+
+
+def observe_call(name: str, seconds: float, error: bool) -> None:
+    registry.inc("app_calls_total", handler=name)
+    if error:
+        registry.inc("app_call_errors_total", handler=name)
+    registry.observe("app_call_duration_seconds", seconds, handler=name)
@@ -1,42 +1,348 @@
 from __future__ import annotations
 
 import logging
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime
 
-from sqlalchemy import inspect, text
+from sqlalchemy import Column, Connection, DateTime, Float, Integer, MetaData, String, Table, bindparam, func, inspect, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateTable
 
 from ..extensions import db
 
 logger = logging.getLogger(__name__)
 
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(128), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_ms", Float, nullable=False),
+)
 
-def _has_column(table: str, column: str) -> bool:
-    insp = inspect(db.engine)
-    cols = [c["name"] for c in insp.get_columns(table)]
-    return column in cols
 
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
 
-def ensure_sqlite_schema() -> None:
-    """Lightweight schema migration for SQLite.
 
-    This project uses db.create_all() (no Alembic). For SQLite we can add new
-    columns with ALTER TABLE. This function is safe to run on each startup.
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, name: str):
+    """Register `fn(conn)` as schema migration `version` (versions only go up).
+
+    Each migration runs in its own transaction and must bring a database at
+    `version - 1` to `version`. Databases created from scratch are built from the
+    models with db.create_all() and stamped with the latest version, so helpers
+    below (add_column, create_indexes) are idempotent.
     """
 
-    if db.engine.dialect.name != "sqlite":
-        return
+    def decorator(fn: Callable[[Connection], None]) -> Callable[[Connection], None]:
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"Migration {version} must be newer than {MIGRATIONS[-1].version}")
+        MIGRATIONS.append(Migration(version, name, fn))
+        return fn
+
+    return decorator
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
 
-    # Columns for Task table
-    alter_statements: list[str] = []
-    if not _has_column("tasks", "assigned_by_id"):
-        alter_statements.append("ALTER TABLE tasks ADD COLUMN assigned_by_id INTEGER")
-    if not _has_column("tasks", "description"):
-        alter_statements.append("ALTER TABLE tasks ADD COLUMN description TEXT NOT NULL DEFAULT ''")
-    if not _has_column("tasks", "status"):
-        alter_statements.append("ALTER TABLE tasks ADD COLUMN status VARCHAR(32) NOT NULL DEFAULT 'new'")
-    if not alter_statements:
-        return
 
-    logger.warning("Applying SQLite schema updates: %s", alter_statements)
+def current_version(conn: Connection) -> int | None:
+    """Applied schema version; None if the database predates versioned migrations."""
+    try:
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        conn.rollback()
+        return None
+
+
+def applied_migrations() -> list[dict]:
+    with db.engine.connect() as conn:
+        if current_version(conn) is None:
+            return []
+        rows = conn.execute(select(schema_version).order_by(schema_version.c.version)).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def migrate() -> int:
+    """Bring the database schema to the latest version. Returns the number of migrations applied.
+
+    When the schema is current this costs a single SELECT: no reflection and no
+    db.create_all(). Run `flask schema-version` to see what was applied and how long it took.
+    """
+    target = latest_version()
+    with db.engine.connect() as conn:
+        version = current_version(conn)
+    if version == target:
+        return 0
+    if version is not None and version > target:
+        logger.warning("Database schema v%s is newer than this code (v%s)", version, target)
+        return 0
+
+    started = time.perf_counter()
     with db.engine.begin() as conn:
-        for stmt in alter_statements:
-            conn.execute(text(stmt))
+        schema_version.create(conn, checkfirst=True)
+        if version is None and not inspect(conn).has_table("users"):
+            # empty database: the models already describe the latest schema
+            db.metadata.create_all(conn)
+            elapsed = (time.perf_counter() - started) * 1000
+            _record(conn, MIGRATIONS, elapsed / max(1, len(MIGRATIONS)))
+            logger.warning("Created database schema v%s in %.1fms", target, elapsed)
+            return len(MIGRATIONS)
+
+    pending = [m for m in MIGRATIONS if m.version > (version or 0)]
+    for m in pending:
+        t0 = time.perf_counter()
+        with db.engine.begin() as conn:
+            m.apply(conn)
+            elapsed = (time.perf_counter() - t0) * 1000
+            _record(conn, [m], elapsed)
+        logger.warning("Applied migration %s (%s) in %.1fms", m.version, m.name, elapsed)
+
+    logger.warning(
+        "Database schema v%s -> v%s: %d migration(s) in %.1fms",
+        version or 0,
+        target,
+        len(pending),
+        (time.perf_counter() - started) * 1000,
+    )
+    return len(pending)
+
+
+def _record(conn: Connection, migrations: Iterable[Migration], duration_ms: float) -> None:
+    now = datetime.utcnow()
+    conn.execute(
+        schema_version.insert(),
+        [{"version": m.version, "name": m.name, "applied_at": now, "duration_ms": duration_ms} for m in migrations],
+    )
+
+
+# --- helpers for migrations ---
+
+
+def table_columns(conn: Connection, table: str) -> set[str]:
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def add_column(conn: Connection, table: str, column: str, ddl: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN unless the column exists. Returns True if it was added."""
+    if column in table_columns(conn, table):
+        return False
+    conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {ddl}'))
+    return True
+
+
+def create_tables(conn: Connection, names: Iterable[str]) -> None:
+    db.metadata.create_all(conn, tables=[db.metadata.tables[n] for n in names])
+
+
+def create_indexes(conn: Connection, names: Iterable[str]) -> None:
+    """Create the named model indexes if missing (db.create_all() only adds them with new tables).
+
+    Migrations list index names explicitly, so an older migration never builds an
+    index (e.g. a unique one) that a later migration prepares the data for.
+    """
+    wanted = set(names)
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in wanted:
+                index.create(bind=conn, checkfirst=True)
+
+
+def rebuild_table(conn: Connection, name: str, copy: dict[str, str] | None = None) -> None:
+    """Recreate `name` from its model definition and copy the rows over.
+
+    For changes SQLite cannot ALTER (constraints, column types, dropped columns).
+    All of them are applied in one pass: new table, one INSERT ... SELECT, drop,
+    rename, indexes. `copy` maps a new column to an SQL expression over the old
+    table; other columns present in both tables are copied as is, the rest get
+    their defaults. Foreign keys must not be enforced (the default here).
+    """
+    table = db.metadata.tables[name]
+    old_columns = table_columns(conn, name)
+    exprs = dict(copy or {})
+    for col in table.columns:
+        if col.name not in exprs and col.name in old_columns:
+            exprs[col.name] = f'"{col.name}"'
+
+    tmp = f"_{name}_rebuild"
+    conn.execute(text(f'DROP TABLE IF EXISTS "{tmp}"'))
+    # the copy needs the referenced tables to render its foreign keys
+    scratch = MetaData()
+    for other in db.metadata.sorted_tables:
+        if other is not table:
+            other.to_metadata(scratch)
+    # indexes are created after the rename: SQLite index names are global
+    conn.execute(CreateTable(table.to_metadata(scratch, name=tmp)))
+    cols = ", ".join(f'"{c}"' for c in exprs)
+    conn.execute(text(f'INSERT INTO "{tmp}" ({cols}) SELECT {", ".join(exprs.values())} FROM "{name}"'))
+    conn.execute(text(f'DROP TABLE "{name}"'))
+    conn.execute(text(f'ALTER TABLE "{tmp}" RENAME TO "{name}"'))
+    for index in table.indexes:
+        index.create(bind=conn)
+
+
+# --- migrations ---
+
+BASELINE_TABLES = (
+    "users",
+    "finance_items",
+    "groups",
+    "notification_outbox",
+    "notification_settings",
+    "group_finance_balances",
+    "group_finance_categories",
+    "group_invites",
+    "group_members",
+    "group_payment_methods",
+    "group_username_invites",
+    "tasks",
+    "group_finance_items",
+    "task_assignees",
+)
+
+# indexes of the baseline schema that are still declared on the models
+BASELINE_INDEXES = (
+    "ix_group_finance_categories_group_id",
+    "ix_group_invites_group_id",
+    "ix_group_invites_token",
+    "ix_group_members_user_id",
+    "ix_group_payment_methods_group_id",
+    "ix_notification_outbox_status_next_attempt_at",
+    "ix_notification_settings_user_id",
+    "ix_task_assignees_user_id_task_id",
+    "ix_tasks_group_id_deadline",
+    "ix_tasks_group_id_id",
+    "ix_tasks_group_id_responsible_id",
+    "ix_users_first_name_lc",
+    "ix_users_tg_id",
+    "ix_users_username_lc",
+)
+
+
+@migration(1, "baseline")
+def _baseline(conn: Connection) -> None:
+    """Schema as of the switch to versioned migrations (was ensure_sqlite_schema + create_all)."""
+    create_tables(conn, BASELINE_TABLES)
+
+    add_column(conn, "tasks", "assigned_by_id", "INTEGER")
+    add_column(conn, "tasks", "description", "TEXT NOT NULL DEFAULT ''")
+    add_column(conn, "tasks", "status", "VARCHAR(32) NOT NULL DEFAULT 'new'")
+
+    add_column(conn, "users", "default_group_id", "INTEGER")
+    add_column(conn, "users", "provisioned_at", "DATETIME")
+    added_lc = add_column(conn, "users", "username_lc", "VARCHAR(128)")
+    added_lc = add_column(conn, "users", "first_name_lc", "VARCHAR(128)") or added_lc
+    if added_lc:
+        _backfill_users_lowercase(conn)
+
+    create_indexes(conn, BASELINE_INDEXES)
+
+
+def _backfill_users_lowercase(conn: Connection) -> None:
+    # done in Python: SQLite lower() does not fold non-ASCII (e.g. Cyrillic) names
+    rows = conn.execute(text("SELECT id, username, first_name FROM users")).all()
+    if not rows:
+        return
+    conn.execute(
+        text("UPDATE users SET username_lc = :u, first_name_lc = :f WHERE id = :id"),
+        [
+            {"id": r.id, "u": r.username.lower() if r.username else None, "f": r.first_name.lower() if r.first_name else None}
+            for r in rows
+        ],
+    )
+
+
+@migration(2, "hot_query_indexes")
+def _hot_query_indexes(conn: Connection) -> None:
+    """Composite indexes for the hot lookups; unique (group_id, user_id) on group_members; groups.owner_id."""
+    # keep the oldest row of duplicated memberships so the unique index can be built
+    conn.execute(text(
+        "DELETE FROM group_members WHERE id NOT IN "
+        "(SELECT MIN(id) FROM group_members GROUP BY group_id, user_id)"
+    ))
+    # single-column indexes that are now a prefix of a composite one
+    for name in (
+        "ix_group_members_group_id",
+        "ix_task_assignees_task_id",
+        "ix_task_assignees_user_id",
+        "ix_tasks_group_id",
+        "ix_group_finance_items_group_id",
+        "ix_group_username_invites_group_id",
+        "ix_group_username_invites_target_username",
+    ):
+        conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+    create_indexes(conn, (
+        "ix_groups_owner_id",
+        "uq_group_members_group_id_user_id",
+        "ix_task_assignees_task_id_user_id",
+        "ix_group_finance_items_group_id_id",
+        "ix_group_username_invites_target_username_status",
+        "ix_group_username_invites_group_id_target_username_status",
+    ))
+
+
+@migration(3, "group_versions")
+def _group_versions(conn: Connection) -> None:
+    """groups.version, the change counter behind the ETags of the group list endpoints."""
+    add_column(conn, "groups", "version", "INTEGER NOT NULL DEFAULT 0")
+
+
+@migration(4, "group_changes")
+def _group_changes(conn: Connection) -> None:
+    """Change log behind GET /api/groups/<gid>/changes and its compaction floor."""
+    create_tables(conn, ["group_changes"])
+    add_column(conn, "groups", "changes_floor", "INTEGER NOT NULL DEFAULT 0")
+
+
+@migration(5, "my_tasks_index")
+def _my_tasks_index(conn: Connection) -> None:
+    """(responsible_id, deadline) on tasks for GET /api/me/tasks, which spans groups."""
+    create_indexes(conn, ["ix_tasks_responsible_id_deadline"])
+
+
+@migration(6, "finance_day_indexes")
+def _finance_day_indexes(conn: Connection) -> None:
+    """(owner, created_at) on both ledgers for the per-day sums of GET /api/calendar."""
+    # replaced by a composite index it is a prefix of
+    conn.execute(text('DROP INDEX IF EXISTS "ix_finance_items_user_id"'))
+    create_indexes(conn, ["ix_finance_items_user_id_created_at", "ix_group_finance_items_group_id_created_at"])
+
+
+@migration(7, "group_finance_daily")
+def _group_finance_daily(conn: Connection) -> None:
+    """Daily finance rollups behind the group finance reports, filled from the existing ledger."""
+    create_tables(conn, ["group_finance_daily"])
+    # frozen SQL: the live helper (rollups.ledger_rollups_insert) may change after this shipped
+    conn.execute(text(
+        "INSERT INTO group_finance_daily "
+        "(group_id, day, kind, category_id, method_id, amount_total, items_count) "
+        "SELECT group_id, date(created_at), kind, COALESCE(category_id, 0), COALESCE(method_id, 0), "
+        "SUM(amount), COUNT(id) FROM group_finance_items "
+        "GROUP BY group_id, date(created_at), kind, COALESCE(category_id, 0), COALESCE(method_id, 0)"
+    ))
+
+
+@migration(8, "group_finance_balance_rows")
+def _group_finance_balance_rows(conn: Connection) -> None:
+    """A balance row for every group, so reading a balance never has to create one."""
+    # frozen SQL: the live helper (finance.balance_rows_insert) may change after this shipped;
+    # SQLite needs a WHERE in an INSERT ... SELECT before ON CONFLICT
+    conn.execute(text(
+        "INSERT INTO group_finance_balances (group_id, income_total, expense_total, items_count, updated_at) "
+        "SELECT g.id, "
+        "COALESCE(SUM(CASE WHEN i.kind = 'income' THEN i.amount ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN i.kind = 'income' THEN 0 ELSE i.amount END), 0), "
+        "COUNT(i.id), :now FROM groups g LEFT JOIN group_finance_items i ON i.group_id = g.id "
+        "WHERE true GROUP BY g.id "
+        "ON CONFLICT (group_id) DO NOTHING"
+    ).bindparams(bindparam("now", datetime.utcnow(), type_=DateTime)))
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from flask import Flask, current_app
+
+from ..extensions import db
+from ..models import NotificationOutbox
+from .bot_api import TelegramSendError, get_bot_api_client
+from .metrics import registry as metrics
+from .querystats import track_queries
+
+logger = logging.getLogger(__name__)
+
+# A claimed row is hidden from other workers for this long while its message is being sent.
+CLAIM_LEASE_SECONDS = 60
+
+
+def enqueue_message(user_id: int | None, chat_id: int, text: str) -> NotificationOutbox | None:
+    """Queue a Telegram message in the current transaction (the caller commits)."""
+    if not (current_app.config.get("BOT_TOKEN") or "").strip():
+        return None
+    row = NotificationOutbox(user_id=user_id, chat_id=int(chat_id), text=text)
+    db.session.add(row)
+    metrics.inc("app_notifications_enqueued_total")
+    return row
+
+
+def send_message(chat_id: int, text: str) -> None:
+    if not (current_app.config.get("BOT_TOKEN") or "").strip():
+        raise TelegramSendError("BOT_TOKEN is empty", permanent=True)
+    get_bot_api_client().send_message(chat_id, text)
+
+
+def _backoff(attempts: int) -> float:
+    base = float(current_app.config.get("NOTIFY_BACKOFF_BASE", 5))
+    cap = float(current_app.config.get("NOTIFY_BACKOFF_MAX", 900))
+    return min(cap, base * (2 ** max(0, attempts - 1)))
+
+
+def _claim(row: NotificationOutbox, now: datetime) -> bool:
+    claimed = (
+        NotificationOutbox.query
+        .filter(
+            NotificationOutbox.id == row.id,
+            NotificationOutbox.status == "pending",
+            NotificationOutbox.attempts == row.attempts,
+        )
+        .update(
+            {
+                "attempts": NotificationOutbox.attempts + 1,
+                "next_attempt_at": now + timedelta(seconds=CLAIM_LEASE_SECONDS),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.session.commit()
+    return claimed == 1
+
+
+def deliver_due(limit: int | None = None) -> int:
+    """Send pending messages whose next attempt is due. Returns the number delivered."""
+    limit = limit or int(current_app.config.get("NOTIFY_BATCH_SIZE", 50))
+    max_attempts = int(current_app.config.get("NOTIFY_MAX_ATTEMPTS", 6))
+
+    now = datetime.utcnow()
+    due = (
+        NotificationOutbox.query
+        .filter(NotificationOutbox.status == "pending", NotificationOutbox.next_attempt_at <= now)
+        .order_by(NotificationOutbox.id.asc())
+        .limit(limit)
+        .all()
+    )
+
+    sent = 0
+    for row in due:
+        if not _claim(row, now):
+            continue  # another worker took it
+        db.session.refresh(row)
+
+        try:
+            send_message(row.chat_id, row.text)
+        except TelegramSendError as e:
+            row.last_error = str(e)
+            if e.permanent or row.attempts >= max_attempts:
+                row.status = "dead"
+                metrics.inc("app_notifications_total", result="dead")
+                logger.warning("Notification %s dead-lettered after %s attempt(s): %s", row.id, row.attempts, e)
+            else:
+                delay = float(e.retry_after) if e.retry_after else _backoff(row.attempts)
+                row.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+                metrics.inc("app_notifications_total", result="retry")
+                logger.info("Notification %s failed (%s), retry in %.0fs", row.id, e, delay)
+        else:
+            row.status = "sent"
+            row.sent_at = datetime.utcnow()
+            row.last_error = None
+            sent += 1
+            metrics.inc("app_notifications_total", result="sent")
+        db.session.commit()
+
+    return sent
+
+
+class OutboxWorker(threading.Thread):
+    """Background thread that drains the notification outbox."""
+
+    def __init__(self, app: Flask):
+        super().__init__(name="notification-outbox", daemon=True)
+        self.app = app
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def run(self) -> None:
+        interval = float(self.app.config.get("NOTIFY_POLL_INTERVAL", 2))
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context(), track_queries("notify-worker"):
+                    while deliver_due():
+                        pass
+            except Exception:
+                logger.exception("Notification outbox delivery failed")
+            self._wake.wait(interval)
+            self._wake.clear()
+
+
+_worker: OutboxWorker | None = None
+
+
+def start_worker(app: Flask) -> OutboxWorker:
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = OutboxWorker(app)
+        _worker.start()
+    return _worker
+
+
+def wake_worker() -> None:
+    """Nudge the in-process worker after a commit that queued messages."""
+    if _worker is not None:
+        _worker.wake()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from flask import Flask, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    """SQL statements executed and time spent in the database by one request (or job)."""
+
+    label: str = ""
+    count: int = 0
+    db_ms: float = 0.0
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(label: str = "") -> Iterator[QueryStats]:
+    """Collect stats for the statements run inside the block (outside of requests)."""
+    token = _current.set(QueryStats(label))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def param_shape(parameters: Any, executemany: bool = False) -> str:
+    """Types of bound parameters without their values, e.g. `(int, str×3)` or `25× (int, str)`."""
+    if executemany and isinstance(parameters, list) and parameters and isinstance(parameters[0], (tuple, list, dict)):
+        return f"{len(parameters)}× {param_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        runs: list[list] = []
+        for v in parameters:
+            name = type(v).__name__
+            if runs and runs[-1][0] == name:
+                runs[-1][1] += 1
+            else:
+                runs.append([name, 1])
+        return "(" + ", ".join(name if n == 1 else f"{name}×{n}" for name, n in runs) + ")"
+    return type(parameters).__name__
+
+
+def install_query_stats(app: Flask, engine: Engine) -> None:
+    """Count statements and DB time per request; Server-Timing header and slow-query log.
+
+    SERVER_TIMING adds `Server-Timing: db;dur=..;desc="q=N", app;dur=..`.
+    SLOW_QUERY_MS > 0 logs statements at or above that duration (text and
+    parameter types, never values). SLOW_REQUEST_QUERIES > 0 logs requests that
+    run at least that many statements, which is how N+1 loops show up.
+    """
+    slow_ms = float(app.config.get("SLOW_QUERY_MS", 0))
+    slow_count = int(app.config.get("SLOW_REQUEST_QUERIES", 0))
+    server_timing = bool(app.config.get("SERVER_TIMING", True))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info["query_stats_t0"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = (time.perf_counter() - conn.info.pop("query_stats_t0", time.perf_counter())) * 1000
+        stats = _current.get()
+        if stats is not None:
+            stats.count += 1
+            stats.db_ms += elapsed
+        if slow_ms and elapsed >= slow_ms:
+            logger.warning(
+                "Slow query %.1fms in %s: %s [params %s]",
+                elapsed,
+                stats.label if stats and stats.label else "-",
+                " ".join(statement.split())[:500],
+                param_shape(parameters, executemany),
+            )
+
+    @app.before_request
+    def _start_query_stats() -> None:
+        g._query_stats_t0 = time.perf_counter()
+        g._query_stats_token = _current.set(QueryStats(request.endpoint or request.path))
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = _current.get()
+        t0 = g.get("_query_stats_t0")
+        if stats is None or t0 is None:
+            return response
+        if server_timing:
+            total_ms = (time.perf_counter() - t0) * 1000
+            response.headers.add(
+                "Server-Timing", f'db;dur={stats.db_ms:.1f};desc="q={stats.count}", app;dur={total_ms:.1f}'
+            )
+        if slow_count and stats.count >= slow_count:
+            logger.warning("%s ran %d statements (db=%.1fms)", stats.label, stats.count, stats.db_ms)
+        return response
+
+    @app.teardown_request
+    def _end_query_stats(_exc) -> None:
+        token = g.pop("_query_stats_token", None)
+        if token is not None:
+            _current.reset(token)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import logging
+from datetime import date
+
+from sqlalchemy import Insert, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..extensions import db
+from ..models import GroupFinanceCategory, GroupFinanceDaily, GroupFinanceItem, GroupPaymentMethod
+from .versions import bump_group_versions
+
+logger = logging.getLogger(__name__)
+
+KEY = ("group_id", "day", "kind", "category_id", "method_id")
+REPORTS = ("monthly", "categories", "methods")
+
+
+def _upsert(stmt: Insert) -> Insert:
+    """Add to an existing rollup row instead of failing on the key."""
+    return stmt.on_conflict_do_update(
+        index_elements=list(KEY),
+        set_={
+            "amount_total": GroupFinanceDaily.amount_total + stmt.excluded.amount_total,
+            "items_count": GroupFinanceDaily.items_count + stmt.excluded.items_count,
+        },
+    )
+
+
+def _item_key(item: GroupFinanceItem) -> dict:
+    return {
+        "group_id": int(item.group_id),
+        "day": item.created_at.date(),
+        "kind": item.kind,
+        "category_id": int(item.category_id or 0),
+        "method_id": int(item.method_id or 0),
+    }
+
+
+def apply_item(item: GroupFinanceItem, sign: int) -> None:
+    """Count a ledger row in (+1) or out of (-1) its daily rollup, in the caller's transaction."""
+    key = _item_key(item)
+    stmt = sqlite_insert(GroupFinanceDaily).values(**key, amount_total=sign * int(item.amount), items_count=sign)
+    db.session.execute(_upsert(stmt))
+    if sign < 0:
+        db.session.execute(
+            db.delete(GroupFinanceDaily).filter_by(**key).where(GroupFinanceDaily.items_count <= 0)
+        )
+
+
+def reassign_rollups(group_id: int, column: str, old_id: int) -> None:
+    """A category or method is deleted and its items set to NULL: merge its rows into the "none" (0) rows."""
+    if column not in ("category_id", "method_id"):
+        raise ValueError(f"Cannot reassign rollups by {column!r}")
+    gid = int(group_id)
+    moved = getattr(GroupFinanceDaily, column)
+    source = db.select(
+        *(literal(0) if name == column else getattr(GroupFinanceDaily, name) for name in KEY),
+        GroupFinanceDaily.amount_total,
+        GroupFinanceDaily.items_count,
+    ).where(GroupFinanceDaily.group_id == gid, moved == int(old_id))
+    db.session.execute(_upsert(sqlite_insert(GroupFinanceDaily).from_select([*KEY, "amount_total", "items_count"], source)))
+    db.session.execute(db.delete(GroupFinanceDaily).where(GroupFinanceDaily.group_id == gid, moved == int(old_id)))
+
+
+def _ledger_select(group_id: int | None = None):
+    """The rollups recomputed from group_finance_items with one GROUP BY scan."""
+    day = db.func.date(GroupFinanceItem.created_at)
+    category = db.func.coalesce(GroupFinanceItem.category_id, 0)
+    method = db.func.coalesce(GroupFinanceItem.method_id, 0)
+    q = db.select(
+        GroupFinanceItem.group_id, day, GroupFinanceItem.kind, category, method,
+        db.func.sum(GroupFinanceItem.amount), db.func.count(GroupFinanceItem.id),
+    )
+    if group_id is not None:
+        q = q.where(GroupFinanceItem.group_id == int(group_id))
+    return q.group_by(GroupFinanceItem.group_id, day, GroupFinanceItem.kind, category, method)
+
+
+def ledger_rollups_insert(group_id: int | None = None) -> Insert:
+    """INSERT ... SELECT filling group_finance_daily from the ledger (seed, rebuild)."""
+    return db.insert(GroupFinanceDaily).from_select([*KEY, "amount_total", "items_count"], _ledger_select(group_id))
+
+
+def rebuild_rollups(group_id: int | None = None) -> int:
+    """Recompute the rollups of one group (or all) from the ledger; returns the rows written."""
+    q = db.delete(GroupFinanceDaily)
+    if group_id is not None:
+        q = q.where(GroupFinanceDaily.group_id == int(group_id))
+    db.session.execute(q)
+    written = db.session.execute(ledger_rollups_insert(group_id)).rowcount
+    bump_group_versions([group_id] if group_id is not None else [
+        gid for (gid,) in db.session.query(GroupFinanceDaily.group_id).distinct()
+    ])
+    db.session.commit()
+    return int(written)
+
+
+def check_rollups(fix: bool = False) -> list[dict]:
+    """Compare every rollup row with a raw scan of the ledger; optionally rebuild mismatching groups."""
+    expected = {
+        (gid, str(day), kind, cat, met): (int(total), int(count))
+        for gid, day, kind, cat, met, total, count in db.session.execute(_ledger_select())
+    }
+    stored = {
+        (r.group_id, r.day.isoformat(), r.kind, r.category_id, r.method_id): (int(r.amount_total), int(r.items_count))
+        for r in GroupFinanceDaily.query.all()
+    }
+
+    mismatches = [
+        {"key": key, "expected": expected.get(key), "actual": stored.get(key)}
+        for key in sorted(set(expected) | set(stored))
+        if expected.get(key) != stored.get(key)
+    ]
+    if fix and mismatches:
+        groups = sorted({m["key"][0] for m in mismatches})
+        for gid in groups:
+            rebuild_rollups(gid)
+        logger.warning("Rebuilt finance rollups of %d group(s)", len(groups))
+    return mismatches
+
+
+def finance_report(group_id: int, by: str, start: date | None = None, end: date | None = None) -> list[dict]:
+    """Income, expense and item count per month, category or method, read from the rollups only."""
+    R = GroupFinanceDaily
+    if by == "monthly":
+        key = db.func.strftime("%Y-%m", R.day)
+    elif by == "categories":
+        key = R.category_id
+    elif by == "methods":
+        key = R.method_id
+    else:
+        raise ValueError(f"Unknown report {by!r}")
+
+    income = db.func.sum(db.case((R.kind == "income", R.amount_total), else_=0))
+    expense = db.func.sum(db.case((R.kind == "income", 0), else_=R.amount_total))
+    q = db.session.query(key, income, expense, db.func.sum(R.items_count)).filter(R.group_id == int(group_id))
+    if start:
+        q = q.filter(R.day >= start)
+    if end:
+        q = q.filter(R.day <= end)
+    rows = q.group_by(key).order_by(key).all()
+
+    names: dict[int, str] = {}
+    if by == "categories":
+        names = dict(db.session.query(GroupFinanceCategory.id, GroupFinanceCategory.name).filter_by(group_id=group_id))
+    elif by == "methods":
+        names = dict(db.session.query(GroupPaymentMethod.id, GroupPaymentMethod.name).filter_by(group_id=group_id))
+
+    items = []
+    for value, inc, exp, count in rows:
+        if by == "monthly":
+            item = {"month": value}
+        else:
+            item = {"id": value or None, "name": names.get(value, "Без категории" if by == "categories" else "Без способа")}
+        item.update({"income": int(inc or 0), "expense": int(exp or 0), "count": int(count or 0)})
+        items.append(item)
+    return items
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import logging
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+def engine_options(config: dict) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS built from the DB_POOL_* settings."""
+    uri: str = config.get("SQLALCHEMY_DATABASE_URI", "")
+    if uri in ("sqlite://", "sqlite:///:memory:"):
+        return {}  # in-memory SQLite uses a single-connection pool
+    return {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+
+
+def sqlite_pragmas(config: dict) -> list[str]:
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size={int(config['SQLITE_CACHE_SIZE'])}",
+        f"PRAGMA temp_store={config['SQLITE_TEMP_STORE']}",
+    ]
+
+
+def install_sqlite_profile(app: Flask, engine: Engine) -> None:
+    """Apply the configured PRAGMAs on every new SQLite connection."""
+    if engine.dialect.name != "sqlite" or not app.config.get("SQLITE_TUNING", True):
+        return
+
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_conn, _record) -> None:
+        cur = dbapi_conn.cursor()
+        try:
+            for pragma in pragmas:
+                cur.execute(pragma)
+        finally:
+            cur.close()
+
+    logger.info("SQLite profile: %s", "; ".join(pragmas))
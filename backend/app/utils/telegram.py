@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import hashlib
 import hmac
 import json
@@ -9,6 +10,8 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
+from .cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,6 +21,20 @@ class TelegramInitData:
     auth_date: int
 
 
+# initData strings that already passed validation, keyed by (bot_token, init_data).
+# Failed validations are never cached, so tampered data always goes through the HMAC check.
+_validated = TTLCache(maxsize=4096, ttl=3600)
+
+
+@functools.lru_cache(maxsize=8)
+def _secret_key(bot_token: str) -> bytes:
+    return hmac.new(
+        key=b"WebAppData",
+        msg=bot_token.encode("utf-8"),
+        digestmod=hashlib.sha256,
+    ).digest()
+
+
 def validate_init_data(init_data: str, bot_token: str, max_age_seconds: int = 86400) -> Optional[TelegramInitData]:
     """Validate Telegram WebApp initData signature.
 
@@ -29,6 +46,23 @@ def validate_init_data(init_data: str, bot_token: str, max_age_seconds: int = 86
         logger.error("BOT_TOKEN is empty; cannot validate initData")
         return None
 
+    now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+
+    cached = _validated.get((bot_token, init_data))
+    if cached is not None:
+        if now_ts - cached.auth_date > max_age_seconds:
+            logger.warning("initData expired: now=%s auth_date=%s", now_ts, cached.auth_date)
+            return None
+        return cached
+
+    result = _validate_uncached(init_data, bot_token, max_age_seconds, now_ts)
+    if result is not None:
+        # never keep an entry past the moment the data itself expires
+        _validated.set((bot_token, init_data), result, ttl=min(_validated.ttl, result.auth_date + max_age_seconds - now_ts))
+    return result
+
+
+def _validate_uncached(init_data: str, bot_token: str, max_age_seconds: int, now_ts: int) -> Optional[TelegramInitData]:
     parsed = urllib.parse.parse_qs(init_data, strict_parsing=True)
     if "hash" not in parsed:
         return None
@@ -42,26 +76,19 @@ def validate_init_data(init_data: str, bot_token: str, max_age_seconds: int = 86
     except ValueError:
         return None
 
-    now_ts = int(datetime.now(tz=timezone.utc).timestamp())
     if now_ts - auth_date > max_age_seconds:
         logger.warning("initData expired: now=%s auth_date=%s", now_ts, auth_date)
         return None
 
     data_check_string = "\n".join(f"{k}={v[0]}" for k, v in sorted(parsed.items()))
 
-    secret_key = hmac.new(
-        key=b"WebAppData",
-        msg=bot_token.encode("utf-8"),
-        digestmod=hashlib.sha256,
-    ).digest()
-
     calculated_hash = hmac.new(
-        key=secret_key,
+        key=_secret_key(bot_token),
         msg=data_check_string.encode("utf-8"),
         digestmod=hashlib.sha256,
     ).hexdigest()
 
-    if calculated_hash != hash_received:
+    if not hmac.compare_digest(calculated_hash, hash_received):
         logger.warning("initData hash mismatch")
         return None
 
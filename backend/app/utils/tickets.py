@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+
+# Event stream tickets: EventSource cannot send an Authorization header, so the
+# stream URL carries a ticket instead of the JWT. A ticket opens the event stream
+# of one group for EVENTS_TICKET_TTL seconds and is useless anywhere else
+# (it is not a JWT, so jwt_required never accepts it).
+def _serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(current_app.config["JWT_SECRET_KEY"], salt="events-ticket")
+
+
+def issue_events_ticket(user_id: int, group_id: int, expires_at: float | None) -> str:
+    """Ticket for the group's event stream; the stream ends at `expires_at` (the JWT's expiry)."""
+    return _serializer().dumps({"uid": int(user_id), "gid": int(group_id), "exp": expires_at})
+
+
+def read_events_ticket(ticket: str, group_id: int) -> tuple[int, float | None] | None:
+    """(user id, stream expiry) of a valid, unexpired ticket for this group; None otherwise."""
+    try:
+        data = _serializer().loads(ticket, max_age=int(current_app.config.get("EVENTS_TICKET_TTL", 60)))
+    except BadSignature:  # SignatureExpired is a BadSignature
+        return None
+    if not isinstance(data, dict) or data.get("gid") != int(group_id):
+        return None
+    return int(data["uid"]), data.get("exp")
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Iterable
+
+from flask import Response, request
+
+from ..extensions import db
+from ..models import Group, GroupMember
+
+
+def bump_group_versions(group_ids: Iterable[int]) -> None:
+    """Mark groups' lists as changed, in the caller's transaction (the caller commits)."""
+    ids = sorted({int(x) for x in group_ids})
+    if ids:
+        # SQL-side increment: concurrent writers never hand out the same version twice
+        db.session.execute(db.update(Group).where(Group.id.in_(ids)).values(version=Group.version + 1))
+
+
+def bump_group_version(group_id: int) -> None:
+    bump_group_versions([group_id])
+
+
+def bump_user_groups(user_id: int) -> None:
+    """Every group showing this user (names in task and member lists)."""
+    my_group_ids = db.session.query(GroupMember.group_id).filter(GroupMember.user_id == int(user_id))
+    db.session.execute(db.update(Group).where(Group.id.in_(my_group_ids)).values(version=Group.version + 1))
+
+
+def group_etag(group_id: int) -> str:
+    version = db.session.query(Group.version).filter(Group.id == int(group_id)).scalar()
+    return f"g{int(group_id)}.v{int(version or 0)}"
+
+
+def user_groups_etag(user_id: int) -> str:
+    """ETag of a list spanning all of the user's groups.
+
+    Changes with any of their group versions, a joined or left group, or a
+    permission change; one indexed read of group_members joined to groups.
+    """
+    uid = int(user_id)
+    rows = (
+        db.session.query(Group.id, Group.version, GroupMember.can_tasks, GroupMember.can_finance)
+        .join(GroupMember, GroupMember.group_id == Group.id)
+        .filter(GroupMember.user_id == uid)
+        .order_by(Group.id.asc())
+        .all()
+    )
+    digest = hashlib.blake2b(repr([tuple(r) for r in rows]).encode(), digest_size=8).hexdigest()
+    return f"u{uid}.{digest}"
+
+
+def not_modified(etag: str) -> Response | None:
+    """304 for a GET whose If-None-Match already has `etag`, else None.
+
+    Read the etag before the items: a write landing in between then only makes
+    the next request refetch, never serves stale data under a new etag.
+    """
+    if request.method == "GET" and request.if_none_match.contains_weak(etag):
+        return with_etag(Response(status=304), etag)
+    return None
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    response.set_etag(etag, weak=True)
+    # always revalidate; a 304 costs one indexed read of groups.version
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
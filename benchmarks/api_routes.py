@@ -0,0 +1,352 @@
+"""Latency, query count and peak memory for every api/web route.
+
+Seeds a fresh database with benchmarks.seed (or reuses --db), then drives each
+route through the Flask test client as randomly picked group members. Writes
+JSON (p50/p95/p99 latency, queries per request, peak traced memory) to stdout
+or --out, and a readable summary to stderr:
+
+    python -m benchmarks.api_routes --out before.json
+    python -m benchmarks.api_routes --out after.json --baseline before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+
+from benchmarks.seed import Scale, seed
+
+
+@dataclass
+class Actor:
+    user_id: int
+    tg_id: int
+    username: str
+    group_id: int  # a shared group the actor belongs to
+    own_group_id: int  # personal group (the actor is its owner)
+    headers: dict | None = None
+
+
+@dataclass
+class Endpoint:
+    label: str
+    # returns (method, path, request kwargs); runs untimed, may prepare data
+    build: Callable[["Context", Actor], tuple[str, str, dict]]
+
+
+class Context:
+    def __init__(self, app, client, rng: random.Random, actors: list[Actor], task_ids: dict[int, list[int]]):
+        self.app = app
+        self.client = client
+        self.rng = rng
+        self.actors = actors
+        self.task_ids = task_ids
+        self.bot = {"X-Bot-Api-Key": os.environ["BOT_API_KEY"]}
+        self.seq = 0
+
+    def next(self) -> int:
+        self.seq += 1
+        return self.seq
+
+    def pending_invite(self, actor: Actor) -> int:
+        """Insert a pending username invite for `actor` into another shared group."""
+        from backend.app.extensions import db
+        from backend.app.models import GroupUsernameInvite
+
+        other = self.rng.choice([a for a in self.actors if a.group_id != actor.group_id] or self.actors)
+        with self.app.app_context():
+            inv = GroupUsernameInvite(
+                group_id=other.group_id, created_by_id=other.user_id, target_username=actor.username, status="pending",
+            )
+            db.session.add(inv)
+            db.session.commit()
+            return inv.id
+
+    def create(self, actor: Actor, path: str, payload: dict) -> int:
+        return self.client.post(path, json=payload, headers=actor.headers).get_json()["id"]
+
+
+def endpoints() -> list[Endpoint]:
+    def get(path: str) -> Callable:
+        return lambda ctx, a: ("GET", path.format(gid=a.group_id, own=a.own_group_id, q=a.username[:5]), {"headers": a.headers})
+
+    def task_id(ctx: Context, a: Actor) -> int:
+        return ctx.rng.choice(ctx.task_ids[a.group_id])
+
+    return [
+        Endpoint("GET /", lambda ctx, a: ("GET", "/", {})),
+        Endpoint("GET /health", lambda ctx, a: ("GET", "/health", {})),
+        Endpoint("GET /metrics", lambda ctx, a: ("GET", "/metrics", {})),
+        Endpoint("POST /api/auth/telegram", lambda ctx, a: ("POST", "/api/auth/telegram", {"json": {
+            "initData": "-", "debugUser": {"id": a.tg_id, "username": a.username, "first_name": "Bench"}}})),
+        Endpoint("GET /api/me", get("/api/me")),
+        Endpoint("GET /api/users", get("/api/users?q={q}")),
+        Endpoint("GET /api/users?match=contains", get("/api/users?q={q}&match=contains")),
+        Endpoint("GET /api/users?scope=all", get("/api/users?q={q}&scope=all")),
+        Endpoint("GET /api/settings/notifications", get("/api/settings/notifications")),
+        Endpoint("PATCH /api/settings/notifications", lambda ctx, a: ("PATCH", "/api/settings/notifications", {
+            "headers": a.headers, "json": {"notify_new_task": True, "notify_task_updates": ctx.rng.random() < 0.5}})),
+        Endpoint("POST /api/bot/start", lambda ctx, a: ("POST", "/api/bot/start", {"headers": ctx.bot, "json": {
+            "tg_id": a.tg_id, "username": a.username, "first_name": "Bench", "include_invites": True}})),
+        Endpoint("POST /api/bot/invites/pending", lambda ctx, a: ("POST", "/api/bot/invites/pending", {
+            "headers": ctx.bot, "json": {"tg_id": a.tg_id, "username": a.username}})),
+        Endpoint("POST /api/bot/invites/<id>/accept", lambda ctx, a: (
+            "POST", f"/api/bot/invites/{ctx.pending_invite(a)}/accept", {"headers": ctx.bot, "json": {"tg_id": a.tg_id}})),
+        Endpoint("POST /api/bot/invites/<id>/decline", lambda ctx, a: (
+            "POST", f"/api/bot/invites/{ctx.pending_invite(a)}/decline", {"headers": ctx.bot, "json": {"tg_id": a.tg_id}})),
+        Endpoint("GET /api/groups", get("/api/groups")),
+        Endpoint("POST /api/groups", lambda ctx, a: ("POST", "/api/groups", {
+            "headers": a.headers, "json": {"name": f"Bench {ctx.next()}"}})),
+        Endpoint("POST /api/groups/<gid>/invites/username", lambda ctx, a: (
+            "POST", f"/api/groups/{a.own_group_id}/invites/username", {"headers": a.headers, "json": {"username": f"newbie{ctx.next()}"}})),
+        Endpoint("GET /api/groups/<gid>/members", get("/api/groups/{gid}/members")),
+        Endpoint("GET /api/groups/<gid>/tasks", get("/api/groups/{gid}/tasks")),
+        Endpoint("GET /api/groups/<gid>/tasks?filters", get("/api/groups/{gid}/tasks?done=0&status=new,in_progress&limit=50")),
+        Endpoint("POST /api/groups/<gid>/tasks", lambda ctx, a: ("POST", f"/api/groups/{a.group_id}/tasks", {
+            "headers": a.headers,
+            "json": {"title": f"Bench {ctx.next()}", "responsible_id": a.user_id, "assignee_ids": [
+                b.user_id for b in ctx.actors if b.group_id == a.group_id and b.user_id != a.user_id][:2]}})),
+        Endpoint("GET /api/me/tasks", get("/api/me/tasks")),
+        Endpoint("GET /api/me/tasks?filters", get(
+            f"/api/me/tasks?done=0&deadline_from={date.today()}&deadline_to={date.today() + timedelta(days=30)}&limit=50")),
+        Endpoint("GET /api/tasks/<tid>", lambda ctx, a: ("GET", f"/api/tasks/{task_id(ctx, a)}", {"headers": a.headers})),
+        Endpoint("PATCH /api/tasks/<tid>", lambda ctx, a: ("PATCH", f"/api/tasks/{task_id(ctx, a)}", {
+            "headers": a.headers, "json": {"status": ctx.rng.choice(["new", "in_progress", "postponed"])}})),
+        Endpoint("GET /api/finance", get("/api/finance")),
+        Endpoint("POST /api/finance", lambda ctx, a: ("POST", "/api/finance", {
+            "headers": a.headers, "json": {"title": "Bench", "amount": ctx.rng.randint(1, 1000)}})),
+        Endpoint("GET /api/balance", get("/api/balance")),
+        Endpoint("GET /api/groups/<gid>/finance", get("/api/groups/{gid}/finance")),
+        Endpoint("POST /api/groups/<gid>/finance", lambda ctx, a: ("POST", f"/api/groups/{a.group_id}/finance", {
+            "headers": a.headers, "json": {"kind": ctx.rng.choice(["income", "expense"]), "amount": ctx.rng.randint(100, 10_000)}})),
+        Endpoint("GET /api/groups/<gid>/finance/balance", get("/api/groups/{gid}/finance/balance")),
+        Endpoint("GET /api/groups/<gid>/finance/categories", get("/api/groups/{gid}/finance/categories")),
+        Endpoint("POST /api/groups/<gid>/finance/categories", lambda ctx, a: (
+            "POST", f"/api/groups/{a.group_id}/finance/categories", {"headers": a.headers, "json": {"name": f"Bench {ctx.next()}"}})),
+        Endpoint("DELETE /api/groups/<gid>/finance/categories", lambda ctx, a: (
+            "DELETE", f"/api/groups/{a.group_id}/finance/categories", {"headers": a.headers, "json": {
+                "id": ctx.create(a, f"/api/groups/{a.group_id}/finance/categories", {"name": f"Tmp {ctx.next()}"})}})),
+        Endpoint("GET /api/groups/<gid>/finance/methods", get("/api/groups/{gid}/finance/methods")),
+        Endpoint("POST /api/groups/<gid>/finance/methods", lambda ctx, a: (
+            "POST", f"/api/groups/{a.group_id}/finance/methods", {"headers": a.headers, "json": {"name": f"Bench {ctx.next()}"}})),
+        Endpoint("DELETE /api/groups/<gid>/finance/methods", lambda ctx, a: (
+            "DELETE", f"/api/groups/{a.group_id}/finance/methods", {"headers": a.headers, "json": {
+                "id": ctx.create(a, f"/api/groups/{a.group_id}/finance/methods", {"name": f"Tmp {ctx.next()}"})}})),
+        Endpoint("GET /api/groups/<gid>/finance/reports/monthly", get("/api/groups/{gid}/finance/reports/monthly")),
+        Endpoint("GET /api/groups/<gid>/finance/reports/monthly (90 days)", get(
+            f"/api/groups/{{gid}}/finance/reports/monthly?from={date.today() - timedelta(days=90)}&to={date.today()}")),
+        Endpoint("GET /api/groups/<gid>/finance/reports/categories", get("/api/groups/{gid}/finance/reports/categories")),
+        Endpoint("GET /api/groups/<gid>/finance/reports/categories (90 days)", get(
+            f"/api/groups/{{gid}}/finance/reports/categories?from={date.today() - timedelta(days=90)}&to={date.today()}")),
+        Endpoint("GET /api/groups/<gid>/finance/reports/methods", get("/api/groups/{gid}/finance/reports/methods")),
+        Endpoint("GET /api/groups/<gid>/finance/reports/methods (90 days)", get(
+            f"/api/groups/{{gid}}/finance/reports/methods?from={date.today() - timedelta(days=90)}&to={date.today()}")),
+        Endpoint("GET /api/groups/<gid>/changes", get("/api/groups/{gid}/changes?since=0&limit=100")),
+        Endpoint("GET /api/calendar (year)", get(
+            f"/api/calendar?from={date.today() - timedelta(days=365)}&to={date.today() + timedelta(days=30)}")),
+    ]
+
+
+def pick_actors(app, client, rng: random.Random, n: int) -> tuple[list[Actor], dict[int, list[int]]]:
+    from backend.app.extensions import db
+
+    with app.app_context():
+        rows = db.session.execute(db.text(
+            "SELECT u.id, u.tg_id, u.username, gm.group_id, u.default_group_id FROM group_members gm "
+            "JOIN users u ON u.id = gm.user_id "
+            "WHERE gm.group_id != u.default_group_id AND u.username IS NOT NULL ORDER BY gm.id"
+        )).all()
+        actors = [Actor(*r) for r in rng.sample(rows, min(n, len(rows)))]
+        task_ids = {}
+        for gid in {a.group_id for a in actors}:
+            task_ids[gid] = db.session.execute(
+                db.text("SELECT id FROM tasks WHERE group_id = :g ORDER BY id DESC LIMIT 200"), {"g": gid}
+            ).scalars().all()
+    if not actors or not all(task_ids.values()):
+        raise SystemExit("The database needs shared groups with tasks (see benchmarks.seed)")
+
+    for a in actors:
+        r = client.post("/api/auth/telegram", json={
+            "initData": "-", "debugUser": {"id": a.tg_id, "username": a.username, "first_name": "Bench"}})
+        a.headers = {"Authorization": f"Bearer {r.get_json()['access_token']}"}
+    return actors, task_ids
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))]
+
+
+def run_endpoint(ctx: Context, ep: Endpoint, queries: list[int], iterations: int, warmup: int, memory_iterations: int) -> dict:
+    latencies: list[float] = []
+    counts: list[int] = []
+    statuses: Counter = Counter()
+
+    def once(measure: bool) -> None:
+        method, path, kwargs = ep.build(ctx, ctx.rng.choice(ctx.actors))
+        before = queries[0]
+        t0 = time.perf_counter()
+        resp = ctx.client.open(path, method=method, **kwargs)
+        elapsed = (time.perf_counter() - t0) * 1000
+        if measure:
+            latencies.append(elapsed)
+            counts.append(queries[0] - before)
+            statuses[str(resp.status_code)] += 1
+
+    for _ in range(warmup):
+        once(False)
+    for _ in range(iterations):
+        once(True)
+
+    # separate pass: tracemalloc slows requests down several times
+    peak = 0
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            method, path, kwargs = ep.build(ctx, ctx.rng.choice(ctx.actors))
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            ctx.client.open(path, method=method, **kwargs)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "n": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "max_ms": round(max(latencies), 3),
+        "queries_p50": statistics.median(counts),
+        "queries_max": max(counts),
+        "peak_mem_kib": round(peak / 1024, 1),
+        "status": dict(statuses),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(result: dict, baseline: dict) -> None:
+    print(f"\n{'endpoint':<48} {'p95 before':>11} {'p95 after':>10} {'ratio':>6} {'queries':>9}", file=sys.stderr)
+    for label, new in result["endpoints"].items():
+        old = baseline.get("endpoints", {}).get(label)
+        if not old:
+            continue
+        ratio = new["p95_ms"] / old["p95_ms"] if old["p95_ms"] else float("inf")
+        flag = "  slower" if ratio > 1.2 else ("  faster" if ratio < 0.8 else "")
+        print(
+            f"{label:<48} {old['p95_ms']:>9.2f}ms {new['p95_ms']:>8.2f}ms {ratio:>6.2f} "
+            f"{old['queries_p50']:>4g}->{new['queries_p50']:<4g}{flag}",
+            file=sys.stderr,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="existing seeded SQLite file (default: seed a temporary one)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=50, help="timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--memory-iterations", type=int, default=5)
+    parser.add_argument("--actors", type=int, default=20, help="group members the requests are spread over")
+    parser.add_argument("--only", help="run endpoints whose label contains this text")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON result to compare p95 and query counts with")
+    for field, default in asdict(Scale()).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=default)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench-routes-")
+    path = os.path.abspath(args.db) if args.db else os.path.join(tmp, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["LOG_DIR"] = tmp
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["TELEGRAM_VALIDATE"] = "0"
+    os.environ["BOT_TOKEN"] = ""
+    os.environ["BOT_API_KEY"] = "bench-key"
+    os.environ["NOTIFY_WORKER"] = "off"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-" + "x" * 32)
+
+    from sqlalchemy import event
+
+    from backend.app import create_app
+    from backend.app.extensions import db
+
+    app = create_app()
+    scale = Scale(**{f: getattr(args, f) for f in asdict(Scale())})
+    if not args.db:
+        started = time.perf_counter()
+        seed(app, scale, seed=args.seed)
+        print(f"Seeded {path} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    rng = random.Random(args.seed)
+    client = app.test_client()
+    actors, task_ids = pick_actors(app, client, rng, args.actors)
+    ctx = Context(app, client, rng, actors, task_ids)
+
+    queries = [0]
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", lambda *a: queries.__setitem__(0, queries[0] + 1))
+        table_counts = {
+            t: db.session.execute(db.text(f'SELECT COUNT(*) FROM "{t}"')).scalar()
+            for t in ("users", "groups", "group_members", "tasks", "task_assignees", "group_finance_items", "group_username_invites")
+        }
+
+    results = {}
+    for ep in endpoints():
+        if args.only and args.only not in ep.label:
+            continue
+        r = run_endpoint(ctx, ep, queries, args.iterations, args.warmup, args.memory_iterations)
+        results[ep.label] = r
+        print(
+            f"{ep.label:<48} p50={r['p50_ms']:7.2f}ms p95={r['p95_ms']:7.2f}ms p99={r['p99_ms']:7.2f}ms "
+            f"q={r['queries_p50']:g}/{r['queries_max']} mem={r['peak_mem_kib']:.0f}KiB status={r['status']}",
+            file=sys.stderr,
+        )
+
+    output = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "rows": table_counts,
+        },
+        "endpoints": results,
+    }
+    text = json.dumps(output, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(output, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
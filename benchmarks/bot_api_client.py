@@ -0,0 +1,85 @@
+"""Messages/second: per-call urlopen vs the pooled keep-alive BotApiClient.
+
+Runs against a local stand-in Bot API server, so no real token is needed:
+
+    python -m benchmarks.bot_api_client --messages 2000 --threads 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+
+from backend.app.utils.bot_api import BotApiClient
+
+
+class _StandInBotApi(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like api.telegram.org
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = json.dumps({"ok": True, "result": {"message_id": 1}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server() -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInBotApi)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def send_urlopen(base_url: str, chat_id: int) -> None:
+    # the previous _tg_send_message: new Request + new connection per message
+    req = Request(
+        url=f"{base_url}/botTOKEN/sendMessage",
+        data=json.dumps({"chat_id": chat_id, "text": "bench"}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urlopen(req, timeout=10) as resp:
+        resp.read()
+
+
+def run(label: str, fn, messages: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(fn, range(messages)))
+    elapsed = time.perf_counter() - start
+    rate = messages / elapsed
+    print(f"{label:<10} {messages} msgs in {elapsed:.2f}s -> {rate:,.0f} msg/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    server, base_url = start_server()
+    client = BotApiClient(base_url, "TOKEN", pool_size=args.threads)
+    try:
+        before = run("urlopen", lambda i: send_urlopen(base_url, i), args.messages, args.threads)
+        after = run("pooled", lambda i: client.send_message(i, "bench"), args.messages, args.threads)
+        print(f"speedup    x{after / before:.2f}")
+    finally:
+        client.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
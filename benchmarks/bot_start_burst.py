@@ -0,0 +1,117 @@
+"""Burst of simulated /start updates against a local backend.
+
+Each simulated /start does what cmd_start does on the backend side.
+Compares the bot's shared session (one /api/bot/start call that also
+returns pending invites) with the previous pattern of a new ClientSession
+per call for /api/bot/start + /api/bot/invites/pending:
+
+    python -m benchmarks.bot_start_burst --users 300 --concurrency 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+_tmp = tempfile.mkdtemp(prefix="bench-bot-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+os.environ.setdefault("LOG_DIR", _tmp)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["BOT_TOKEN"] = "123456:BENCHMARK"
+os.environ["WEBAPP_URL"] = "https://example.invalid"
+os.environ["BOT_API_KEY"] = "bench-key"
+os.environ["NOTIFY_WORKER"] = "off"
+
+import aiohttp  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+
+from backend.app import create_app  # noqa: E402
+
+
+def start_backend() -> tuple[object, str]:
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+async def start_fresh_sessions(backend_url: str, user) -> None:
+    # previous bot.py behaviour: a new ClientSession (and connector) per call
+    headers = {"X-Bot-Api-Key": os.environ["BOT_API_KEY"]}
+    for path, payload in (
+        ("/api/bot/start", {"tg_id": user.id, "username": user.username, "first_name": user.first_name}),
+        ("/api/bot/invites/pending", {"tg_id": user.id, "username": user.username}),
+    ):
+        async with aiohttp.ClientSession() as session:
+            async with session.post(backend_url + path, json=payload, headers=headers, ssl=False) as resp:
+                await resp.read()
+
+
+async def start_shared_session(bot_module, user) -> None:
+    # same as cmd_start: invites come back with /api/bot/start
+    data = await bot_module.backend_start_session(user)
+    if data.get("invites") is None:
+        await bot_module.backend_get_pending_invites(user)
+
+
+async def burst(label: str, fn, users: list, concurrency: int) -> None:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(u) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            await fn(u)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(u) for u in users))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<8} {len(users)} /start in {elapsed:.2f}s -> {len(users) / elapsed:,.0f}/s "
+        f"p50={statistics.median(latencies):.1f}ms p95={p95:.1f}ms"
+    )
+
+
+async def amain(args: argparse.Namespace) -> None:
+    server, backend_url = start_backend()
+    os.environ["BACKEND_URL"] = backend_url
+
+    from bot import bot as bot_module
+
+    def users(offset: int) -> list:
+        return [
+            SimpleNamespace(id=offset + i, username=f"bench{offset + i}", first_name="Bench")
+            for i in range(args.users)
+        ]
+
+    try:
+        # warm-up run creates the users, so both measured runs take the same (read-mostly) path
+        await burst("warmup", lambda u: start_shared_session(bot_module, u), users(1_000_000), args.concurrency)
+        await burst("fresh", lambda u: start_fresh_sessions(backend_url, u), users(1_000_000), args.concurrency)
+        await burst("shared", lambda u: start_shared_session(bot_module, u), users(1_000_000), args.concurrency)
+    finally:
+        await bot_module.close_backend_session()
+        await bot_module.bot.session.close()
+        server.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(amain(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Group finance reports from daily rollups vs raw ledger scans: equivalence and latency.
+
+Seeds a database, then mixes ledger writes (new items through the API, item
+updates and deletes through the finance helpers, category and method deletions
+that set items to NULL) and checks afterwards that group_finance_daily equals
+a raw GROUP BY of group_finance_items. Every report (monthly, categories,
+methods) is then compared over random ranges with the same report computed
+straight from the ledger, timing both. Exits with code 1 on any difference:
+
+    python -m benchmarks.finance_reports --finance-rows 200000 --writes 500
+    python -m benchmarks.finance_reports --finance-rows 1000000 --shared-groups 10 --groups 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+_tmp = tempfile.mkdtemp(prefix="bench-reports-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/bench.db"
+os.environ["LOG_DIR"] = _tmp
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["TELEGRAM_VALIDATE"] = "0"
+os.environ["BOT_TOKEN"] = ""
+os.environ["NOTIFY_WORKER"] = "off"
+os.environ.setdefault("JWT_SECRET_KEY", "bench-" + "x" * 32)
+
+from backend.app import create_app  # noqa: E402
+from backend.app.extensions import db  # noqa: E402
+from backend.app.models import (  # noqa: E402
+    GroupFinanceCategory,
+    GroupFinanceItem,
+    GroupMember,
+    GroupPaymentMethod,
+)
+from backend.app.utils.finance import check_group_balances, delete_group_finance_item, update_group_finance_item  # noqa: E402
+from backend.app.utils.rollups import REPORTS, check_rollups, finance_report  # noqa: E402
+from benchmarks.seed import Scale, seed  # noqa: E402
+
+
+def raw_report(group_id: int, by: str, start: date | None, end: date | None) -> list[tuple]:
+    """The report straight from group_finance_items (what the rollups replace)."""
+    I = GroupFinanceItem
+    key = {
+        "monthly": db.func.strftime("%Y-%m", I.created_at),
+        "categories": db.func.coalesce(I.category_id, 0),
+        "methods": db.func.coalesce(I.method_id, 0),
+    }[by]
+    income = db.func.sum(db.case((I.kind == "income", I.amount), else_=0))
+    expense = db.func.sum(db.case((I.kind == "income", 0), else_=I.amount))
+    q = db.session.query(key, income, expense, db.func.count(I.id)).filter(I.group_id == group_id)
+    if start:
+        q = q.filter(db.func.date(I.created_at) >= start.isoformat())
+    if end:
+        q = q.filter(db.func.date(I.created_at) <= end.isoformat())
+    return [(k, int(a), int(b), int(c)) for k, a, b, c in q.group_by(key).order_by(key).all()]
+
+
+def as_rows(by: str, items: list[dict]) -> list[tuple]:
+    return [(i["month"] if by == "monthly" else (i["id"] or 0), i["income"], i["expense"], i["count"]) for i in items]
+
+
+def pct(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else float("nan")
+
+
+def write_mix(app, client, rng: random.Random, groups: list[int], tokens: dict[int, dict], writes: int) -> dict[str, int]:
+    done = {"insert": 0, "update": 0, "delete": 0, "category_delete": 0, "method_delete": 0}
+    for _ in range(writes):
+        gid = rng.choice(groups)
+        headers = tokens[gid]
+        roll = rng.random()
+        with app.app_context():
+            categories = [c for (c,) in db.session.query(GroupFinanceCategory.id).filter_by(group_id=gid)]
+            methods = [m for (m,) in db.session.query(GroupPaymentMethod.id).filter_by(group_id=gid)]
+        if roll < 0.75:
+            client.post(f"/api/groups/{gid}/finance", headers=headers, json={
+                "kind": rng.choice(["income", "expense"]),
+                "amount": rng.randint(100, 100_000),
+                "category_id": rng.choice(categories) if categories and rng.random() < 0.9 else None,
+                "method_id": rng.choice(methods) if methods and rng.random() < 0.9 else None,
+            })
+            done["insert"] += 1
+        elif roll < 0.95:
+            with app.app_context():
+                item = (
+                    GroupFinanceItem.query.filter_by(group_id=gid)
+                    .order_by(GroupFinanceItem.id.desc())
+                    .offset(rng.randrange(50))
+                    .first()
+                )
+                if item is None:
+                    continue
+                if roll < 0.85:
+                    update_group_finance_item(item, rng.choice(["income", "expense"]), rng.randint(100, 100_000))
+                    done["update"] += 1
+                else:
+                    delete_group_finance_item(item)
+                    done["delete"] += 1
+                db.session.commit()
+        elif roll < 0.975 and len(categories) > 1:
+            client.delete(f"/api/groups/{gid}/finance/categories", headers=headers, json={"id": rng.choice(categories)})
+            done["category_delete"] += 1
+        elif len(methods) > 1:
+            client.delete(f"/api/groups/{gid}/finance/methods", headers=headers, json={"id": rng.choice(methods)})
+            done["method_delete"] += 1
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--finance-rows", type=int, default=200_000)
+    parser.add_argument("--shared-groups", type=int, default=Scale().groups, help="shared groups the ledger is spread over")
+    parser.add_argument("--groups", type=int, default=20, help="busiest shared groups the writes and reports use")
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--ranges", type=int, default=30, help="random date ranges per report and group")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from flask_jwt_extended import create_access_token
+
+    rng = random.Random(args.seed)
+    app = create_app()
+    client = app.test_client()
+    seed(app, Scale(groups=args.shared_groups, finance_rows=args.finance_rows), seed=args.seed)
+
+    with app.app_context():
+        groups = [
+            gid for gid, _ in
+            db.session.query(GroupFinanceItem.group_id, db.func.count(GroupFinanceItem.id))
+            .group_by(GroupFinanceItem.group_id)
+            .order_by(db.func.count(GroupFinanceItem.id).desc())
+            .limit(args.groups)
+        ]
+        tokens = {}
+        for gid in groups:
+            uid = db.session.query(GroupMember.user_id).filter_by(group_id=gid, can_finance=True).first()[0]
+            tokens[gid] = {"Authorization": f"Bearer {create_access_token(identity=str(uid))}"}
+        ledger_rows = db.session.query(db.func.count(GroupFinanceItem.id)).scalar()
+
+    started = time.perf_counter()
+    done = write_mix(app, client, rng, groups, tokens, args.writes)
+    print(f"{sum(done.values())} writes in {time.perf_counter() - started:.1f}s: "
+          + ", ".join(f"{k}={v}" for k, v in done.items()))
+
+    failures = 0
+    with app.app_context():
+        mismatches = check_rollups()
+        balances = check_group_balances()
+    print(f"rollups vs raw ledger scan: {len(mismatches)} mismatching row(s); balances: {len(balances)} mismatch(es)")
+    failures += len(mismatches) + len(balances)
+
+    today = date.today()
+    timings: dict[str, dict[str, list[float]]] = {by: {"rollup": [], "raw": [], "endpoint": []} for by in REPORTS}
+    for by in REPORTS:
+        for gid in groups:
+            for n in range(args.ranges):
+                if n == 0:
+                    start = end = None
+                else:
+                    start = today - timedelta(days=rng.randrange(400))
+                    end = start + timedelta(days=rng.randrange(1, 200))
+                with app.app_context():
+                    t0 = time.perf_counter()
+                    fast = as_rows(by, finance_report(gid, by, start, end))
+                    t1 = time.perf_counter()
+                    slow = raw_report(gid, by, start, end)
+                    t2 = time.perf_counter()
+                timings[by]["rollup"].append((t1 - t0) * 1000)
+                timings[by]["raw"].append((t2 - t1) * 1000)
+
+                qs = "&".join(f"{k}={v.isoformat()}" for k, v in (("from", start), ("to", end)) if v)
+                t3 = time.perf_counter()
+                r = client.get(f"/api/groups/{gid}/finance/reports/{by}?{qs}", headers=tokens[gid])
+                timings[by]["endpoint"].append((time.perf_counter() - t3) * 1000)
+                served = as_rows(by, r.get_json()["items"])
+
+                if fast != slow or served != slow:
+                    failures += 1
+                    if failures <= 5:
+                        print(f"MISMATCH {by} group={gid} {start}..{end}:\n  rollup={fast}\n  api={served}\n  raw={slow}")
+
+    print(f"\n{ledger_rows:,} ledger rows; {len(groups)} groups x {args.ranges} ranges per report")
+    print(f"{'report':<12} {'rollup p50':>11} {'p95':>8} {'raw p50':>9} {'p95':>8} {'endpoint p50':>13} {'p95':>8}  (ms)")
+    for by in REPORTS:
+        t = timings[by]
+        print(f"{by:<12} {pct(t['rollup'], 50):>11.2f} {pct(t['rollup'], 95):>8.2f} "
+              f"{pct(t['raw'], 50):>9.2f} {pct(t['raw'], 95):>8.2f} "
+              f"{pct(t['endpoint'], 50):>13.2f} {pct(t['endpoint'], 95):>8.2f}")
+
+    if failures:
+        print(f"\n{failures} difference(s) between rollups and the raw ledger.")
+        sys.exit(1)
+    print("\nRollups and every report match the raw ledger.")
+
+
+if __name__ == "__main__":
+    main()
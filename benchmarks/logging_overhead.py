@@ -0,0 +1,117 @@
+"""Request throughput with logging off, inline, queued, JSON and sampled.
+
+Each mode runs in its own process (logging is configured from the environment
+at import) against a small seeded database. Worker threads rotate through
+GET /api/me, /api/groups and /api/groups/<gid>/tasks via the test client.
+stderr of the child goes to /dev/null, the log file to a temp directory:
+
+    python -m benchmarks.logging_overhead --threads 4 --requests 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+MODES = {
+    "off": {"LOG_LEVEL": "WARNING"},
+    "inline": {"LOG_LEVEL": "INFO", "LOG_QUEUE": "0"},
+    "queue": {"LOG_LEVEL": "INFO", "LOG_QUEUE": "1"},
+    "queue+json": {"LOG_LEVEL": "INFO", "LOG_QUEUE": "1", "LOG_FORMAT": "json"},
+    "sampled": {"LOG_LEVEL": "INFO", "LOG_QUEUE": "1", "LOG_CALL_SAMPLE": "0.05"},
+}
+
+
+def run_child(args: argparse.Namespace) -> None:
+    tmp = tempfile.mkdtemp(prefix="bench-logging-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+    os.environ["LOG_DIR"] = tmp
+    os.environ["TELEGRAM_VALIDATE"] = "0"
+    os.environ["BOT_TOKEN"] = ""
+    os.environ["BOT_API_KEY"] = "bench-key"
+    os.environ["NOTIFY_WORKER"] = "off"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-" + "x" * 32)
+
+    from backend.app import create_app
+    from backend.app.utils.logging import stop_logging
+    from benchmarks.api_routes import pick_actors
+    from benchmarks.seed import Scale, seed
+
+    app = create_app()
+    seed(app, Scale(users=200, groups=20, tasks_per_group=100, finance_rows=2_000, invites=50))
+    actors, _ = pick_actors(app, app.test_client(), random.Random(1), args.threads * 2)
+
+    barrier = threading.Barrier(args.threads)
+    latencies: list[float] = []
+
+    def worker(n: int) -> None:
+        client = app.test_client()
+        a = actors[n % len(actors)]
+        paths = ["/api/me", "/api/groups", f"/api/groups/{a.group_id}/tasks?limit=50"]
+        local = []
+        barrier.wait()
+        for i in range(args.requests):
+            t0 = time.perf_counter()
+            client.get(paths[i % len(paths)], headers=a.headers)
+            local.append((time.perf_counter() - t0) * 1000)
+        latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stop_logging()  # the queue must drain before the process exits; not part of the timing
+
+    log_bytes = os.path.getsize(os.path.join(tmp, "backend.log"))
+    latencies.sort()
+    print(json.dumps({
+        "requests": len(latencies),
+        "elapsed": elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "log_bytes": log_bytes,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=500, help="requests per thread")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per mode; the fastest is reported")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    for mode, env in MODES.items():
+        child_env = {k: v for k, v in os.environ.items() if not k.startswith("LOG_")}
+        child_env.update(env)
+        runs = []
+        for _ in range(args.repeat):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.logging_overhead", "--child",
+                 "--threads", str(args.threads), "--requests", str(args.requests)],
+                env=child_env, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+            ).stdout
+            runs.append(json.loads(out.strip().splitlines()[-1]))
+        r = min(runs, key=lambda x: x["elapsed"])
+        print(
+            f"{mode:<11} {r['requests']} requests in {r['elapsed']:.2f}s -> {r['requests'] / r['elapsed']:,.0f} req/s "
+            f"p50={r['p50']:.2f}ms p99={r['p99']:.2f}ms log={r['log_bytes'] / 1024:,.0f}KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
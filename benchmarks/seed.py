@@ -0,0 +1,233 @@
+"""Seeded synthetic data for benchmarks.
+
+Builds users (each with a provisioned personal group), shared groups with
+members, tasks with assignees, group finance items, username invites and the
+derived rows the app expects (finance defaults, balances, settings). The same
+--seed always produces the same data:
+
+    python -m benchmarks.seed --db /tmp/bench.db --users 10000 --finance-rows 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+
+CATEGORIES = ["Продукты", "Дом", "Транспорт", "Развлечения", "Другое"]
+METHODS = ["Наличные", "Безнал"]
+STATUSES = ["new", "in_progress", "postponed", "done"]
+FIRST_NAMES = ["Анна", "Иван", "Мария", "Олег", "Alice", "Bob", "Carol", "Dmitry", "Елена", "Zoe"]
+PERSONAL_GROUP = "Личная"
+CHUNK = 20_000
+
+
+@dataclass
+class Scale:
+    users: int = 2_000
+    groups: int = 200  # shared groups, on top of one personal group per user
+    members_per_group: int = 8
+    tasks_per_group: int = 50
+    max_assignees: int = 3
+    finance_rows: int = 100_000
+    invites: int = 1_000
+
+
+def _chunks(rows: Iterable[dict], size: int = CHUNK) -> Iterator[list[dict]]:
+    batch: list[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(conn, table, rows: Iterable[dict]) -> int:
+    n = 0
+    for batch in _chunks(rows):
+        conn.execute(table.insert(), batch)
+        n += len(batch)
+    return n
+
+
+def seed(app, scale: Scale, seed: int = 42) -> dict[str, int]:
+    """Fill an empty database; returns row counts per table."""
+    from backend.app.extensions import db
+    from backend.app.models import (
+        Group,
+        GroupFinanceCategory,
+        GroupFinanceItem,
+        GroupMember,
+        GroupPaymentMethod,
+        GroupUsernameInvite,
+        NotificationSettings,
+        Task,
+        TaskAssignee,
+        User,
+    )
+    from backend.app.utils.finance import balance_rows_insert
+    from backend.app.utils.rollups import ledger_rollups_insert
+
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    today = date.today()
+    counts: dict[str, int] = {}
+
+    n_users = scale.users
+    n_groups = n_users + scale.groups  # personal groups get ids 1..n_users
+    shared_ids = range(n_users + 1, n_groups + 1)
+
+    def ago(days: int) -> datetime:
+        return now - timedelta(days=rng.randrange(days), seconds=rng.randrange(86_400))
+
+    members: dict[int, list[int]] = {gid: [gid] for gid in range(1, n_users + 1)}
+    for gid in shared_ids:
+        k = min(n_users, max(1, scale.members_per_group))
+        members[gid] = rng.sample(range(1, n_users + 1), k)  # first one is the owner
+
+    with app.app_context(), db.engine.begin() as conn:
+        def users() -> Iterator[dict]:
+            for uid in range(1, n_users + 1):
+                first = rng.choice(FIRST_NAMES)
+                username = f"user{uid}" if uid % 10 else None  # some users have no @username
+                yield {
+                    "id": uid,
+                    "tg_id": 10_000_000 + uid,
+                    "username": username,
+                    "first_name": first,
+                    "username_lc": username,
+                    "first_name_lc": first.lower(),
+                    "default_group_id": uid,
+                    "provisioned_at": now,
+                    "created_at": ago(365),
+                }
+
+        counts["users"] = _insert(conn, User.__table__, users())
+        counts["groups"] = _insert(conn, Group.__table__, (
+            {
+                "id": gid,
+                "name": PERSONAL_GROUP if gid <= n_users else f"Команда {gid - n_users}",
+                "owner_id": members[gid][0],
+                "created_at": ago(365),
+            }
+            for gid in range(1, n_groups + 1)
+        ))
+        counts["group_members"] = _insert(conn, GroupMember.__table__, (
+            {"group_id": gid, "user_id": uid, "can_tasks": True, "can_finance": True, "created_at": now}
+            for gid, uids in members.items()
+            for uid in uids
+        ))
+        counts["group_finance_categories"] = _insert(conn, GroupFinanceCategory.__table__, (
+            {"id": (gid - 1) * len(CATEGORIES) + i + 1, "group_id": gid, "name": name}
+            for gid in range(1, n_groups + 1)
+            for i, name in enumerate(CATEGORIES)
+        ))
+        counts["group_payment_methods"] = _insert(conn, GroupPaymentMethod.__table__, (
+            {"id": (gid - 1) * len(METHODS) + i + 1, "group_id": gid, "name": name}
+            for gid in range(1, n_groups + 1)
+            for i, name in enumerate(METHODS)
+        ))
+        counts["notification_settings"] = _insert(conn, NotificationSettings.__table__, (
+            {"user_id": uid, "notify_new_task": True, "notify_task_updates": True}
+            for uid in range(1, n_users + 1)
+        ))
+
+        tasks: list[dict] = []
+        assignees: list[dict] = []
+        for gid in shared_ids:
+            uids = members[gid]
+            for _ in range(scale.tasks_per_group):
+                tid = len(tasks) + 1
+                status = rng.choice(STATUSES)
+                responsible = rng.choice(uids)
+                tasks.append({
+                    "id": tid,
+                    "group_id": gid,
+                    "title": f"Задача {tid}",
+                    "description": "",
+                    "status": status,
+                    "done": status == "done",
+                    "urgent": rng.random() < 0.1,
+                    "deadline": today + timedelta(days=rng.randint(-60, 60)) if rng.random() < 0.8 else None,
+                    "responsible_id": responsible,
+                    "assigned_by_id": rng.choice(uids),
+                    "created_at": ago(180),
+                })
+                others = [u for u in uids if u != responsible]
+                for uid in rng.sample(others, min(len(others), rng.randint(0, scale.max_assignees))):
+                    assignees.append({"task_id": tid, "user_id": uid, "created_at": now})
+        counts["tasks"] = _insert(conn, Task.__table__, tasks)
+        counts["task_assignees"] = _insert(conn, TaskAssignee.__table__, assignees)
+
+        def finance_items() -> Iterator[dict]:
+            for _ in range(scale.finance_rows):
+                # mostly shared groups, the rest in personal ones
+                gid = rng.choice(shared_ids) if shared_ids and rng.random() < 0.8 else rng.randint(1, n_users)
+                yield {
+                    "group_id": gid,
+                    "created_by_id": rng.choice(members[gid]),
+                    "kind": "income" if rng.random() < 0.3 else "expense",
+                    "amount": rng.randint(100, 100_000),
+                    "description": "",
+                    "category_id": (gid - 1) * len(CATEGORIES) + rng.randrange(len(CATEGORIES)) + 1 if rng.random() < 0.9 else None,
+                    "method_id": (gid - 1) * len(METHODS) + rng.randrange(len(METHODS)) + 1 if rng.random() < 0.9 else None,
+                    "created_at": ago(365),
+                }
+
+        counts["group_finance_items"] = _insert(conn, GroupFinanceItem.__table__, finance_items())
+
+        def invites() -> Iterator[dict]:
+            for _ in range(scale.invites if shared_ids else 0):
+                gid = rng.choice(shared_ids)
+                status = "pending" if rng.random() < 0.6 else rng.choice(["accepted", "declined"])
+                yield {
+                    "group_id": gid,
+                    "created_by_id": members[gid][0],
+                    "target_username": f"user{rng.randint(1, n_users)}",
+                    "status": status,
+                    "created_at": ago(90),
+                }
+
+        counts["group_username_invites"] = _insert(conn, GroupUsernameInvite.__table__, invites())
+
+        # aggregates the finance endpoints read (see utils/finance.py)
+        counts["group_finance_balances"] = conn.execute(balance_rows_insert()).rowcount
+        counts["group_finance_daily"] = conn.execute(ledger_rollups_insert()).rowcount
+
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True, help="SQLite file to create (must not exist)")
+    parser.add_argument("--seed", type=int, default=42)
+    for field, default in asdict(Scale()).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=default)
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.db)
+    if os.path.exists(path):
+        parser.error(f"{path} already exists")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("LOG_DIR", os.path.dirname(path))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["NOTIFY_WORKER"] = "off"
+
+    from backend.app import create_app
+
+    scale = Scale(**{f: getattr(args, f) for f in asdict(Scale())})
+    started = time.perf_counter()
+    counts = seed(create_app(), scale, seed=args.seed)
+    for table, n in counts.items():
+        print(f"{table:<26} {n:>10,}")
+    print(f"Seeded {path} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Parallel task and finance writes against SQLite, with and without the tuning profile.
+
+Every run uses a fresh database file and its own process (the profile is read
+from the environment at import time). Each worker thread logs in as its own
+user and alternates POST /api/groups/<gid>/tasks and POST /api/groups/<gid>/finance:
+
+    python -m benchmarks.sqlite_concurrency --threads 8 --requests 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def run_child(args: argparse.Namespace) -> None:
+    tmp = tempfile.mkdtemp(prefix="bench-sqlite-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+    os.environ["LOG_DIR"] = tmp
+    os.environ["LOG_LEVEL"] = "ERROR"
+    os.environ["TELEGRAM_VALIDATE"] = "0"
+    os.environ["BOT_TOKEN"] = ""
+    os.environ["NOTIFY_WORKER"] = "off"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-" + "x" * 32)
+
+    from backend.app import create_app
+
+    app = create_app()
+
+    def login(i: int) -> tuple[dict, int]:
+        client = app.test_client()
+        user = {"id": 5_000_000 + i, "username": f"bench{i}", "first_name": "Bench"}
+        data = client.post("/api/auth/telegram", json={"initData": "-", "debugUser": user}).get_json()
+        headers = {"Authorization": f"Bearer {data['access_token']}"}
+        gid = client.get("/api/groups", headers=headers).get_json()["items"][0]["id"]
+        return headers, gid
+
+    sessions = [login(i) for i in range(args.threads)]
+    latencies: list[float] = []
+    errors: list[int] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def worker(headers: dict, gid: int) -> None:
+        client = app.test_client()
+        local: list[float] = []
+        failed = 0
+        barrier.wait()
+        for n in range(args.requests):
+            t0 = time.perf_counter()
+            if n % 2:
+                r = client.post(
+                    f"/api/groups/{gid}/finance",
+                    json={"kind": "expense" if n % 4 == 1 else "income", "amount": 100 + n, "description": "bench"},
+                    headers=headers,
+                )
+            else:
+                r = client.post(f"/api/groups/{gid}/tasks", json={"title": f"bench {n}"}, headers=headers)
+            local.append((time.perf_counter() - t0) * 1000)
+            if r.status_code != 200:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker, args=s) for s in sessions]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(json.dumps({
+        "writes": len(latencies),
+        "errors": sum(errors),
+        "elapsed": elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+    }))
+
+
+def run_profile(label: str, tuning: bool, args: argparse.Namespace) -> None:
+    env = dict(os.environ, SQLITE_TUNING="1" if tuning else "0")
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.sqlite_concurrency", "--child",
+         "--threads", str(args.threads), "--requests", str(args.requests)],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    r = json.loads(out.strip().splitlines()[-1])
+    print(
+        f"{label:<8} {r['writes']} writes in {r['elapsed']:.2f}s -> {r['writes'] / r['elapsed']:,.0f}/s "
+        f"p50={r['p50']:.1f}ms p95={r['p95']:.1f}ms p99={r['p99']:.1f}ms errors={r['errors']}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="writes per thread")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+    run_profile("default", False, args)
+    run_profile("tuned", True, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Many concurrent SSE clients against the event hub: fan-out latency, resume, footprint.
+
+Seeds a small database, starts the hub (`flask events-server`) in a child
+process, connects --clients EventSource-like readers spread over --groups
+shared groups, then creates tasks in those groups and measures the time from
+the write to each subscriber receiving its event. Also checks heartbeats on
+idle streams and `Last-Event-ID` resume, and reports the hub's threads and RSS:
+
+    python -m benchmarks.sse_load --clients 2000 --groups 50 --writes 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+
+def _env(db_path: str, tmp: str) -> None:
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["LOG_DIR"] = tmp
+    os.environ["LOG_LEVEL"] = "WARNING"
+    os.environ["TELEGRAM_VALIDATE"] = "0"
+    os.environ["BOT_TOKEN"] = ""
+    os.environ["NOTIFY_WORKER"] = "off"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-" + "x" * 32)
+
+
+def _raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def _proc_status(pid: int) -> dict[str, str]:
+    with open(f"/proc/{pid}/status") as f:
+        return dict(line.rstrip("\n").split(":\t", 1) for line in f if ":\t" in line)
+
+
+def pct(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else float("nan")
+
+
+class Reader:
+    """Minimal EventSource: parses the stream, records when each event arrived."""
+
+    def __init__(self, group_id: int):
+        self.group_id = group_id
+        self.ready = asyncio.Event()
+        self.connected_at = 0.0
+        self.received: dict[int, float] = {}  # entity id -> arrival time
+        self.pings = 0
+        self.resets = 0
+        self.last_event_id = ""
+
+    async def run(self, session: aiohttp.ClientSession, url: str, params: dict) -> None:
+        t0 = time.perf_counter()
+        async with session.get(url, params=params) as resp:
+            resp.raise_for_status()
+            event, data = "message", ""
+            async for raw in resp.content:
+                line = raw.decode().rstrip("\n")
+                if line.startswith(":"):
+                    self.pings += 1
+                elif line.startswith("id: "):
+                    self.last_event_id = line[4:]
+                elif line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: "):
+                    data = line[6:]
+                elif line == "":
+                    self._dispatch(event, data, t0)
+                    event, data = "message", ""
+
+    def _dispatch(self, event: str, data: str, t0: float) -> None:
+        if event == "ready":
+            self.connected_at = time.perf_counter() - t0
+            self.ready.set()
+        elif event == "change":
+            payload = json.loads(data)
+            if payload["entity"] == "task":
+                self.received.setdefault(payload["id"], time.perf_counter())
+        elif event == "reset":
+            self.resets += 1
+
+
+def run_hub(args: argparse.Namespace) -> None:
+    _env(args.db, os.path.dirname(args.db))
+    _raise_fd_limit()
+    from backend.app import create_app
+    from backend.app.utils.events import run_events_server
+
+    run_events_server(create_app(), "127.0.0.1", args.port)
+
+
+async def drive(args: argparse.Namespace, app, hub_pid: int) -> None:
+    from flask_jwt_extended import create_access_token
+
+    from backend.app.extensions import db
+    from backend.app.models import Group, GroupMember
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        shared = [g for (g,) in db.session.query(Group.id).filter(Group.name != "Личная").order_by(Group.id).limit(args.groups)]
+        members = {gid: [u for (u,) in db.session.query(GroupMember.user_id).filter_by(group_id=gid)] for gid in shared}
+        tokens = {}
+        for gid in shared:
+            for uid in members[gid]:
+                tokens[uid] = create_access_token(identity=str(uid))
+
+    url = f"http://127.0.0.1:{args.port}/api/groups/{{gid}}/events"
+    readers = [Reader(shared[i % len(shared)]) for i in range(args.clients)]
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=None)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        t0 = time.perf_counter()
+        tasks = [
+            asyncio.create_task(r.run(session, url.format(gid=r.group_id), {"token": tokens[rng.choice(members[r.group_id])]}))
+            for r in readers
+        ]
+        await asyncio.wait_for(asyncio.gather(*(r.ready.wait() for r in readers)), timeout=120)
+        connect_s = time.perf_counter() - t0
+        status = _proc_status(hub_pid)
+        print(f"{args.clients} clients connected in {connect_s:.2f}s "
+              f"(p50={pct([r.connected_at for r in readers], 50) * 1000:.1f}ms "
+              f"p99={pct([r.connected_at for r in readers], 99) * 1000:.1f}ms); "
+              f"hub threads={status['Threads']} rss={status['VmRSS'].strip()}")
+
+        # idle: every stream should see heartbeats
+        await asyncio.sleep(args.heartbeat * 2.5)
+        idle_pings = [r.pings for r in readers]
+        print(f"heartbeats after {args.heartbeat * 2.5:.1f}s idle: min={min(idle_pings)} max={max(idle_pings)}")
+
+        # writes: creation time per task id, arrival per subscriber
+        client = app.test_client()
+        written: dict[int, tuple[int, float]] = {}
+        for i in range(args.writes):
+            gid = rng.choice(shared)
+            uid = rng.choice(members[gid])
+            t_write = time.perf_counter()
+            r = client.post(f"/api/groups/{gid}/tasks", json={"title": f"Load {i}"},
+                            headers={"Authorization": f"Bearer {tokens[uid]}"})
+            written[r.get_json()["id"]] = (gid, t_write)
+            await asyncio.sleep(args.interval)
+        await asyncio.sleep(max(1.0, args.poll * 4))
+
+        latencies, expected, delivered = [], 0, 0
+        for r in readers:
+            for task_id, (gid, t_write) in written.items():
+                if gid != r.group_id:
+                    continue
+                expected += 1
+                if task_id in r.received:
+                    delivered += 1
+                    latencies.append((r.received[task_id] - t_write) * 1000)
+        print(f"{args.writes} writes -> {delivered}/{expected} deliveries; latency "
+              f"p50={pct(latencies, 50):.0f}ms p95={pct(latencies, 95):.0f}ms p99={pct(latencies, 99):.0f}ms "
+              f"max={max(latencies, default=0):.0f}ms; resets={sum(r.resets for r in readers)}")
+
+        # resume: drop one stream, write while it is away, reconnect with Last-Event-ID
+        victim_i = 0
+        victim = readers[victim_i]
+        tasks[victim_i].cancel()
+        gid = victim.group_id
+        uid = members[gid][0]
+        missed = [
+            client.post(f"/api/groups/{gid}/tasks", json={"title": f"Missed {n}"},
+                        headers={"Authorization": f"Bearer {tokens[uid]}"}).get_json()["id"]
+            for n in range(3)
+        ]
+        again = Reader(gid)
+        resume = asyncio.create_task(again.run(session, url.format(gid=gid), {"token": tokens[uid], "last_event_id": victim.last_event_id}))
+        await asyncio.wait_for(again.ready.wait(), timeout=10)
+        print(f"resume from Last-Event-ID {victim.last_event_id}: replayed {sum(t in again.received for t in missed)}/3 missed events")
+
+        status = _proc_status(hub_pid)
+        print(f"hub after run: threads={status['Threads']} rss={status['VmRSS'].strip()}")
+        for t in [*tasks, resume]:
+            t.cancel()
+        await asyncio.gather(*tasks, resume, return_exceptions=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--groups", type=int, default=50, help="shared groups the clients are spread over")
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between writes")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--poll", type=float, default=0.1, help="EVENTS_POLL_INTERVAL of the hub")
+    parser.add_argument("--heartbeat", type=float, default=2, help="EVENTS_HEARTBEAT of the hub")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--hub", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hub:
+        run_hub(args)
+        return
+
+    tmp = tempfile.mkdtemp(prefix="bench-sse-")
+    args.db = os.path.join(tmp, "bench.db")
+    _env(args.db, tmp)
+    _raise_fd_limit()
+    os.environ["EVENTS_POLL_INTERVAL"] = str(args.poll)
+    os.environ["EVENTS_HEARTBEAT"] = str(args.heartbeat)
+    os.environ["EVENTS_MAX_CLIENTS"] = str(args.clients + 100)
+
+    from backend.app import create_app
+    from benchmarks.seed import Scale, seed
+
+    app = create_app()
+    seed(app, Scale(users=max(400, args.groups * 8), groups=args.groups, tasks_per_group=20, finance_rows=1_000, invites=10))
+
+    hub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.sse_load", "--hub", "--db", args.db, "--port", str(args.port)],
+        env=os.environ.copy(),
+    )
+    try:
+        deadline = time.time() + 20
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", args.port), timeout=0.5).close()
+                break
+            except OSError:
+                if time.time() > deadline or hub.poll() is not None:
+                    raise SystemExit("event hub did not start")
+                time.sleep(0.1)
+        asyncio.run(drive(args, app, hub.pid))
+    finally:
+        hub.terminate()
+        hub.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""validate_init_data(): first (uncached) validation vs repeated re-authentication.
+
+    python -m benchmarks.telegram_init_data --iterations 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import time
+import urllib.parse
+
+from backend.app.utils import telegram
+from backend.app.utils.telegram import validate_init_data
+
+BOT_TOKEN = "123456:BENCHMARK"
+
+
+def make_init_data(user_id: int, auth_date: int | None = None) -> str:
+    fields = {
+        "auth_date": str(auth_date or int(time.time())),
+        "query_id": f"AAH{user_id}",
+        "user": json.dumps({"id": user_id, "first_name": "Bench", "username": f"bench{user_id}"}),
+    }
+    check = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", BOT_TOKEN.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret, check.encode(), hashlib.sha256).hexdigest()
+    return urllib.parse.urlencode(fields)
+
+
+def bench(label: str, fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    per_call_us = (time.perf_counter() - start) / iterations * 1e6
+    print(f"{label:<10} {per_call_us:8.2f} us/call")
+    return per_call_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    samples = [make_init_data(i) for i in range(1000)]
+
+    def uncached(i: int) -> None:
+        telegram._validated.clear()
+        telegram._secret_key.cache_clear()
+        assert validate_init_data(samples[i % len(samples)], BOT_TOKEN)
+
+    def cached(i: int) -> None:
+        assert validate_init_data(samples[i % len(samples)], BOT_TOKEN)
+
+    before = bench("uncached", uncached, args.iterations)
+    after = bench("cached", cached, args.iterations)
+    print(f"speedup    x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
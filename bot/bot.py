@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import os
+import random
 
 import aiohttp
 from aiogram import Bot, Dispatcher
@@ -18,6 +19,10 @@ BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 WEBAPP_URL = os.getenv("WEBAPP_URL", "")
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:5000")
 BOT_API_KEY = os.getenv("BOT_API_KEY", "")
+BACKEND_POOL_LIMIT = int(os.getenv("BACKEND_POOL_LIMIT", "100"))  # concurrent connections to the backend
+BACKEND_KEEPALIVE = float(os.getenv("BACKEND_KEEPALIVE", "30"))  # seconds an idle connection is kept
+BACKEND_RETRIES = int(os.getenv("BACKEND_RETRIES", "2"))  # extra attempts for idempotent calls
+BACKEND_RETRY_BASE = float(os.getenv("BACKEND_RETRY_BASE", "0.2"))  # seconds, full jitter, doubled per attempt
 
 if not BOT_TOKEN:
     raise RuntimeError("BOT_TOKEN не установлен")
@@ -33,84 +38,105 @@ bot = Bot(token=BOT_TOKEN)
 dp = Dispatcher()
 
 
+_backend_session: aiohttp.ClientSession | None = None
+
+
+async def get_backend_session() -> aiohttp.ClientSession:
+    """One long-lived session (and connection pool) per bot process."""
+    global _backend_session
+    if _backend_session is None or _backend_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=BACKEND_POOL_LIMIT,
+            keepalive_timeout=BACKEND_KEEPALIVE,
+            ttl_dns_cache=300,
+            ssl=False,
+        )
+        _backend_session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"X-Bot-Api-Key": BOT_API_KEY},
+            timeout=aiohttp.ClientTimeout(total=15),
+        )
+    return _backend_session
+
+
+async def close_backend_session() -> None:
+    global _backend_session
+    if _backend_session is not None and not _backend_session.closed:
+        await _backend_session.close()
+    _backend_session = None
+
+
+async def backend_post(path: str, payload: dict, *, timeout: float = 10, idempotent: bool = False) -> tuple[int, dict | None, str]:
+    """POST to the backend; returns (status, parsed JSON or None, raw body).
+
+    Idempotent calls are retried with jittered backoff on connection errors,
+    timeouts and 5xx responses.
+    """
+    session = await get_backend_session()
+    url = BACKEND_URL.rstrip("/") + path
+    retries = BACKEND_RETRIES if idempotent else 0
+
+    attempt = 0
+    while True:
+        last = attempt >= retries
+        try:
+            async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                body_text = await resp.text()
+                if resp.status < 500 or last:
+                    try:
+                        data = json.loads(body_text) if body_text else {}
+                    except ValueError:
+                        data = None
+                    return resp.status, data, body_text
+                logger.warning("backend %s: status=%s, retrying", path, resp.status)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if last:
+                raise
+            logger.warning("backend %s: connection failed, retrying", path, exc_info=True)
+        await asyncio.sleep(random.uniform(0, BACKEND_RETRY_BASE * (2 ** attempt)))
+        attempt += 1
+
+
 async def backend_start_session(tg_user) -> dict:
     """Create user + JWT on backend (as required by /start flow)."""
-    url = BACKEND_URL.rstrip("/") + "/api/bot/start"
     payload = {
         "tg_id": tg_user.id,
         "username": tg_user.username,
         "first_name": tg_user.first_name,
+        "include_invites": True,
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            url,
-            json=payload,
-            headers={"X-Bot-Api-Key": BOT_API_KEY, "Content-Type": "application/json"},
-            timeout=aiohttp.ClientTimeout(total=15),
-            ssl=False,
-        ) as resp:
-            body_text = await resp.text()
+    status, data, body_text = await backend_post("/api/bot/start", payload, timeout=15, idempotent=True)
 
-            # Логируем, что реально вернул сервер
-            logger.info("backend_start_session: status=%s body=%s", resp.status, body_text[:1000])
+    # Логируем, что реально вернул сервер
+    logger.info("backend_start_session: status=%s body=%s", status, body_text[:1000])
 
-            try:
-                data = json.loads(body_text) if body_text else {}
-            except Exception:
-                raise RuntimeError(f"Backend returned non-JSON response: status={resp.status}, body={body_text[:300]}")
+    if data is None:
+        raise RuntimeError(f"Backend returned non-JSON response: status={status}, body={body_text[:300]}")
 
-            if resp.status != 200 or not data.get("ok"):
-                raise RuntimeError(f"Backend error: status={resp.status}, body={data}")
+    if status != 200 or not data.get("ok"):
+        raise RuntimeError(f"Backend error: status={status}, body={data}")
 
-            return data
+    return data
 
 
 async def backend_get_pending_invites(user) -> list[dict]:
-    url = f"{BACKEND_URL.rstrip('/')}/api/bot/invites/pending"
     payload = {"tg_id": user.id, "username": getattr(user, "username", None)}
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-                url,
-                json=payload,
-                headers={"X-Bot-Api-Key": BOT_API_KEY},
-                timeout=aiohttp.ClientTimeout(total=10),
-                ssl=False,
-        ) as resp:
-            data = await resp.json()
-            if resp.status != 200 or not data.get("ok"):
-                return []
-            return data.get("items") or []
+    status, data, _ = await backend_post("/api/bot/invites/pending", payload, idempotent=True)
+    if status != 200 or not data or not data.get("ok"):
+        return []
+    return data.get("items") or []
 
 
 async def backend_accept_invite(user, invite_id: int) -> bool:
-    url = f"{BACKEND_URL.rstrip('/')}/api/bot/invites/{invite_id}/accept"
-    payload = {"tg_id": user.id}
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-                url,
-                json=payload,
-                headers={"X-Bot-Api-Key": BOT_API_KEY},
-                timeout=aiohttp.ClientTimeout(total=10),
-                ssl=False,
-        ) as resp:
-            data = await resp.json()
-            return resp.status == 200 and data.get("ok") is True
+    # not idempotent (a repeated call answers 409), so no retries
+    status, data, _ = await backend_post(f"/api/bot/invites/{invite_id}/accept", {"tg_id": user.id})
+    return status == 200 and bool(data) and data.get("ok") is True
 
 
 async def backend_decline_invite(user, invite_id: int) -> bool:
-    url = f"{BACKEND_URL.rstrip('/')}/api/bot/invites/{invite_id}/decline"
-    payload = {"tg_id": user.id}
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-                url,
-                json=payload,
-                headers={"X-Bot-Api-Key": BOT_API_KEY},
-                timeout=aiohttp.ClientTimeout(total=10),
-                ssl=False,
-        ) as resp:
-            data = await resp.json()
-            return resp.status == 200 and data.get("ok") is True
+    status, data, _ = await backend_post(f"/api/bot/invites/{invite_id}/decline", {"tg_id": user.id})
+    return status == 200 and bool(data) and data.get("ok") is True
 
 @dp.message(Command("start"))
 @log_async_call
@@ -123,7 +149,10 @@ async def cmd_start(message: Message):
         data = await backend_start_session(user)
         # показать pending приглашения
         if getattr(user, "username", None):
-            invites = await backend_get_pending_invites(user)
+            invites = data.get("invites")
+            if invites is None:
+                # older backend without include_invites support
+                invites = await backend_get_pending_invites(user)
             for inv in invites:
                 kb = InlineKeyboardMarkup(inline_keyboard=[
                     [
@@ -200,6 +229,16 @@ async def cb_inv_decline(call: CallbackQuery):
     await call.answer()
 
 
+@dp.startup()
+async def on_startup():
+    await get_backend_session()
+
+
+@dp.shutdown()
+async def on_shutdown():
+    await close_backend_session()
+
+
 async def main():
     logger.info("Bot starting… WEBAPP_URL=%s BACKEND_URL=%s", WEBAPP_URL, BACKEND_URL)
     await dp.start_polling(bot, allowed_updates=["message", "callback_query"], drop_pending_updates=True)
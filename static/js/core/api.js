@@ -5,18 +5,56 @@ export function authHeaders() {
   return token ? { Authorization: `Bearer ${token}` } : {};
 }
 
+// Last ETag + body per GET url. Group lists answer `304 Not Modified` while the
+// group's version is unchanged, so a refetch then costs no serialization or transfer.
+const ETAG_CACHE_MAX = 100;
+const etagCache = new Map();
+
+function rememberEtag(url, etag, data) {
+  etagCache.delete(url);
+  etagCache.set(url, { etag, data });
+  if (etagCache.size > ETAG_CACHE_MAX) etagCache.delete(etagCache.keys().next().value);
+}
+
 export async function apiFetch(url, opts = {}) {
+  const method = (opts.method || 'GET').toUpperCase();
+  const cached = method === 'GET' ? etagCache.get(url) : null;
   const res = await fetch(url, {
     ...opts,
+    // the conditional request is ours; keep the browser cache out of it
+    ...(method === 'GET' ? { cache: 'no-store' } : {}),
     headers: {
       ...(opts.headers || {}),
+      ...(cached ? { 'If-None-Match': cached.etag } : {}),
       ...authHeaders(),
     },
   });
+  if (res.status === 304 && cached) {
+    return cached.data;
+  }
   const data = await res.json().catch(() => ({}));
   if (!res.ok || data.ok === false) {
     const msg = data.error || `HTTP ${res.status}`;
     throw new Error(msg);
   }
+  const etag = method === 'GET' ? res.headers.get('ETag') : null;
+  if (etag) rememberEtag(url, etag, data);
   return data;
 }
+
+// Fetch a keyset-paginated collection page by page (follows `next_cursor`).
+// `onPage(itemsSoFar)` is called after every page so callers can render incrementally.
+export async function apiFetchAllPages(url, { params = {}, limit = 100, onPage = null } = {}) {
+  const items = [];
+  let cursor = null;
+  do {
+    const qs = new URLSearchParams({ ...params, limit: String(limit) });
+    if (cursor) qs.set('cursor', String(cursor));
+    const sep = url.includes('?') ? '&' : '?';
+    const data = await apiFetch(`${url}${sep}${qs.toString()}`);
+    items.push(...(data.items || []));
+    cursor = data.next_cursor || null;
+    if (onPage) onPage(items);
+  } while (cursor);
+  return items;
+}
@@ -0,0 +1,109 @@
+import { apiFetch } from './api.js';
+import { getToken } from './storage.js';
+
+// Live group updates over Server-Sent Events (/api/groups/<gid>/events).
+// Every connection opens with a fresh short-lived ticket (POST .../events/ticket):
+// the JWT never goes into a URL, where proxies and servers would log it.
+// Events only say *that* something changed; screens reload through delta sync.
+// Emits `group:changed` ({ groupId, entities }) on window, debounced per group.
+
+const DEBOUNCE_MS = 300;
+const BACKOFF_MAX_MS = 60000;
+
+const watched = new Map(); // groupId -> { source, lastEventId, backoff, timer, pending }
+let disabled = false; // the backend runs without an event hub (204)
+
+function emit(groupId, entity) {
+  const w = watched.get(groupId);
+  if (!w) return;
+  w.pending.add(entity);
+  clearTimeout(w.timer);
+  w.timer = setTimeout(() => {
+    const entities = [...w.pending];
+    w.pending.clear();
+    window.dispatchEvent(new CustomEvent('group:changed', { detail: { groupId, entities } }));
+  }, DEBOUNCE_MS);
+}
+
+async function open(groupId) {
+  const w = watched.get(groupId);
+  if (!w || !getToken()) return;
+
+  let ticket;
+  try {
+    ({ ticket } = await apiFetch(`/api/groups/${groupId}/events/ticket`, { method: 'POST' }));
+  } catch {
+    return retry(groupId, w);
+  }
+  // unwatched (or reopened) while the ticket was on its way
+  if (watched.get(groupId) !== w || w.source) return;
+
+  const qs = new URLSearchParams({ ticket });
+  if (w.lastEventId) qs.set('last_event_id', w.lastEventId);
+  const source = new EventSource(`/api/groups/${groupId}/events?${qs.toString()}`);
+  w.source = source;
+
+  const remember = (e) => { if (e.lastEventId) w.lastEventId = e.lastEventId; };
+  source.addEventListener('ready', (e) => { remember(e); w.backoff = 0; });
+  source.addEventListener('change', (e) => {
+    remember(e);
+    try { emit(groupId, JSON.parse(e.data).entity); } catch { emit(groupId, 'all'); }
+  });
+  // missed events (compacted log, slow connection): resync everything
+  source.addEventListener('reset', (e) => { remember(e); emit(groupId, 'all'); });
+  // token expired: reconnect with a ticket for the current one, resuming where we were
+  source.addEventListener('expired', () => reopen(groupId, 0));
+
+  source.onerror = () => {
+    // the browser would reconnect a dropped stream with the same (by then expired)
+    // ticket: reconnect here instead. A refused connection (401/403/503, or 204
+    // without a hub) ends in CLOSED: ask whether there is a hub at all.
+    const closed = source.readyState === EventSource.CLOSED;
+    source.close();
+    if (w.source === source) w.source = null;
+    if (!closed) return retry(groupId, w);
+    liveEventsEnabled(groupId).then((enabled) => (enabled ? retry(groupId, w) : disableAll()));
+  };
+}
+
+function retry(groupId, w) {
+  w.backoff = Math.min(BACKOFF_MAX_MS, (w.backoff || 1000) * 2);
+  reopen(groupId, w.backoff * (0.5 + Math.random() / 2));
+}
+
+// EventSource hides the status of a refused stream: ask once whether it was the 204
+async function liveEventsEnabled(groupId) {
+  try {
+    const res = await fetch(`/api/groups/${groupId}/events`, { method: 'HEAD', redirect: 'manual' });
+    return res.status !== 204;
+  } catch {
+    return true;
+  }
+}
+
+function disableAll() {
+  disabled = true;
+  for (const groupId of [...watched.keys()]) unwatchGroup(groupId);
+}
+
+function reopen(groupId, delay) {
+  const w = watched.get(groupId);
+  if (!w) return;
+  if (w.source) w.source.close();
+  w.source = null;
+  setTimeout(() => { if (watched.get(groupId) === w && !w.source) open(groupId); }, delay);
+}
+
+export function watchGroup(groupId) {
+  if (!groupId || disabled || typeof EventSource === 'undefined' || watched.has(groupId)) return;
+  watched.set(groupId, { source: null, lastEventId: '', backoff: 0, timer: null, pending: new Set() });
+  open(groupId);
+}
+
+export function unwatchGroup(groupId) {
+  const w = watched.get(groupId);
+  if (!w) return;
+  watched.delete(groupId);
+  clearTimeout(w.timer);
+  if (w.source) w.source.close();
+}
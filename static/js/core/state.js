@@ -6,6 +6,8 @@ export const STATE = {
   groupTasksPage: 1,
 
   tasksCache: [],
+  tasksCacheKey: null, // `tasks:<gid>` once tasksCache is complete (delta sync from then on)
+  dayTasks: null, // { iso, items }: my open tasks due that day, across groups (/api/me/tasks)
   groupTasksCache: [],
 
   homeFilter: 'today',
@@ -13,6 +15,7 @@ export const STATE = {
   selectedDate: null, // YYYY-MM-DD
   topFilter: 'tasks', // tasks | finance | all
   financeCache: [],
+  calendarByMonth: {}, // 'YYYY-MM' -> { iso: day counters } from /api/calendar
 
   groups: [],
   selectedGroupId: null,
@@ -21,8 +24,9 @@ export const STATE = {
   commonTab: 'tasks', // tasks | finance
 
   membersCacheByGroup: {},
-  allUsersCache: null,
+  knownUsersCache: null,
   financeMetaCacheByGroup: {},
+  groupFinanceCacheByGroup: {}, // { balance, items } kept fresh via /changes
 
   currentTask: null,
   manageMode: null, // 'categories'|'methods'
@@ -0,0 +1,46 @@
+import { apiFetch } from './api.js';
+
+// Delta sync with /api/groups/<gid>/changes. Each cached collection keeps its own
+// cursor (`key`); a missing cursor or `reset: true` means "refetch in full".
+const cursors = {};
+
+// Take a cursor right before a full fetch: changes that land during the fetch
+// are replayed by the next pull (merging them twice is harmless).
+export async function beginSync(key, groupId) {
+  const data = await apiFetch(`/api/groups/${groupId}/changes`);
+  cursors[key] = data.cursor;
+}
+
+// Changes since the last cursor, or null when the caller must refetch in full.
+export async function pullChanges(key, groupId) {
+  if (cursors[key] == null) return null;
+  const merged = {};
+  let cursor = cursors[key];
+  let data;
+  do {
+    data = await apiFetch(`/api/groups/${groupId}/changes?since=${cursor}`);
+    if (data.reset) {
+      delete cursors[key];
+      return null;
+    }
+    for (const [name, section] of Object.entries(data)) {
+      if (!section || !Array.isArray(section.items)) continue;
+      const acc = merged[name] || (merged[name] = { items: [], deleted: [] });
+      acc.items.push(...section.items);
+      acc.deleted.push(...section.deleted);
+    }
+    if ('balance' in data) merged.balance = data.balance;
+    cursor = data.cursor;
+  } while (data.more);
+  cursors[key] = cursor;
+  return merged;
+}
+
+// Apply a { items, deleted } section to a list of rows with ids (newest first).
+export function mergeById(list, section) {
+  if (!section || (!section.items.length && !section.deleted.length)) return list;
+  const byId = new Map((list || []).map(x => [x.id, x]));
+  section.deleted.forEach(id => byId.delete(id));
+  section.items.forEach(x => byId.set(x.id, x));
+  return [...byId.values()].sort((a, b) => b.id - a.id);
+}
@@ -1,7 +1,7 @@
 import { apiFetch } from '../core/api.js';
 import { STATE } from '../core/state.js';
 import { escapeHtml } from '../core/utils.js';
-import { userDisplayName } from './users.js';
+import { userDisplayName, fetchKnownUsers, bindAssigneeSearch } from './users.js';
 import { loadPersonalTasks, loadTasks } from './tasks.js';
 import { renderHomeTasks } from './home.js';
 import { loadGroupFinance, loadGroupTasks, getGroupFinanceMeta } from './groups.js';
@@ -28,17 +28,10 @@ async function fetchGroupMembers(groupId) {
   return STATE.membersCacheByGroup[groupId];
 }
 
-async function fetchAllUsers() {
-  if (STATE.allUsersCache) return STATE.allUsersCache;
-  const data = await apiFetch('/api/users');
-  STATE.allUsersCache = data.items || [];
-  return STATE.allUsersCache;
-}
-
 async function getAssigneeUniverse(groupId) {
-  const [members, allUsers] = await Promise.all([fetchGroupMembers(groupId), fetchAllUsers()]);
+  const [members, knownUsers] = await Promise.all([fetchGroupMembers(groupId), fetchKnownUsers()]);
   const map = new Map();
-  (allUsers || []).forEach(u => map.set(u.id, u));
+  (knownUsers || []).forEach(u => map.set(u.id, u));
   (members || []).forEach(u => map.set(u.id, u));
   const ids = [...map.keys()].sort((a, b) => a - b);
   return ids.map(id => map.get(id));
@@ -90,6 +83,7 @@ export async function openAddPage() {
   const groupIdForTask = getContextGroupIdForTasks();
   const universe = await getAssigneeUniverse(groupIdForTask);
   renderAssigneesPicker('add-task-assignees', universe);
+  bindAssigneeSearch('add-task-assignee-search', 'add-task-assignees');
 
   if (active === 'group_tasks' && STATE.selectedGroupId && STATE.commonTab === 'finance') {
     const meta = await getGroupFinanceMeta(STATE.selectedGroupId);
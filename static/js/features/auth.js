@@ -1,4 +1,5 @@
 import { apiFetch } from '../core/api.js';
+import { watchGroup } from '../core/events.js';
 import { setToken } from '../core/storage.js';
 import { getToken } from '../core/storage.js';
 import { getUrlToken, cleanupUrlParams } from '../core/utils.js';
@@ -23,6 +24,7 @@ function enterApp() {
 async function bootAfterLogin() {
   await loadGroups();
   loadCurrentScreen();
+  watchGroup(Number(localStorage.getItem('default_group_id') || 0));
   // notify other modules (datebar/calendar caches etc.) that auth token is ready
   window.dispatchEvent(new CustomEvent('auth:ready'));
 }
@@ -1,6 +1,6 @@
+import { apiFetch } from '../core/api.js';
 import { STATE } from '../core/state.js';
 import { isoDate, ruDateParts } from '../core/utils.js';
-import { loadFinanceCache } from './personal_finance.js';
 
 function todayIso() {
   return isoDate(new Date());
@@ -25,14 +25,11 @@ export function initDatebar() {
   updateHeaderDate();
   updateFilterUi();
 
-  // Preload caches AFTER auth is ready (token is required for /api/*).
+  // Preload the month's markers AFTER auth is ready (token is required for /api/*).
   // If user opens calendar before login, it will render without markers and update right after auth.
   const preload = async () => {
-    try { await loadFinanceCache(); } catch {}
-    try {
-      const m = await import('./tasks.js');
-      await m.loadPersonalTasks();
-    } catch {}
+    const base = new Date((STATE.selectedDate || todayIso()) + 'T00:00:00');
+    try { await loadCalendarMonth(base.getFullYear(), base.getMonth()); } catch {}
     // if calendar is open, redraw markers
     const open = document.getElementById('calendar-overlay')?.classList.contains('open');
     if (open) renderCalendarMonth();
@@ -54,6 +51,9 @@ export function openCalendar() {
   if (!ov) return;
   ov.classList.add('open');
   renderCalendarMonth();
+  // revalidate the shown month (a 304 unless something changed since it was loaded)
+  const base = new Date((STATE.selectedDate || todayIso()) + 'T00:00:00');
+  loadCalendarMonth(base.getFullYear(), base.getMonth()).then(renderCalendarMonth).catch(() => {});
 }
 
 export function closeCalendar() {
@@ -99,11 +99,36 @@ function updateHeaderDate() {
   if (open) renderCalendarMonth();
 }
 
+function monthKey(year, monthIndex) {
+  return `${year}-${String(monthIndex + 1).padStart(2, '0')}`;
+}
+
+// Per-day counters of one month from GET /api/calendar (SQL aggregates, not raw rows).
+export async function loadCalendarMonth(year, monthIndex) {
+  const key = monthKey(year, monthIndex);
+  const lastDay = new Date(year, monthIndex + 1, 0).getDate();
+  const data = await apiFetch(`/api/calendar?from=${key}-01&to=${key}-${String(lastDay).padStart(2, '0')}`);
+  STATE.calendarByMonth[key] = data.days || {};
+  return STATE.calendarByMonth[key];
+}
+
 function getActivityIsoSetForMonth(year, monthIndex) {
   const set = new Set();
 
   const mode = STATE.topFilter || 'tasks';
 
+  const days = STATE.calendarByMonth[monthKey(year, monthIndex)];
+  if (days) {
+    Object.entries(days).forEach(([iso, d]) => {
+      const hasTasks = d.tasks > 0;
+      const hasFinance = d.income > 0 || d.expense > 0 || d.group_income > 0 || d.group_expense > 0;
+      if (((mode === 'tasks' || mode === 'all') && hasTasks) || ((mode === 'finance' || mode === 'all') && hasFinance)) set.add(iso);
+    });
+    return set;
+  }
+
+  // not loaded yet: whatever the local caches know
+
   const taskDays = (mode === 'tasks' || mode === 'all')
     ? (STATE.tasksCache || [])
       .filter(t => !t.done && t.status !== 'done' && t.deadline)
@@ -156,6 +181,9 @@ function renderCalendarMonth() {
   const daysInMonth = new Date(year, month + 1, 0).getDate();
 
   const activeSet = getActivityIsoSetForMonth(year, month);
+  if (!STATE.calendarByMonth[monthKey(year, month)]) {
+    loadCalendarMonth(year, month).then(renderCalendarMonth).catch(() => {});
+  }
 
   for (let i = 0; i < firstDow; i++) {
     const cell = document.createElement('div');
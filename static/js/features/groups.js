@@ -1,5 +1,7 @@
-import { apiFetch } from '../core/api.js';
+import { apiFetch, apiFetchAllPages } from '../core/api.js';
 import { STATE } from '../core/state.js';
+import { beginSync, mergeById, pullChanges } from '../core/sync.js';
+import { unwatchGroup, watchGroup } from '../core/events.js';
 import { escapeHtml, filterTasksByMode, isUrgentByDeadline } from '../core/utils.js';
 import { closeModal, openModal } from '../ui/modals.js';
 import { renderTaskList } from './tasks.js';
@@ -22,6 +24,17 @@ export async function loadGroups() {
 
   updateCommonMode();
   renderGroupsList();
+  watchSelectedGroup();
+}
+
+// live updates for the open shared group (the personal one is watched from login)
+let watchedGroupId = null;
+function watchSelectedGroup() {
+  if (watchedGroupId === STATE.selectedGroupId) return;
+  const personal = Number(localStorage.getItem('default_group_id') || 0);
+  if (watchedGroupId && watchedGroupId !== personal) unwatchGroup(watchedGroupId);
+  watchedGroupId = STATE.selectedGroupId;
+  if (watchedGroupId) watchGroup(watchedGroupId);
 }
 
 export async function loadGroupScreen() {
@@ -97,6 +110,7 @@ function renderGroupsList() {
       STATE.financeMetaCacheByGroup = {};
       updateCommonMode();
       renderGroupsList();
+      watchSelectedGroup();
 
       if (STATE.commonTab === 'finance') await loadGroupFinance();
       else await loadGroupTasks();
@@ -150,16 +164,21 @@ export async function loadGroupTasks() {
   updateCommonMode();
   if (!STATE.selectedGroupId) return;
 
-  const data = await apiFetch(`/api/groups/${STATE.selectedGroupId}/tasks`);
-  const tasks = data.items || [];
-  STATE.groupTasksCache = tasks;
+  const groupId = STATE.selectedGroupId;
+  const render = (tasks) => {
+    if (STATE.selectedGroupId !== groupId) return;
+    STATE.groupTasksCache = tasks;
 
-  const urgentCount = tasks.filter(t => !t.done && isUrgentByDeadline(t.deadline, 3)).length;
-  const uc = document.getElementById('urgent-count');
-  if (uc) uc.textContent = String(urgentCount);
+    const urgentCount = tasks.filter(t => !t.done && isUrgentByDeadline(t.deadline, 3)).length;
+    const uc = document.getElementById('urgent-count');
+    if (uc) uc.textContent = String(urgentCount);
+
+    const filtered = filterTasksByMode(tasks, STATE.groupFilter || 'today');
+    renderTaskList('group-tasks-list', filtered, STATE.groupTasksPage, 'group');
+  };
 
-  const filtered = filterTasksByMode(tasks, STATE.groupFilter || 'today');
-  renderTaskList('group-tasks-list', filtered, STATE.groupTasksPage, 'group');
+  // render the first page right away, then keep appending as the next pages arrive
+  await apiFetchAllPages(`/api/groups/${groupId}/tasks`, { onPage: (items) => render([...items]) });
 }
 
 // ---- Group finance ----
@@ -176,10 +195,28 @@ export async function getGroupFinanceMeta(groupId) {
   return STATE.financeMetaCacheByGroup[groupId];
 }
 
+async function fetchGroupFinance(groupId) {
+  const key = `finance:${groupId}`;
+  const cached = STATE.groupFinanceCacheByGroup[groupId];
+  if (cached) {
+    const changes = await pullChanges(key, groupId);
+    if (changes) {
+      cached.items = mergeById(cached.items, changes.finance);
+      if ('balance' in changes) cached.balance = changes.balance;
+      return cached;
+    }
+  }
+
+  await beginSync(key, groupId);
+  const data = await apiFetch(`/api/groups/${groupId}/finance`);
+  STATE.groupFinanceCacheByGroup[groupId] = { balance: data.balance, items: data.items || [] };
+  return STATE.groupFinanceCacheByGroup[groupId];
+}
+
 export async function loadGroupFinance() {
   if (!STATE.selectedGroupId) return;
 
-  const data = await apiFetch(`/api/groups/${STATE.selectedGroupId}/finance`);
+  const data = await fetchGroupFinance(STATE.selectedGroupId);
   const balEl = document.getElementById('group-balance');
   if (balEl) balEl.textContent = `${data.balance} ₽`;
 
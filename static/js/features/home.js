@@ -1,10 +1,12 @@
 import { apiFetch } from '../core/api.js';
 import { STATE } from '../core/state.js';
 import { isUrgentByDeadline } from '../core/utils.js';
-import { renderTaskList, loadPersonalTasks } from './tasks.js';
+import { renderTaskList, loadPersonalTasks, loadDayTasks, dayTasks } from './tasks.js';
 
 export async function loadHome() {
-  await loadPersonalTasks();
+  await loadDayTasks(STATE.selectedDate).catch(() => {});
+  renderDayItems();
+  await loadPersonalTasks({ onPage: () => renderDayItems() });
   // finance cache for calendar + daily view
   try { const mod = await import('./personal_finance.js'); await mod.loadFinanceCache(); } catch {}
   renderDayItems();
@@ -17,7 +19,7 @@ export function setFilter() { /* deprecated: day-based header */ }
 
 export function renderDayItems() {
   const iso = STATE.selectedDate;
-  const tasks = (STATE.tasksCache || []).filter(t => !t.done && t.status !== 'done' && String(t.deadline || '').slice(0,10) === iso);
+  const tasks = dayTasks(iso);
   const urgentCount = tasks.filter(t => isUrgentByDeadline(t.deadline, 3)).length;
 
   let financeItems = [];
@@ -73,9 +75,11 @@ export function renderDayItems() {
   }
 }
 
-window.addEventListener('date:changed', () => {
+window.addEventListener('date:changed', async () => {
   // re-render only when home is active
-  if (document.getElementById('home')?.classList.contains('active')) renderDayItems();
+  if (!document.getElementById('home')?.classList.contains('active')) return;
+  renderDayItems();
+  try { await loadDayTasks(STATE.selectedDate); renderDayItems(); } catch {}
 });
 window.addEventListener('date:filterChanged', () => {
   if (document.getElementById('home')?.classList.contains('active')) renderDayItems();
@@ -67,6 +67,16 @@ export function initRouting(defaultId = 'home') {
   });
 }
 
+// Live updates (core/events.js): reload the visible screen when its group changed.
+// The loaders go through delta sync / ETags, so this moves only the changed rows.
+window.addEventListener('group:changed', (e) => {
+  const active = document.querySelector('.screen.active')?.id;
+  const groupId = e.detail?.groupId;
+  // home and tasks show my tasks of every group, the personal cache only the personal group's
+  if (active === 'home' || active === 'tasks') loadCurrentScreen();
+  if (active === 'group_tasks' && groupId === STATE.selectedGroupId) loadCurrentScreen();
+});
+
 export function loadCurrentScreen() {
   const active = document.querySelector('.screen.active');
   if (!active) return;
@@ -1,8 +1,9 @@
-import { apiFetch } from '../core/api.js';
+import { apiFetch, apiFetchAllPages } from '../core/api.js';
 import { STATE } from '../core/state.js';
+import { beginSync, mergeById, pullChanges } from '../core/sync.js';
 import { escapeHtml, isUrgentByDeadline, filterTasksByMode } from '../core/utils.js';
 import { closeModal, openModal } from '../ui/modals.js';
-import { userDisplayName, fetchAllUsers } from './users.js';
+import { userDisplayName, fetchKnownUsers, bindAssigneeSearch } from './users.js';
 
 // ---- Render tasks list with pagination ----
 export function renderTaskList(containerId, tasks, page, key) {
@@ -76,21 +77,53 @@ export function renderTaskList(containerId, tasks, page, key) {
 }
 
 // ---- Data loaders ----
-export async function loadPersonalTasks() {
+export async function loadPersonalTasks({ onPage = null } = {}) {
   const groupId = Number(localStorage.getItem('default_group_id') || '1') || 1;
-  const data = await apiFetch(`/api/groups/${groupId}/tasks`);
-  STATE.tasksCache = data.items || [];
+  const key = `tasks:${groupId}`;
+
+  // warm cache: only the tasks changed since the last load
+  if (STATE.tasksCacheKey === key) {
+    const changes = await pullChanges(key, groupId);
+    if (changes) {
+      STATE.tasksCache = mergeById(STATE.tasksCache, changes.tasks);
+      if (onPage) onPage(STATE.tasksCache);
+      return;
+    }
+  }
+
+  await beginSync(key, groupId);
+  STATE.tasksCache = await apiFetchAllPages(`/api/groups/${groupId}/tasks`, {
+    onPage: (items) => {
+      STATE.tasksCache = items;
+      if (onPage) onPage(items);
+    },
+  });
+  STATE.tasksCacheKey = key;
 }
 
-export async function loadTasks(containerId = 'all-tasks') {
-  if (!STATE.tasksCache || STATE.tasksCache.length === 0) {
-    await loadPersonalTasks();
-  }
+// Open tasks due on `iso` where I am responsible or an assignee, in every group.
+// Repeated loads are conditional requests (304 while none of my groups changed).
+export async function loadDayTasks(iso) {
+  const items = await apiFetchAllPages('/api/me/tasks', {
+    params: { deadline_from: iso, deadline_to: iso, done: '0' },
+  });
+  const open = items.filter(t => t.status !== 'done');
+  if (STATE.selectedDate === iso) STATE.dayTasks = { iso, items: open };
+  return open;
+}
 
+// The selected day's tasks: from /api/me/tasks once loaded, until then from the personal cache.
+export function dayTasks(iso) {
+  if (STATE.dayTasks && STATE.dayTasks.iso === iso) return STATE.dayTasks.items;
+  return (STATE.tasksCache || []).filter(t => !t.done && t.status !== 'done' && String(t.deadline || '').slice(0, 10) === iso);
+}
+
+export async function loadTasks(containerId = 'all-tasks') {
   // По умолчанию экран "Задачи" показывает активные задачи на выбранную дату
   const iso = STATE.selectedDate;
-  const filtered = (STATE.tasksCache || []).filter(t => !t.done && t.status !== 'done' && String(t.deadline || '').slice(0, 10) === iso);
-  renderTaskList(containerId, filtered, STATE.tasksPage, 'tasks');
+  renderTaskList(containerId, dayTasks(iso), STATE.tasksPage, 'tasks');
+  await loadDayTasks(iso);
+  renderTaskList(containerId, dayTasks(iso), STATE.tasksPage, 'tasks');
 }
 
 // обновлять список задач при смене даты (только когда экран активен)
@@ -107,9 +140,9 @@ async function fetchGroupMembers(groupId) {
 }
 
 async function getAssigneeUniverse(groupId) {
-  const [members, allUsers] = await Promise.all([fetchGroupMembers(groupId), fetchAllUsers()]);
+  const [members, knownUsers] = await Promise.all([fetchGroupMembers(groupId), fetchKnownUsers()]);
   const map = new Map();
-  (allUsers || []).forEach(u => map.set(u.id, u));
+  (knownUsers || []).forEach(u => map.set(u.id, u));
   (members || []).forEach(u => map.set(u.id, u));
   const ids = [...map.keys()].sort((a, b) => a - b);
   return ids.map(id => map.get(id));
@@ -149,6 +182,7 @@ export async function openTaskModal(taskId) {
     cb.checked = selectedIds.has(u.id);
     container.appendChild(row);
   });
+  bindAssigneeSearch('task-assignee-search', 'task-assignees', { excludeIds: responsibleId ? [responsibleId] : [] });
 
   openModal('task-modal');
 }
@@ -1,11 +1,47 @@
-import { apiFetch } from '../core/api.js';
+import { apiFetch, apiFetchAllPages } from '../core/api.js';
 import { STATE } from '../core/state.js';
+import { escapeHtml } from '../core/utils.js';
 
-export async function fetchAllUsers() {
-  if (STATE.allUsersCache) return STATE.allUsersCache;
-  const data = await apiFetch('/api/users');
-  STATE.allUsersCache = data.items || [];
-  return STATE.allUsersCache;
+// Users who share at least one group with the current user
+export async function fetchKnownUsers() {
+  if (STATE.knownUsersCache) return STATE.knownUsersCache;
+  STATE.knownUsersCache = await apiFetchAllPages('/api/users', { params: { scope: 'shared' } });
+  return STATE.knownUsersCache;
+}
+
+export async function searchUsers(q, { limit = 20 } = {}) {
+  const qs = new URLSearchParams({ q, scope: 'all', limit: String(limit) });
+  const data = await apiFetch(`/api/users?${qs.toString()}`);
+  return data.items || [];
+}
+
+// Search box for an assignee picker: found users are appended as unchecked rows.
+export function bindAssigneeSearch(inputId, containerId, { excludeIds = [] } = {}) {
+  const input = document.getElementById(inputId);
+  if (!input) return;
+  input.value = '';
+
+  let timer = null;
+  input.oninput = () => {
+    clearTimeout(timer);
+    const q = input.value.trim();
+    if (q.replace(/^@/, '').length < 2) return;
+
+    timer = setTimeout(async () => {
+      const container = document.getElementById(containerId);
+      if (!container) return;
+      const found = await searchUsers(q).catch(() => []);
+      const present = new Set([...container.querySelectorAll('input[type="checkbox"]')].map(cb => Number(cb.value)));
+      excludeIds.forEach(id => present.add(id));
+
+      found.filter(u => !present.has(u.id)).forEach(u => {
+        const row = document.createElement('label');
+        row.className = 'assignee-item';
+        row.innerHTML = `<input type="checkbox" value="${u.id}"><span>${escapeHtml(userDisplayName(u))}</span>`;
+        container.appendChild(row);
+      });
+    }, 250);
+  };
 }
 
 export function userDisplayName(u) {
@@ -0,0 +1,91 @@
+"""Shared fixtures: a fresh app on a temporary SQLite file per test."""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Config reads the environment at import time
+_tmp = tempfile.mkdtemp(prefix="tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/unused.db"
+os.environ["LOG_DIR"] = _tmp
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["TELEGRAM_VALIDATE"] = "0"
+os.environ["BOT_TOKEN"] = ""
+os.environ["NOTIFY_WORKER"] = "off"
+os.environ["EVENTS_SERVER"] = "off"
+os.environ["EVENTS_URL"] = ""
+os.environ["METRICS_TOKEN"] = ""
+os.environ["JWT_SECRET_KEY"] = "tests-" + "x" * 32
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event  # noqa: E402
+
+from backend.app import create_app  # noqa: E402
+from backend.app.config import Config  # noqa: E402
+from backend.app.extensions import db  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path}/app.db")
+    app = create_app()
+    app.config["TESTING"] = True
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """login(tg_id) -> (auth headers, user dict) through the debug Telegram login."""
+
+    def login(tg_id: int, username: str | None = None) -> tuple[dict, dict]:
+        r = client.post(
+            "/api/auth/telegram",
+            json={"initData": "x", "debugUser": {"id": tg_id, "username": username, "first_name": f"U{tg_id}"}},
+        )
+        assert r.status_code == 200, r.get_json()
+        data = r.get_json()
+        return {"Authorization": f"Bearer {data['access_token']}"}, data["user"]
+
+    return login
+
+
+class StatementCounter:
+    """Counts the SQL statements sent to the engine while the block runs."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: list[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self) -> "StatementCounter":
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+@pytest.fixture
+def count_statements(app):
+    with app.app_context():
+        engine = db.engine
+    return lambda: StatementCounter(engine)
@@ -0,0 +1,67 @@
+"""BotApiClient keep-alive handling against a local HTTP server."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.app.utils.bot_api import BotApiClient, TelegramSendError
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        data = json.dumps({"ok": True, "result": {}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        # drop the connection without announcing it, like an idle keep-alive timeout
+        self.close_connection = self.server.drop_connections
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.requests, srv.delay, srv.drop_connections = 0, 0.0, False
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _client(server, **kwargs) -> BotApiClient:
+    return BotApiClient(f"http://127.0.0.1:{server.server_address[1]}", "123:test", pool_size=1, **kwargs)
+
+
+def test_connection_closed_by_the_server_is_reopened_once(server):
+    server.drop_connections = True
+    client = _client(server, max_retries=0)
+    for chat_id in range(3):
+        client.send_message(chat_id, "hi")
+    assert server.requests == 3
+    client.close()
+
+
+def test_timeout_on_a_reused_connection_is_not_retried_silently(server):
+    client = _client(server, timeout=0.3, max_retries=0)
+    client.send_message(1, "warm up")  # leaves an idle keep-alive connection
+
+    server.delay = 0.6
+    with pytest.raises(TelegramSendError):
+        client.send_message(2, "slow")
+    time.sleep(0.5)
+    assert server.requests == 2
+    client.close()
@@ -0,0 +1,222 @@
+"""Live group events: the web app's ticket and redirect, and the aiohttp hub (utils/events.py)."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from aiohttp.test_utils import TestClient, TestServer
+from sqlalchemy import update
+
+from backend.app.extensions import db
+from backend.app.models import Group
+from backend.app.utils.changes import latest_change_id, record_changes
+from backend.app.utils.events import HUB, create_events_app
+from backend.app.utils.tickets import issue_events_ticket
+
+
+def test_no_event_hub_answers_204(client):
+    for method in (client.get, client.head):
+        r = method("/api/groups/1/events?ticket=t")
+        assert r.status_code == 204
+        assert r.data == b""
+
+
+def test_redirect_keeps_the_ticket_and_drops_a_token(app, client):
+    app.config["EVENTS_URL"] = "https://events.example.org/"
+    r = client.get("/api/groups/7/events?token=jwt&ticket=t&last_event_id=3")
+    assert r.status_code == 307
+    assert r.headers["Location"] == "https://events.example.org/api/groups/7/events?ticket=t&last_event_id=3"
+    r = client.get("/api/groups/7/events?token=jwt")
+    assert r.headers["Location"] == "https://events.example.org/api/groups/7/events"
+
+
+def test_ticket_needs_a_login_and_membership(client, login):
+    h, _ = login(1, "alice")
+    gid = client.post("/api/groups", json={"name": "G"}, headers=h).get_json()["id"]
+    h2, _ = login(2, "bob")
+
+    assert client.post(f"/api/groups/{gid}/events/ticket").status_code == 401
+    assert client.post(f"/api/groups/{gid}/events/ticket", headers=h2).status_code == 403
+    data = client.post(f"/api/groups/{gid}/events/ticket", headers=h).get_json()
+    assert data["ok"] and data["expires_in"] == 60
+    # a ticket opens an event stream, nothing else
+    assert client.get("/api/groups", headers={"Authorization": f"Bearer {data['ticket']}"}).status_code in (401, 422)
+
+
+# --- the hub ---
+
+def _group(client, login) -> tuple[dict, int]:
+    h, _ = login(1, "alice")
+    return h, client.post("/api/groups", json={"name": "G"}, headers=h).get_json()["id"]
+
+
+def _ticket(client, h: dict, gid: int) -> str:
+    return client.post(f"/api/groups/{gid}/events/ticket", headers=h).get_json()["ticket"]
+
+
+def _changes(app, gid: int, *task_ids: int) -> None:
+    """Log changes in one transaction, so the hub's poller sees them in one batch."""
+    with app.app_context():
+        record_changes(gid, "task", list(task_ids))
+        db.session.commit()
+
+
+def _hub(app, **config):
+    app.config.update({"EVENTS_POLL_INTERVAL": 0.02, "EVENTS_HEARTBEAT": 5, **config})
+    return TestClient(TestServer(create_events_app(app)))
+
+
+async def _connect(hub: TestClient, gid: int, ticket: str, **headers: str):
+    resp = await hub.get(f"/api/groups/{gid}/events", params={"ticket": ticket}, headers=headers)
+    assert resp.status == 200, await resp.text()
+    assert resp.headers["Content-Type"] == "text/event-stream"
+    assert (await _read(resp)).startswith("retry: ")
+    return resp
+
+
+async def _read(resp) -> str:
+    return (await asyncio.wait_for(resp.content.readuntil(b"\n\n"), 5)).decode().strip()
+
+
+async def _event(resp) -> tuple[str, int | None, str]:
+    """(event, id, data) of the next event, skipping heartbeats."""
+    while True:
+        raw = await _read(resp)
+        if raw.startswith(":"):
+            continue
+        fields = dict(line.split(": ", 1) for line in raw.splitlines())
+        return fields["event"], int(fields["id"]) if "id" in fields else None, fields["data"]
+
+
+def test_changes_fan_out_to_every_client_of_the_group(app, client, login):
+    h, gid = _group(client, login)
+    other = client.post("/api/groups", json={"name": "Other"}, headers=h).get_json()["id"]
+
+    async def scenario():
+        async with _hub(app) as hub:
+            streams = [await _connect(hub, gid, _ticket(client, h, gid)) for _ in range(2)]
+            for resp in streams:
+                assert (await _event(resp))[0] == "ready"
+            _changes(app, other, 9)
+            _changes(app, gid, 1, 2)
+            with app.app_context():
+                last = latest_change_id(gid)
+            for resp in streams:
+                assert [await _event(resp) for _ in range(2)] == [
+                    ("change", last - 1, '{"entity":"task","id":1}'),
+                    ("change", last, '{"entity":"task","id":2}'),
+                ]
+            assert hub.server.app[HUB].clients == 2
+
+    asyncio.run(scenario())
+
+
+def test_last_event_id_resumes_from_the_log(app, client, login):
+    h, gid = _group(client, login)
+
+    async def scenario():
+        async with _hub(app) as hub:
+            resp = await _connect(hub, gid, _ticket(client, h, gid))
+            event, ready_id, _ = await _event(resp)
+            assert event == "ready"
+            resp.close()
+
+            _changes(app, gid, 5, 6)  # while disconnected
+            resp = await _connect(hub, gid, _ticket(client, h, gid), **{"Last-Event-ID": str(ready_id)})
+            replay = [await _event(resp) for _ in range(3)]
+            assert [(e, d) for e, _, d in replay] == [
+                ("change", '{"entity":"task","id":5}'),
+                ("change", '{"entity":"task","id":6}'),
+                ("ready", "{}"),
+            ]
+            assert replay[2][1] >= replay[1][1] > replay[0][1] > ready_id
+
+    asyncio.run(scenario())
+
+
+def test_resume_below_the_compacted_log_resets(app, client, login):
+    h, gid = _group(client, login)
+    _changes(app, gid, 1, 2, 3)
+    with app.app_context():
+        floor = latest_change_id(gid)
+        db.session.execute(update(Group).where(Group.id == gid).values(changes_floor=floor))
+        db.session.commit()
+
+    async def scenario():
+        async with _hub(app) as hub:
+            resp = await _connect(hub, gid, _ticket(client, h, gid), **{"Last-Event-ID": str(floor - 1)})
+            assert (await _event(resp))[0] == "reset"
+            resp = await _connect(hub, gid, _ticket(client, h, gid), **{"Last-Event-ID": str(floor)})
+            assert (await _event(resp))[0] == "ready"
+
+    asyncio.run(scenario())
+
+
+def test_a_client_that_falls_behind_gets_a_reset(app, client, login):
+    h, gid = _group(client, login)
+
+    async def scenario():
+        async with _hub(app, EVENTS_CLIENT_QUEUE=1) as hub:
+            resp = await _connect(hub, gid, _ticket(client, h, gid))
+            assert (await _event(resp))[0] == "ready"
+            _changes(app, gid, 1, 2, 3)  # one poll, three events, room for one
+            with app.app_context():
+                last = latest_change_id(gid)
+            assert await _event(resp) == ("reset", last, "{}")
+
+    asyncio.run(scenario())
+
+
+def test_the_stream_ends_when_the_login_expires(app, client, login):
+    h, gid = _group(client, login)
+    with app.app_context():
+        ticket = issue_events_ticket(1, gid, time.time() + 0.3)
+
+    async def scenario():
+        async with _hub(app) as hub:
+            resp = await _connect(hub, gid, ticket)
+            assert (await _event(resp))[0] == "ready"
+            assert await _event(resp) == ("expired", None, "{}")
+            assert await asyncio.wait_for(resp.content.read(), 5) == b""
+
+    asyncio.run(scenario())
+
+
+def test_idle_streams_get_heartbeats(app, client, login):
+    h, gid = _group(client, login)
+
+    async def scenario():
+        async with _hub(app, EVENTS_HEARTBEAT=0.05) as hub:
+            resp = await _connect(hub, gid, _ticket(client, h, gid))
+            assert (await _event(resp))[0] == "ready"
+            assert await _read(resp) == ": ping"
+            assert await _read(resp) == ": ping"
+
+    asyncio.run(scenario())
+
+
+def test_hub_accepts_only_a_valid_ticket_of_a_member(app, client, login):
+    h, gid = _group(client, login)
+    other = client.post("/api/groups", json={"name": "Other"}, headers=h).get_json()["id"]
+    login(2, "bob")
+    with app.app_context():
+        outsider = issue_events_ticket(2, gid, None)
+
+    async def scenario():
+        async with _hub(app, EVENTS_TICKET_TTL=1) as hub:
+            url = f"/api/groups/{gid}/events"
+            ticket = _ticket(client, h, gid)
+            assert (await hub.get(url)).status == 401
+            assert (await hub.get(url, params={"token": h["Authorization"].split()[1]})).status == 401
+            assert (await hub.get(url, params={"ticket": ticket + "x"})).status == 401
+            assert (await hub.get(url, params={"ticket": _ticket(client, h, other)})).status == 401
+            assert (await hub.get(url, params={"ticket": outsider})).status == 403
+            # non-browser clients may still send the JWT in the header
+            resp = await hub.get(url, headers=h)
+            assert resp.status == 200
+            resp.close()
+            await asyncio.sleep(2.1)  # tickets are signed with a whole-second timestamp
+            assert (await hub.get(url, params={"ticket": ticket})).status == 401
+
+    asyncio.run(scenario())
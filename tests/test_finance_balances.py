@@ -0,0 +1,98 @@
+"""Stored group balances and daily rollups stay equal to a recompute from the ledger."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from backend.app.extensions import db
+from backend.app.models import GroupFinanceBalance, GroupFinanceCategory, GroupFinanceItem
+from backend.app.utils.finance import check_group_balances, delete_group_finance_item, update_group_finance_item
+from backend.app.utils.rollups import check_rollups
+
+
+def test_new_groups_have_a_balance_row(app, client, login):
+    h, _ = login(1, "alice")  # provisions the personal group
+    client.post("/api/groups", json={"name": "G"}, headers=h)
+    groups = [g["id"] for g in client.get("/api/groups", headers=h).get_json()["items"]]
+    with app.app_context():
+        rows = {row.group_id: row.balance for row in GroupFinanceBalance.query.all()}
+    assert len(groups) == 2
+    assert rows == {gid: 0 for gid in groups}
+
+
+def _writes(statements: list[str]) -> list[str]:
+    return [s for s in statements if s.split(None, 1)[0].upper() in ("INSERT", "UPDATE", "DELETE")]
+
+
+def test_reading_a_balance_does_not_write(app, client, login, count_statements):
+    h, _ = login(1, "alice")
+    gid = client.post("/api/groups", json={"name": "G"}, headers=h).get_json()["id"]
+    client.post(f"/api/groups/{gid}/finance", json={"kind": "income", "amount": 500}, headers=h)
+
+    with count_statements() as counter:
+        for path in ("finance", "finance/balance", "changes"):
+            assert client.get(f"/api/groups/{gid}/{path}", headers=h).status_code == 200
+    assert _writes(counter.statements) == []
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_random_ledger_writes_keep_balances_exact(app, client, login, seed):
+    rng = random.Random(seed)
+    h, _ = login(1, "alice")
+    groups = [client.post("/api/groups", json={"name": f"G{i}"}, headers=h).get_json()["id"] for i in range(3)]
+
+    for _ in range(300):
+        gid = rng.choice(groups)
+        with app.app_context():
+            categories = [c for (c,) in db.session.query(GroupFinanceCategory.id).filter_by(group_id=gid)]
+            items = [i for (i,) in db.session.query(GroupFinanceItem.id).filter_by(group_id=gid)]
+        roll = rng.random()
+        if roll < 0.6 or not items:
+            r = client.post(f"/api/groups/{gid}/finance", headers=h, json={
+                "kind": rng.choice(["income", "expense"]),
+                "amount": rng.randint(1, 10_000),
+                "category_id": rng.choice(categories) if categories else None,
+            })
+            assert r.status_code == 200, r.get_json()
+        elif roll < 0.95:
+            with app.app_context():
+                item = db.session.get(GroupFinanceItem, rng.choice(items))
+                if roll < 0.8:
+                    update_group_finance_item(item, rng.choice(["income", "expense"]), rng.randint(1, 10_000))
+                else:
+                    delete_group_finance_item(item)
+                db.session.commit()
+        elif categories:
+            r = client.delete(f"/api/groups/{gid}/finance/categories", headers=h, json={"id": rng.choice(categories)})
+            assert r.status_code == 200, r.get_json()
+
+    with app.app_context():
+        assert check_group_balances() == []
+        assert check_rollups() == []
+        balances = {row.group_id: row.balance for row in GroupFinanceBalance.query.filter(GroupFinanceBalance.group_id.in_(groups))}
+    for gid in groups:
+        assert client.get(f"/api/groups/{gid}/finance/balance", headers=h).get_json()["item"]["balance"] == balances[gid]
+
+
+def test_missing_row_reads_as_zero_and_the_next_write_builds_it(app, client, login, count_statements):
+    h, _ = login(1, "alice")
+    gid = client.post("/api/groups", json={"name": "G"}, headers=h).get_json()["id"]
+    for kind, amount in (("income", 700), ("expense", 200), ("expense", 50)):
+        client.post(f"/api/groups/{gid}/finance", json={"kind": kind, "amount": amount}, headers=h)
+    with app.app_context():
+        db.session.execute(db.delete(GroupFinanceBalance).where(GroupFinanceBalance.group_id == gid))
+        db.session.commit()
+
+    with count_statements() as counter:
+        item = client.get(f"/api/groups/{gid}/finance/balance", headers=h).get_json()["item"]
+        assert client.get(f"/api/groups/{gid}/finance", headers=h).get_json()["balance"] == 0
+    assert (item["balance"], item["items_count"]) == (0, 0)
+    assert _writes(counter.statements) == []
+
+    client.post(f"/api/groups/{gid}/finance", json={"kind": "income", "amount": 1}, headers=h)
+    item = client.get(f"/api/groups/{gid}/finance/balance", headers=h).get_json()["item"]
+    assert (item["balance"], item["income_total"], item["expense_total"], item["items_count"]) == (451, 701, 250, 4)
+    with app.app_context():
+        assert check_group_balances() == []
@@ -0,0 +1,42 @@
+"""Conditional GETs of the group finance lists."""
+
+from __future__ import annotations
+
+import pytest
+
+from backend.app.extensions import db
+from backend.app.models import GroupFinanceCategory, GroupPaymentMethod
+from backend.app.utils.versions import group_etag
+
+PATHS = ("finance", "finance/categories", "finance/methods")
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_not_modified_skips_the_defaults_probe(client, login, count_statements, path):
+    h, _ = login(1, "alice")
+    gid = client.post("/api/groups", json={"name": "G"}, headers=h).get_json()["id"]
+    etag = client.get(f"/api/groups/{gid}/{path}", headers=h).headers["ETag"]
+
+    with count_statements() as counter:
+        r = client.get(f"/api/groups/{gid}/{path}", headers={**h, "If-None-Match": etag})
+    assert r.status_code == 304
+    probes = [s for s in counter.statements if "group_finance_categories" in s or "group_payment_methods" in s]
+    assert probes == []
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_defaults_created_on_a_get_change_the_etag(app, client, login, path):
+    h, _ = login(1, "alice")
+    gid = client.post("/api/groups", json={"name": "G"}, headers=h).get_json()["id"]
+    with app.app_context():
+        GroupFinanceCategory.query.filter_by(group_id=gid).delete()
+        GroupPaymentMethod.query.filter_by(group_id=gid).delete()
+        db.session.commit()
+        stale = group_etag(gid)
+
+    r = client.get(f"/api/groups/{gid}/{path}", headers=h)
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+    assert etag.strip('W/"') != stale
+    assert client.get(f"/api/groups/{gid}/{path}", headers={**h, "If-None-Match": etag}).status_code == 304
+    assert len(client.get(f"/api/groups/{gid}/finance/categories", headers=h).get_json()["items"]) == 5
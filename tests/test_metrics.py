@@ -0,0 +1,97 @@
+"""GET /metrics and its optional bearer token."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+
+from backend.app.utils.metrics import BUCKETS, EXITED_FILE, Registry, _process_start, render_prometheus
+
+
+def test_open_without_a_token(client):
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.mimetype == "text/plain"
+
+
+def test_token_is_required_when_configured(app, client):
+    app.config["METRICS_TOKEN"] = "s3cret"
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3crét"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def _snapshot_file(directory, name: str, pid: int, started: str | None, calls: float) -> None:
+    (directory / name).write_text(json.dumps({
+        "pid": pid,
+        "started": started,
+        "counters": [["app_calls_total", [["handler", "x"]], calls]],
+        "histograms": [["app_call_duration_seconds", [["handler", "x"]], [1] + [0] * len(BUCKETS) + [0.001, 1]]],
+        "gauges": [["app_db_pool_size", [], 5.0]],
+    }))
+
+
+def _calls(registry: Registry) -> float:
+    text = render_prometheus(registry.collect())
+    line = next(line for line in text.splitlines() if line.startswith('app_calls_total{handler="x"}'))
+    return float(line.split()[-1])
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_exited_processes_are_folded_once(tmp_path):
+    registry = Registry(str(tmp_path))
+    registry.inc("app_calls_total", 2, handler="x")
+    _snapshot_file(tmp_path, "metrics-1-dead.json", _dead_pid(), None, 5)
+
+    assert _calls(registry) == 7
+    assert not (tmp_path / "metrics-1-dead.json").exists()
+    assert json.loads((tmp_path / EXITED_FILE).read_text())["counters"] == [["app_calls_total", [["handler", "x"]], 5]]
+
+    registry.inc("app_calls_total", 1, handler="x")
+    assert _calls(registry) == 8
+    text = render_prometheus(registry.collect())
+    assert 'app_call_duration_seconds_count{handler="x"} 1' in text
+    assert "app_db_pool_size 5" not in text  # gauges of exited processes are dropped
+    assert sorted(p.name for p in tmp_path.glob("metrics-*.json")) == sorted([EXITED_FILE, f"metrics-{registry.instance}.json"])
+
+
+def test_reused_pid_does_not_overwrite_or_lower_counters(tmp_path):
+    # an earlier process had our pid: same pid, different start time
+    _snapshot_file(tmp_path, f"metrics-{os.getpid()}-earlier.json", os.getpid(), "0", 40)
+    registry = Registry(str(tmp_path))
+    registry.inc("app_calls_total", 3, handler="x")
+
+    assert _calls(registry) == 43
+    assert not (tmp_path / f"metrics-{os.getpid()}-earlier.json").exists()
+    assert _calls(registry) == 43
+
+
+def test_live_processes_stay_separate(tmp_path):
+    _snapshot_file(tmp_path, "metrics-parent.json", os.getppid(), _process_start(os.getppid()), 4)
+    registry = Registry(str(tmp_path))
+    registry.inc("app_calls_total", 1, handler="x")
+
+    assert _calls(registry) == 5
+    assert (tmp_path / "metrics-parent.json").exists()
+    assert "app_db_pool_size 5" in render_prometheus(registry.collect())
+
+
+def test_without_a_token_only_direct_local_requests(client):
+    assert client.get("/metrics", environ_base={"REMOTE_ADDR": "::1"}).status_code == 200
+    assert client.get("/metrics", environ_base={"REMOTE_ADDR": "10.0.0.5"}).status_code == 403
+    assert client.get("/metrics", headers={"X-Forwarded-For": "203.0.113.7"}).status_code == 403
+    assert client.get("/metrics", headers={"X-Real-IP": "203.0.113.7"}).status_code == 403
+
+
+def test_token_allows_remote_scrapes(app, client):
+    app.config["METRICS_TOKEN"] = "s3cret"
+    r = client.get("/metrics", headers={"Authorization": "Bearer s3cret", "X-Forwarded-For": "203.0.113.7"})
+    assert r.status_code == 200
@@ -0,0 +1,80 @@
+"""Schema migrations and their helpers on temporary SQLite databases."""
+
+from __future__ import annotations
+
+from sqlalchemy import inspect, text
+
+from backend.app.extensions import db
+from backend.app.models import GroupFinanceBalance, GroupFinanceDaily
+from backend.app.utils.finance import check_group_balances
+from backend.app.utils.migrations import migrate, rebuild_table
+from backend.app.utils.rollups import check_rollups
+
+
+def test_rebuild_table_keeps_rows_indexes_and_foreign_keys(app):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            expected_fks = inspect(conn).get_foreign_keys("group_members")
+            # an older shape: permissions in one text column, an index the model no longer has
+            conn.execute(text("DROP TABLE group_members"))
+            conn.execute(text(
+                "CREATE TABLE group_members (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+                "group_id INTEGER NOT NULL, perms VARCHAR(2) NOT NULL, created_at DATETIME NOT NULL)"
+            ))
+            conn.execute(text("CREATE INDEX ix_group_members_perms ON group_members (perms)"))
+            conn.execute(text(
+                "INSERT INTO group_members (id, user_id, group_id, perms, created_at) VALUES "
+                "(1, 10, 100, 'tf', '2024-01-02 03:04:05.000000'), "
+                "(2, 11, 100, 'ft', '2024-01-03 03:04:05.000000'), "
+                "(5, 10, 101, 'tt', '2024-01-04 03:04:05.000000')"
+            ))
+
+            rebuild_table(conn, "group_members", copy={
+                "can_tasks": "substr(perms, 1, 1) = 't'",
+                "can_finance": "substr(perms, 2, 1) = 't'",
+            })
+
+            rows = conn.execute(text(
+                "SELECT id, user_id, group_id, can_tasks, can_finance, created_at FROM group_members ORDER BY id"
+            )).all()
+            insp = inspect(conn)
+            columns = [c["name"] for c in insp.get_columns("group_members")]
+            indexes = {i["name"]: (i["column_names"], bool(i["unique"])) for i in insp.get_indexes("group_members")}
+            fks = insp.get_foreign_keys("group_members")
+            tables = insp.get_table_names()
+
+    assert rows == [
+        (1, 10, 100, 1, 0, "2024-01-02 03:04:05.000000"),
+        (2, 11, 100, 0, 1, "2024-01-03 03:04:05.000000"),
+        (5, 10, 101, 1, 1, "2024-01-04 03:04:05.000000"),
+    ]
+    assert columns == ["id", "user_id", "group_id", "can_tasks", "can_finance", "created_at"]
+    assert indexes == {
+        "ix_group_members_user_id": (["user_id"], False),
+        "uq_group_members_group_id_user_id": (["group_id", "user_id"], True),
+    }
+    assert sorted(fks, key=lambda fk: fk["referred_table"]) == sorted(expected_fks, key=lambda fk: fk["referred_table"])
+    assert {fk["referred_table"] for fk in fks} == {"users", "groups"}
+    assert "_group_members_rebuild" not in tables
+
+
+def test_finance_migrations_rebuild_rollups_and_balances(app, client, login):
+    h, _ = login(1, "alice")
+    gids = [client.post("/api/groups", json={"name": f"G{i}"}, headers=h).get_json()["id"] for i in range(3)]
+    categories = client.get(f"/api/groups/{gids[0]}/finance/categories", headers=h).get_json()["items"]
+    for n, (kind, amount) in enumerate((("income", 500), ("expense", 120), ("expense", 80), ("income", 7))):
+        client.post(f"/api/groups/{gids[n % 2]}/finance", headers=h, json={
+            "kind": kind, "amount": amount, "category_id": categories[n % 2]["id"] if n % 2 == 0 else None,
+        })
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(db.delete(GroupFinanceDaily))
+            conn.execute(db.delete(GroupFinanceBalance))
+            conn.execute(text("DELETE FROM schema_version WHERE version >= 7"))
+        assert migrate() == 2
+
+        assert check_rollups() == []
+        assert check_group_balances() == []
+        balances = {row.group_id: row.balance for row in GroupFinanceBalance.query.filter(GroupFinanceBalance.group_id.in_(gids))}
+    assert balances == {gids[0]: 420, gids[1]: -113, gids[2]: 0}
@@ -0,0 +1,152 @@
+"""Outbox delivery against a local fake Bot API: sent, retried and dead-lettered messages."""
+
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.app.extensions import db
+from backend.app.models import NotificationOutbox
+from backend.app.utils.outbox import deliver_due, enqueue_message
+
+OK, RATE_LIMITED, SERVER_ERROR, BLOCKED = 1, 2, 3, 4
+
+
+class FakeBotApi(ThreadingHTTPServer):
+    """Answers sendMessage by chat_id; `script[chat_id]` lists responses, the last one repeats."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.requests: list[dict] = []
+        self.script: dict[int, list[tuple[int, dict]]] = {
+            OK: [(200, {"ok": True, "result": {}})],
+            RATE_LIMITED: [(429, {"ok": False, "description": "Too Many Requests", "parameters": {"retry_after": 30}})],
+            SERVER_ERROR: [(500, {"ok": False, "description": "Internal Server Error"})],
+            BLOCKED: [(403, {"ok": False, "description": "Forbidden: bot was blocked by the user"})],
+        }
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def respond(self, body: dict) -> tuple[int, dict]:
+        self.requests.append(body)
+        responses = self.script[body["chat_id"]]
+        return responses.pop(0) if len(responses) > 1 else responses[0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        status, payload = self.server.respond(body)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def bot_api(app):
+    server = FakeBotApi()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app.config.update(
+        BOT_TOKEN="123:test",
+        TELEGRAM_API_URL=server.url,
+        TELEGRAM_MAX_RETRIES=0,
+        NOTIFY_MAX_ATTEMPTS=3,
+        NOTIFY_BACKOFF_BASE=5,
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _queue(app, *chat_ids) -> dict[int, int]:
+    with app.app_context():
+        rows = {chat_id: enqueue_message(None, chat_id, f"hello {chat_id}") for chat_id in chat_ids}
+        db.session.commit()
+        return {chat_id: row.id for chat_id, row in rows.items()}
+
+
+def _rows(app, ids: dict[int, int]) -> dict[int, NotificationOutbox]:
+    with app.app_context():
+        rows = {chat_id: db.session.get(NotificationOutbox, row_id) for chat_id, row_id in ids.items()}
+        db.session.expunge_all()
+        return rows
+
+
+def _make_due(app) -> None:
+    with app.app_context():
+        NotificationOutbox.query.update({"next_attempt_at": datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+
+
+def test_deliver_due_sends_retries_and_dead_letters(app, bot_api):
+    ids = _queue(app, OK, RATE_LIMITED, SERVER_ERROR, BLOCKED)
+    started = datetime.utcnow()
+    with app.app_context():
+        assert deliver_due() == 1
+
+    rows = _rows(app, ids)
+    assert (rows[OK].status, rows[OK].attempts, rows[OK].last_error) == ("sent", 1, None)
+    assert rows[OK].sent_at is not None
+    assert bot_api.requests[0] == {"chat_id": OK, "text": f"hello {OK}"}
+
+    # retry_after longer than TELEGRAM_MAX_RETRY_AFTER is left to the outbox
+    assert rows[RATE_LIMITED].status == "pending"
+    assert "HTTP 429" in rows[RATE_LIMITED].last_error
+    assert rows[RATE_LIMITED].next_attempt_at >= started + timedelta(seconds=29)
+
+    assert rows[SERVER_ERROR].status == "pending"
+    assert "HTTP 500" in rows[SERVER_ERROR].last_error
+    assert started + timedelta(seconds=4) <= rows[SERVER_ERROR].next_attempt_at <= started + timedelta(seconds=60)
+
+    assert rows[BLOCKED].status == "dead"
+    assert "blocked" in rows[BLOCKED].last_error
+
+    # nothing is due until the backoff passes
+    with app.app_context():
+        assert deliver_due() == 0
+    assert len(bot_api.requests) == 4
+
+
+def test_transient_errors_are_retried_until_max_attempts(app, bot_api):
+    bot_api.script[RATE_LIMITED].insert(0, bot_api.script[RATE_LIMITED][0])
+    bot_api.script[RATE_LIMITED].append((200, {"ok": True, "result": {}}))
+    ids = _queue(app, RATE_LIMITED, SERVER_ERROR)
+
+    for _ in range(3):
+        with app.app_context():
+            deliver_due()
+        _make_due(app)
+
+    rows = _rows(app, ids)
+    assert (rows[RATE_LIMITED].status, rows[RATE_LIMITED].attempts) == ("sent", 3)
+    assert (rows[SERVER_ERROR].status, rows[SERVER_ERROR].attempts) == ("dead", 3)
+
+    with app.app_context():
+        assert deliver_due() == 0
+
+
+def test_short_retry_after_is_honored_inside_one_delivery(app, bot_api):
+    app.config["TELEGRAM_MAX_RETRIES"] = 1
+    bot_api.script[RATE_LIMITED] = [
+        (429, {"ok": False, "parameters": {"retry_after": 1}}),
+        (200, {"ok": True, "result": {}}),
+    ]
+    ids = _queue(app, RATE_LIMITED)
+    with app.app_context():
+        assert deliver_due() == 1
+    assert _rows(app, ids)[RATE_LIMITED].attempts == 1
+    assert len(bot_api.requests) == 2
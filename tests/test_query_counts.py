@@ -0,0 +1,64 @@
+"""List endpoints issue a fixed number of statements, however many rows they return."""
+
+from __future__ import annotations
+
+
+def _group_with_two_members(client, login):
+    h, alice = login(1, "alice")
+    _, bob = login(2, "bob")
+    gid = client.post("/api/groups", json={"name": "G"}, headers=h).get_json()["id"]
+    categories = client.get(f"/api/groups/{gid}/finance/categories", headers=h).get_json()["items"]
+    methods = client.get(f"/api/groups/{gid}/finance/methods", headers=h).get_json()["items"]
+    return h, gid, [alice["id"], bob["id"]], [c["id"] for c in categories], [m["id"] for m in methods]
+
+
+def _add_rows(client, h, gid, members, categories, methods, start, stop):
+    for i in range(start, stop):
+        r = client.post(
+            f"/api/groups/{gid}/tasks",
+            json={"title": f"t{i}", "responsible_id": members[i % 2], "assignee_ids": members},
+            headers=h,
+        )
+        assert r.status_code == 200, r.get_json()
+        r = client.post(
+            f"/api/groups/{gid}/finance",
+            json={
+                "kind": "income" if i % 3 else "expense",
+                "amount": 100 + i,
+                "category_id": categories[i % len(categories)],
+                "method_id": methods[i % len(methods)],
+            },
+            headers=h,
+        )
+        assert r.status_code == 200, r.get_json()
+
+
+def _count(client, count_statements, path, h, expected_items):
+    with count_statements() as counter:
+        r = client.get(path, headers=h)
+    assert r.status_code == 200
+    assert len(r.get_json()["items"]) == expected_items
+    return counter.count
+
+
+def test_tasks_and_finance_lists_do_not_grow_with_rows(client, login, count_statements):
+    h, gid, members, categories, methods = _group_with_two_members(client, login)
+    tasks, finance = f"/api/groups/{gid}/tasks", f"/api/groups/{gid}/finance"
+
+    _add_rows(client, h, gid, members, categories, methods, 0, 3)
+    few = [_count(client, count_statements, path, h, 3) for path in (tasks, finance)]
+    _add_rows(client, h, gid, members, categories, methods, 3, 30)
+    many = [_count(client, count_statements, path, h, 30) for path in (tasks, finance)]
+
+    assert few == many
+
+
+def test_group_list_does_not_grow_with_groups(client, login, count_statements):
+    h, _ = login(1, "alice")  # provisioned with a default group
+    one = _count(client, count_statements, "/api/groups", h, 1)
+
+    for i in range(29):
+        assert client.post("/api/groups", json={"name": f"G{i}"}, headers=h).status_code == 200
+    many = _count(client, count_statements, "/api/groups", h, 30)
+
+    assert one == many
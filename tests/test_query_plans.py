@@ -0,0 +1,195 @@
+"""EXPLAIN QUERY PLAN check for the SQL every API endpoint runs.
+
+Drives each api/web route once through the test client, captures the
+statements it executes and fails if any plan walks a whole table (or a whole
+index of it) that is not listed in EXPECTED_SCANS.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+
+from sqlalchemy import event
+
+from backend.app.extensions import db
+
+# full scans that are accepted, per endpoint label -> table names (keep a reason next to each)
+EXPECTED_SCANS: dict[str, set[str]] = {}
+
+# a whole table or a whole index walked row by row: "SCAN t", "SCAN t USING [COVERING] INDEX i"
+_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$")
+
+
+class Capture:
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, tuple]] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if executemany or not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            return
+        self.statements.append((statement, tuple(parameters or ())))
+
+
+def explain(raw, statement: str, parameters: tuple) -> list[str]:
+    cur = raw.cursor()
+    try:
+        cur.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[3] for row in cur.fetchall()]
+    finally:
+        cur.close()
+
+
+def full_scans(plan: list[str], tables: set[str]) -> set[str]:
+    scanned = set()
+    for detail in plan:
+        m = _SCAN.match(detail)
+        if m and m.group(1) in tables:
+            scanned.add(m.group(1))
+    return scanned
+
+
+def scenario(client, bot_api_key: str) -> tuple[list[tuple[str, Callable[[], object]]], dict[str, int], dict[str, dict]]:
+    """Ordered (label, request) pairs covering every route; later steps use ids from earlier ones."""
+    bot = {"X-Bot-Api-Key": bot_api_key}
+    ids: dict[str, int] = {}
+    auth: dict[str, dict] = {}
+
+    def login(key: str, tg_id: int, username: str) -> object:
+        user = {"id": tg_id, "username": username, "first_name": username.title()}
+        r = client.post("/api/auth/telegram", json={"initData": "-", "debugUser": user})
+        auth[key] = {"Authorization": f"Bearer {r.get_json()['access_token']}"}
+        return r
+
+    def post_json(key: str, url: str, payload: dict, remember: str | None = None):
+        def call():
+            r = client.post(url.format(**ids), json=payload, headers=auth[key])
+            if remember:
+                ids[remember] = r.get_json()["id"]
+            return r
+        return call
+
+    def get(key: str, url: str):
+        return lambda: client.get(url.format(**ids), headers=auth[key])
+
+    def accept_invite():
+        r = client.post("/api/bot/invites/pending", json={"tg_id": 9002, "username": "bravo"}, headers=bot)
+        ids["invite"] = r.get_json()["items"][0]["id"]
+        return client.post("/api/bot/invites/{invite}/accept".format(**ids), json={"tg_id": 9002}, headers=bot)
+
+    return [
+        ("POST /api/auth/telegram", lambda: login("a", 9001, "alpha")),
+        ("POST /api/auth/telegram (second user)", lambda: login("b", 9002, "bravo")),
+        ("GET /api/me", get("a", "/api/me")),
+        ("POST /api/bot/start", lambda: client.post(
+            "/api/bot/start", json={"tg_id": 9001, "username": "alpha", "first_name": "Alpha", "include_invites": True}, headers=bot)),
+        ("GET /api/settings/notifications", get("a", "/api/settings/notifications")),
+        ("PATCH /api/settings/notifications", lambda: client.patch(
+            "/api/settings/notifications", json={"notify_new_task": True, "notify_task_updates": True}, headers=auth["a"])),
+        ("POST /api/groups", post_json("a", "/api/groups", {"name": "Plans"}, remember="gid")),
+        ("POST /api/groups/<gid>/invites/username", post_json("a", "/api/groups/{gid}/invites/username", {"username": "bravo"})),
+        ("POST /api/bot/invites/pending + accept", accept_invite),
+        ("POST /api/groups/<gid>/invites/username (decline)", post_json("a", "/api/groups/{gid}/invites/username", {"username": "charlie"}, remember="invite2")),
+        ("POST /api/auth/telegram (third user)", lambda: login("c", 9003, "charlie")),
+        ("POST /api/bot/invites/<id>/decline", lambda: client.post(
+            "/api/bot/invites/{invite2}/decline".format(**ids), json={"tg_id": 9003}, headers=bot)),
+        ("GET /api/groups", get("a", "/api/groups")),
+        ("GET /api/groups/<gid>/members", get("a", "/api/groups/{gid}/members")),
+        ("GET /api/users", get("a", "/api/users?q=br")),
+        ("GET /api/users?scope=all", get("a", "/api/users?q=br&scope=all")),
+        ("GET /api/users?match=contains", get("a", "/api/users?q=rav&match=contains")),
+        ("POST /api/groups/<gid>/tasks", lambda: post_json(
+            "a", "/api/groups/{gid}/tasks",
+            {"title": "Plan", "deadline": "2030-01-01", "responsible_id": ids["uid_a"], "assignee_ids": [ids["uid_b"]]},
+            remember="tid")()),
+        ("GET /api/groups/<gid>/tasks", get("a", "/api/groups/{gid}/tasks")),
+        ("GET /api/groups/<gid>/tasks (filters)", get(
+            "a", "/api/groups/{gid}/tasks?status=new&done=0&deadline_from=2029-01-01&deadline_to=2031-01-01&limit=10")),
+        ("GET /api/tasks/<tid>", get("b", "/api/tasks/{tid}")),
+        ("GET /api/me/tasks", get("b", "/api/me/tasks")),
+        ("GET /api/me/tasks (filters)", get(
+            "a", "/api/me/tasks?status=new&done=0&deadline_from=2029-01-01&deadline_to=2031-01-01&limit=10")),
+        ("PATCH /api/tasks/<tid>", lambda: client.patch(
+            "/api/tasks/{tid}".format(**ids), json={"status": "in_progress", "assignee_ids": [ids["uid_b"]]}, headers=auth["a"])),
+        ("POST /api/finance", post_json("a", "/api/finance", {"title": "Coffee", "amount": 5})),
+        ("GET /api/finance", get("a", "/api/finance")),
+        ("GET /api/balance", get("a", "/api/balance")),
+        ("GET /api/calendar", get("a", "/api/calendar?from=2029-12-01&to=2030-01-31")),
+        ("POST /api/groups/<gid>/finance/categories", post_json("a", "/api/groups/{gid}/finance/categories", {"name": "Food"}, remember="cat")),
+        ("GET /api/groups/<gid>/finance/categories", get("a", "/api/groups/{gid}/finance/categories")),
+        ("POST /api/groups/<gid>/finance/methods", post_json("a", "/api/groups/{gid}/finance/methods", {"name": "Card"}, remember="met")),
+        ("GET /api/groups/<gid>/finance/methods", get("a", "/api/groups/{gid}/finance/methods")),
+        ("POST /api/groups/<gid>/finance", lambda: post_json(
+            "a", "/api/groups/{gid}/finance",
+            {"kind": "expense", "amount": 10, "category_id": ids["cat"], "method_id": ids["met"]})()),
+        ("GET /api/groups/<gid>/finance", get("a", "/api/groups/{gid}/finance")),
+        ("GET /api/groups/<gid>/finance/balance", get("a", "/api/groups/{gid}/finance/balance")),
+        ("GET /api/groups/<gid>/finance/reports/monthly", get("a", "/api/groups/{gid}/finance/reports/monthly")),
+        ("GET /api/groups/<gid>/finance/reports/categories", get(
+            "a", "/api/groups/{gid}/finance/reports/categories?from=2020-01-01&to=2040-12-31")),
+        ("GET /api/groups/<gid>/finance/reports/methods", get("a", "/api/groups/{gid}/finance/reports/methods?from=2020-01-01")),
+        ("DELETE /api/groups/<gid>/finance/categories", lambda: client.delete(
+            "/api/groups/{gid}/finance/categories".format(**ids), json={"id": ids["cat"]}, headers=auth["a"])),
+        ("DELETE /api/groups/<gid>/finance/methods", lambda: client.delete(
+            "/api/groups/{gid}/finance/methods".format(**ids), json={"id": ids["met"]}, headers=auth["a"])),
+        ("GET /api/groups/<gid>/changes", get("a", "/api/groups/{gid}/changes?since=0")),
+        ("GET /", lambda: client.get("/")),
+        ("GET /health", lambda: client.get("/health")),
+    ], ids, auth
+
+
+def test_scan_pattern():
+    tables = {"tasks", "groups"}
+    assert full_scans(["SCAN tasks"], tables) == {"tasks"}
+    assert full_scans(["SCAN groups AS g"], tables) == {"groups"}
+    assert full_scans(["SCAN tasks USING INDEX ix_tasks_group_id_deadline"], tables) == {"tasks"}
+    assert full_scans(["SCAN tasks USING COVERING INDEX ix_tasks_group_id_id"], tables) == {"tasks"}
+    assert full_scans([
+        "SEARCH tasks USING INDEX ix_tasks_group_id_deadline (group_id=?)",
+        "SEARCH groups USING INTEGER PRIMARY KEY (rowid=?)",
+        "SCAN CONSTANT ROW",
+        "USE TEMP B-TREE FOR ORDER BY",
+    ], tables) == set()
+
+
+def test_no_unexpected_full_scans(app, client):
+    app.config["BOT_API_KEY"] = "plans-key"
+    steps, ids, auth = scenario(client, "plans-key")
+
+    with app.app_context():
+        engine = db.engine
+        tables = set(db.metadata.tables)
+    raw = engine.raw_connection()
+
+    problems: list[str] = []
+    try:
+        for label, call in steps:
+            if label.startswith("POST /api/groups/<gid>/tasks"):
+                # task payloads need user ids, known once both users exist
+                for key in ("a", "b"):
+                    ids[f"uid_{key}"] = client.get("/api/me", headers=auth[key]).get_json()["user"]["id"]
+            # cold caches, so the membership lookups are checked too
+            app.extensions.get("membership_cache") and app.extensions["membership_cache"].clear()
+
+            capture = Capture()
+            event.listen(engine, "before_cursor_execute", capture)
+            try:
+                response = call()
+            finally:
+                event.remove(engine, "before_cursor_execute", capture)
+            if response.status_code >= 400:
+                problems.append(f"{label}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+
+            allowed = EXPECTED_SCANS.get(label, set())
+            for statement, parameters in dict.fromkeys(capture.statements):
+                plan = explain(raw, statement, parameters)
+                scans = full_scans(plan, tables) - allowed
+                if scans:
+                    problems.append(
+                        f"{label}: full scan of {', '.join(sorted(scans))}\n    {' '.join(statement.split())[:300]}\n"
+                        + "\n".join(f"      {detail}" for detail in plan)
+                    )
+    finally:
+        raw.close()
+
+    assert not problems, "\n".join(problems)
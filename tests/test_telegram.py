@@ -0,0 +1,105 @@
+"""validate_init_data: signature, expiry and the cache of validated initData."""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import time
+import urllib.parse
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.app.utils import telegram
+from backend.app.utils.telegram import validate_init_data
+
+TOKEN = "123456:test-token"
+USER = {"id": 42, "first_name": "Alice", "username": "alice"}
+
+
+def sign(fields: dict, token: str = TOKEN) -> str:
+    """initData as Telegram builds it: fields plus the HMAC of their sorted key=value lines."""
+    check = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", token.encode(), hashlib.sha256).digest()
+    digest = hmac.new(secret, check.encode(), hashlib.sha256).hexdigest()
+    return urllib.parse.urlencode({**fields, "hash": digest})
+
+
+def init_data(age: int = 0, token: str = TOKEN) -> str:
+    return sign({"auth_date": str(int(time.time()) - age), "query_id": "q1", "user": json.dumps(USER)}, token)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    telegram._validated.clear()
+    yield
+    telegram._validated.clear()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Moves the "now" validate_init_data sees by `clock.shift` seconds."""
+
+    class Clock(datetime):
+        shift = 0
+
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(time.time() + cls.shift, tz or timezone.utc)
+
+    monkeypatch.setattr(telegram, "datetime", Clock)
+    return Clock
+
+
+def test_valid_data_is_parsed_and_cached():
+    data = init_data()
+    first = validate_init_data(data, TOKEN)
+    assert first is not None and first.user == USER
+    assert len(telegram._validated) == 1
+    assert validate_init_data(data, TOKEN) is first
+
+
+def test_tampered_hash_is_rejected_even_when_the_original_is_cached():
+    data = init_data()
+    assert validate_init_data(data, TOKEN) is not None
+
+    fields = dict(urllib.parse.parse_qsl(data))
+    fields["hash"] = ("0" if fields["hash"][0] != "0" else "1") + fields["hash"][1:]
+    assert validate_init_data(urllib.parse.urlencode(fields), TOKEN) is None
+
+    fields = dict(urllib.parse.parse_qsl(data))
+    fields["user"] = json.dumps({**USER, "id": 43})
+    assert validate_init_data(urllib.parse.urlencode(fields), TOKEN) is None
+    assert len(telegram._validated) == 1
+
+
+def test_wrong_bot_token_is_rejected():
+    data = init_data(token="999:other-bot")
+    assert validate_init_data(data, TOKEN) is None
+
+    # a hit cached under one token does not validate the data for another
+    data = init_data()
+    assert validate_init_data(data, TOKEN) is not None
+    assert validate_init_data(data, "999:other-bot") is None
+
+
+def test_expired_auth_date_on_a_cache_miss():
+    assert validate_init_data(init_data(age=3600), TOKEN, max_age_seconds=60) is None
+    assert len(telegram._validated) == 0
+
+
+def test_cached_data_that_has_since_expired(clock):
+    data = init_data(age=30)
+    assert validate_init_data(data, TOKEN, max_age_seconds=60) is not None
+
+    clock.shift = 31  # the entry is still cached (its TTL runs on the cache's own clock)
+    assert len(telegram._validated) == 1
+    assert validate_init_data(data, TOKEN, max_age_seconds=60) is None
+
+
+def test_stricter_max_age_on_a_cache_hit():
+    data = init_data(age=120)
+    assert validate_init_data(data, TOKEN, max_age_seconds=86400) is not None
+    assert validate_init_data(data, TOKEN, max_age_seconds=60) is None
+    assert validate_init_data(data, TOKEN, max_age_seconds=86400) is not None
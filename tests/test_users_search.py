@@ -0,0 +1,36 @@
+"""GET /api/users prefix search on the lowercased name columns."""
+
+from __future__ import annotations
+
+import pytest
+
+from backend.app.routes.api import _prefix_upper
+
+
+def _names(client, h, q):
+    r = client.get("/api/users", query_string={"q": q, "scope": "all"}, headers=h)
+    assert r.status_code == 200, r.get_json()
+    return sorted(u["first_name"] for u in r.get_json()["items"])
+
+
+@pytest.fixture
+def people(client, login):
+    h, _ = login(1, "searcher")
+    for tg_id, name in enumerate(["Ann", "Anna🌸", "Ann😀 Party", "Annz", "Ano", "😀😀", "😀x", "😁"], start=2):
+        client.post("/api/auth/telegram", json={"initData": "x", "debugUser": {"id": tg_id, "first_name": name}})
+    return h
+
+
+def test_prefix_matches_names_with_characters_outside_the_bmp(client, people):
+    assert _names(client, people, "ann") == ["Ann", "Anna🌸", "Annz", "Ann😀 Party"]
+    assert _names(client, people, "ann😀") == ["Ann😀 Party"]
+    assert _names(client, people, "😀") == ["😀x", "😀😀"]
+
+
+def test_prefix_upper_bound():
+    assert _prefix_upper("ab") == "ac"
+    assert _prefix_upper("a\U0001f600") == "a\U0001f601"
+    assert _prefix_upper("a퟿") == "a"
+    assert _prefix_upper("a\U0010ffff") == "b"
+    assert _prefix_upper("\U0010ffff") is None
+    assert _prefix_upper("") is None